@@ -147,6 +147,49 @@ export default function ChatScreen({ navigation }) {
         }
     };
 
+    // Genesis runs as a background job after calibration; wait for the opening scene
+    const waitForGenesis = async () => {
+        setTyping(true);
+        let failures = 0;
+
+        try {
+            while (failures < 5) {
+                let status;
+                try {
+                    status = await NomiService.getGenesisStatus(currentSimId.current);
+                } catch (e) {
+                    failures += 1;
+                    await new Promise(resolve => setTimeout(resolve, 2000));
+                    continue;
+                }
+
+                if (status.status === 'DONE') {
+                    if (status.persona_name) {
+                        setPersonaName(status.persona_name);
+                    }
+                    setMessages(prev => [...prev, {
+                        id: Date.now().toString() + '_opening',
+                        text: status.opening_scenario,
+                        type: 'ai'
+                    }]);
+                    return;
+                }
+
+                if (status.status === 'FAILED') {
+                    break;
+                }
+            }
+
+            setMessages(prev => [...prev, {
+                id: Date.now().toString() + '_genesis',
+                text: "Reality generation stalled. Send any message to retry.",
+                type: 'system'
+            }]);
+        } finally {
+            setTyping(false);
+        }
+    };
+
     const handleSend = async () => {
         if (!inputText.trim() || sending) return;
         if (simStatus === 'BROKEN') return;
@@ -185,6 +228,16 @@ export default function ChatScreen({ navigation }) {
                 setSimStatus('BROKEN');
             }
 
+            if (response.genesis_job_id && response.genesis_status !== 'DONE') {
+                setMessages(prev => [...prev, {
+                    id: Date.now().toString() + '_ai',
+                    text: response.reply_text,
+                    type: 'ai'
+                }]);
+                await waitForGenesis();
+                return;
+            }
+
             // Add response messages
             const newMessages = [];
 
@@ -61,6 +61,14 @@ export const NomiService = {
         return response.data;
     },
 
+    // Long-polls up to `wait` seconds for the next genesis progress change
+    getGenesisStatus: async (simulationId, wait = 20) => {
+        const response = await apiClient.get(`/simulations/${simulationId}/genesis-status`, {
+            params: { wait }
+        });
+        return response.data;
+    },
+
     resetSimulation: async (simulationId) => {
         const response = await apiClient.post('/simulations/reset', {
             simulation_id: simulationId
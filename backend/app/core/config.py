@@ -7,11 +7,89 @@ class Settings(BaseSettings):
     
     # OpenRouter API (NVIDIA Nemotron)
     OPENROUTER_API_KEY: str
+    OPENROUTER_TIMEOUT_SECONDS: float = 60.0
+    OPENROUTER_MAX_CONNECTIONS: int = 20
+    OPENROUTER_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    OPENROUTER_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    OPENROUTER_HTTP2: bool = True
     
     # Supabase
     SUPABASE_URL: str
     SUPABASE_KEY: str
     
+    # In-process persona/simulation cache
+    CONTEXT_CACHE_MAX_ENTRIES: int = 1024
+    CONTEXT_CACHE_TTL_SECONDS: float = 600.0
+
+    # Write-behind persistence (chat history + fluid state)
+    WRITE_BEHIND_MAX_QUEUE: int = 1000
+    WRITE_BEHIND_BATCH_SIZE: int = 50
+    WRITE_BEHIND_MAX_RETRIES: int = 5
+    WRITE_BEHIND_RETRY_BACKOFF_SECONDS: float = 0.5
+    WRITE_BEHIND_READ_WAIT_SECONDS: float = 5.0
+    WRITE_BEHIND_SHUTDOWN_TIMEOUT_SECONDS: float = 15.0
+    WRITE_BEHIND_DEAD_LETTER_PATH: str = "write_behind_dead_letters.jsonl"  # "" keeps them in memory only
+
+    # Embedding cache (in-memory LRU + memory-mapped disk ring)
+    EMBEDDING_CACHE_DIR: str = ".cache/embeddings"
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 10000
+    EMBEDDING_CACHE_DISK_CAPACITY: int = 100000
+    EMBEDDING_CACHE_FLUSH_INTERVAL_SECONDS: float = 30.0
+
+    # Semantic memory retrieval (per-simulation in-process vector index)
+    MEMORY_MATCH_THRESHOLD: float = 0.15
+    MEMORY_RETRIEVAL_LIMIT: int = 3
+    VECTOR_INDEX_DTYPE: str = "float32"  # or "float16" to halve resident memory
+    VECTOR_INDEX_IDLE_SECONDS: float = 1800.0
+    VECTOR_INDEX_MAX_SIMULATIONS: int = 500
+
+    # Per-request latency budget for chat turns (time skip -> Director -> Actor)
+    CHAT_DEADLINE_SECONDS: float = 25.0
+    DEADLINE_TIME_SKIP_FRACTION: float = 0.25  # of the remaining budget
+    DEADLINE_DIRECTOR_FRACTION: float = 0.4
+    ACTOR_MAX_TOKENS: int = 1024
+    ACTOR_DEGRADED_MAX_TOKENS: int = 384
+    ACTOR_DEGRADE_BELOW_SECONDS: float = 10.0  # switch to the shorter reply below this
+
+    # Background pre-generation of time-skip narratives for idle simulations
+    TIME_SKIP_PREGEN_ENABLED: bool = True
+    TIME_SKIP_PREGEN_INTERVAL_SECONDS: float = 600.0
+    TIME_SKIP_PREGEN_LEAD_MINUTES: int = 30  # start this long before the 4-hour mark
+    TIME_SKIP_PREGEN_WINDOW_HOURS: int = 6
+    TIME_SKIP_PREGEN_MAX_IDLE_HOURS: int = 48  # stop refreshing abandoned simulations
+    TIME_SKIP_PREGEN_BATCH_SIZE: int = 20
+    TIME_SKIP_PREGEN_CONCURRENCY: int = 2
+
+    # Warm pool of pre-generated personas (per archetype x match strategy)
+    PERSONA_POOL_ENABLED: bool = True
+    PERSONA_POOL_PER_BUCKET: int = 2  # 0 disables the pool
+    PERSONA_POOL_REFILL_INTERVAL_SECONDS: float = 300.0
+    PERSONA_POOL_CONCURRENCY: int = 1
+
+    # Calibration step 0: local name/age/gender parser, LLM below this confidence
+    ORACLE_BASICS_CONFIDENCE_THRESHOLD: float = 0.7
+
+    # Asynchronous genesis jobs (in-process queue, state in genesis_jobs)
+    GENESIS_MAX_CONCURRENCY: int = 2
+    GENESIS_JOB_STALE_SECONDS: float = 300.0  # requeue open jobs not updated for this long
+    GENESIS_STATUS_MAX_WAIT_SECONDS: float = 25.0  # long-poll cap for genesis-status
+    GENESIS_STATUS_POLL_SECONDS: float = 2.0  # long-poll re-read interval (job on another worker)
+    GENESIS_SHUTDOWN_TIMEOUT_SECONDS: float = 20.0  # grace for in-flight backstory/memory tasks
+
+    # Cortex: one fused Director+Actor completion instead of two (per-request override)
+    CORTEX_FUSED_MODE: bool = False
+
+    # Local intent classifier: skip the Director LLM for confident small talk
+    INTENT_FAST_PATH: bool = True
+    INTENT_FAST_PATH_THRESHOLD: float = 0.85
+    INTENT_FAST_PATH_MAX_WORDS: int = 4
+
+    # Rolling conversation summaries (background compaction)
+    SUMMARY_EVERY_TURNS: int = 10  # 0 disables compaction
+    SUMMARY_KEEP_RECENT: int = 10  # chat rows left verbatim (>= the history window)
+    SUMMARY_MAX_ROWS_PER_PASS: int = 200
+    SUMMARY_MAX_WORDS: int = 250
+
     # Security
     SECRET_KEY: str
 
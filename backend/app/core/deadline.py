@@ -0,0 +1,73 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Stage name -> number of times that stage ran out of budget and degraded
+degradations: Dict[str, int] = {}
+
+class Deadline:
+    """
+    Request-scoped latency budget.
+    Created once per request and passed down the pipeline; each stage asks
+    for a slice of whatever is left (see within_deadline).
+    """
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def slice(self, fraction: float) -> float:
+        """Seconds a stage may use: `fraction` of the remaining budget."""
+        return self.remaining() * fraction
+
+def record_degradation(stage: str):
+    degradations[stage] = degradations.get(stage, 0) + 1
+    print(f"[DEADLINE] {stage} ran out of budget, degrading")
+
+async def within_deadline(deadline: Optional[Deadline], awaitable: Awaitable[T], fraction: float, stage: str) -> T:
+    """
+    Awaits `awaitable` within `fraction` of the remaining budget.
+    Raises asyncio.TimeoutError (after counting a degradation for `stage`)
+    when the slice runs out; without a deadline it simply awaits.
+    """
+    if deadline is None:
+        return await awaitable
+
+    timeout = deadline.slice(fraction)
+    if timeout <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        record_degradation(stage)
+        raise asyncio.TimeoutError()
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+    except asyncio.TimeoutError:
+        record_degradation(stage)
+        raise
+
+async def stream_within_deadline(deadline: Optional[Deadline], stream: AsyncIterator[Any], stage: str) -> AsyncIterator[Any]:
+    """
+    Re-yields an async generator until the deadline passes, then closes it
+    and raises asyncio.TimeoutError.
+    """
+    try:
+        while True:
+            try:
+                item = await within_deadline(deadline, stream.__anext__(), 1.0, stage)
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        await stream.aclose()
+
+def deadline_stats() -> Dict[str, Any]:
+    return {"degradations": dict(degradations)}
@@ -0,0 +1,238 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import TypeAdapter, ValidationError
+
+# Outcome -> count, for /system/metrics
+extraction_counts: Dict[str, int] = {"strict": 0, "repaired": 0, "failed": 0}
+
+OPENER_RE = re.compile(r"[{\[]")
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "‟": '"', "‘": "'", "’": "'"})
+# What a truncated object can end with after its last complete member
+DANGLING_MEMBER_RE = re.compile(r'(?:,\s*"(?:[^"\\]|\\.)*"\s*:?\s*|,\s*|:\s*)$')
+DANGLING_ITEM_RE = re.compile(r",\s*$")
+CLOSERS = {"{": "}", "[": "]"}
+# Candidates tried per extraction before giving up (prose brackets, wrong shapes)
+MAX_CANDIDATES = 8
+
+class JsonScanner:
+    """
+    Finds the first top-level JSON object or array in text that may carry
+    prose or code fences around it. Incremental: feed() chunks as they
+    arrive (each character is looked at once). Brackets inside strings
+    are ignored. If the candidate turns out not to be JSON, rescan() gives
+    a scanner over the text after its opening bracket.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._length = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._last = ""  # last non-space character outside strings
+        self._string_start = 0
+        self._string_is_key = False
+        self.started = False
+        self.complete = False
+        self.tail = ""  # text after the value in the chunk that closed it
+
+    def feed(self, chunk: str) -> bool:
+        """Consumes a chunk; returns True once the value has closed."""
+        if self.complete:
+            self.tail += chunk
+            return True
+
+        if not self.started:
+            match = OPENER_RE.search(chunk)
+            if not match:
+                return False
+            self.started = True
+            chunk = chunk[match.start():]
+
+        for end, char in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last = char
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = self._length + end
+                self._string_is_key = self._stack[-1] == "}" and self._last in "{,"
+            elif char in CLOSERS:
+                self._stack.append(CLOSERS[char])
+            elif self._stack and char == self._stack[-1]:
+                self._stack.pop()
+                if not self._stack:
+                    self._append(chunk[:end + 1])
+                    self.tail = chunk[end + 1:]
+                    self.complete = True
+                    return True
+            if not char.isspace():
+                self._last = char
+
+        self._append(chunk)
+        return False
+
+    def _append(self, chunk: str):
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+
+    @property
+    def fragment(self) -> str:
+        """The value so far (the whole value once complete)."""
+        return "".join(self._chunks)
+
+    def closed_fragment(self) -> str:
+        """
+        The fragment with a truncated end repaired: an open string value is
+        closed, a dangling comma / key / colon is dropped and the open
+        brackets are closed.
+        """
+        text = self.fragment
+        if self.complete:
+            return text
+        if self._in_string and self._string_is_key:
+            text = text[:self._string_start]
+        elif self._in_string:
+            text = (text[:-1] if self._escape else text) + '"'
+        pattern = DANGLING_MEMBER_RE if self._stack and self._stack[-1] == "}" else DANGLING_ITEM_RE
+        return pattern.sub("", text) + "".join(reversed(self._stack))
+
+    def rescan(self) -> "JsonScanner":
+        """A scanner over everything after this candidate's opening bracket."""
+        scanner = JsonScanner()
+        scanner.feed(self.fragment[1:] + self.tail)
+        return scanner
+
+def strip_trailing_commas(text: str) -> str:
+    """Drops commas directly before a closing bracket, outside strings."""
+    out: List[str] = []
+    pending_comma = -1  # index in out of a comma that may be trailing
+    in_string = escape = False
+    for char in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "}]" and pending_comma >= 0:
+            del out[pending_comma]
+        if not char.isspace() and not (char == "," and not in_string):
+            pending_comma = -1
+        out.append(char)
+        if char == "," and not in_string:
+            pending_comma = len(out) - 1
+    return "".join(out)
+
+def decode_fragment(scanner: JsonScanner) -> Any:
+    """
+    Decodes what a scanner found: strictly first, then with trailing
+    commas removed, truncation closed and smart quotes normalised.
+    Raises ValueError when nothing decodes.
+    """
+    if scanner.complete:
+        try:
+            value = json.loads(scanner.fragment)
+            extraction_counts["strict"] += 1
+            return value
+        except json.JSONDecodeError:
+            pass
+
+    closed = scanner.closed_fragment()
+    for candidate in (strip_trailing_commas(closed), strip_trailing_commas(closed.translate(SMART_QUOTES))):
+        try:
+            value = json.loads(candidate)
+            extraction_counts["repaired"] += 1
+            return value
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("no decodable JSON value")
+
+def _validate(scanner: JsonScanner, adapter: Optional[TypeAdapter]) -> Tuple[bool, Any]:
+    """(True, value) if the scanner's candidate decodes and validates."""
+    try:
+        value = decode_fragment(scanner)
+        return True, adapter.validate_python(value) if adapter is not None else value
+    except (ValueError, ValidationError):
+        return False, None
+
+def extract_json(text: str, adapter: Optional[TypeAdapter] = None, default: Any = None) -> Any:
+    """
+    First JSON object/array in an LLM reply that decodes (repaired if
+    needed) and validates with `adapter` (build TypeAdapters once, at
+    module level). Bracketed prose before it is skipped. Returns `default`
+    when nothing can be recovered or nothing validates.
+    """
+    scanner = JsonScanner()
+    scanner.feed(text or "")
+    for _ in range(MAX_CANDIDATES):
+        if not scanner.started:
+            break
+        ok, value = _validate(scanner, adapter)
+        if ok:
+            return value
+        scanner = scanner.rescan()
+    extraction_counts["failed"] += 1
+    return default
+
+class JsonStreamExtractor:
+    """
+    extract_json over a token stream. feed() returns the validated value as
+    soon as a JSON value that validates closes, skipping candidates that
+    do not (None before that; `done` is then set). After MAX_CANDIDATES
+    failures it gives up: done with no value. Text after the value
+    accumulates in `rest`. finish() tries a value the stream cut off.
+    """
+
+    def __init__(self, adapter: Optional[TypeAdapter] = None):
+        self.adapter = adapter
+        self.scanner = JsonScanner()
+        self.done = False
+        self.rejected = 0
+
+    @property
+    def rest(self) -> str:
+        return self.scanner.tail
+
+    def feed(self, token: str) -> Any:
+        if self.done:
+            self.scanner.feed(token)
+            return None
+        if not self.scanner.feed(token):
+            return None
+
+        # Closed candidates that fail are skipped; an open one waits for more tokens
+        while self.scanner.complete:
+            ok, value = _validate(self.scanner, self.adapter)
+            if ok:
+                self.done = True
+                return value
+            self.rejected += 1
+            if self.rejected >= MAX_CANDIDATES:
+                self.done = True
+                extraction_counts["failed"] += 1
+                return None
+            self.scanner = self.scanner.rescan()
+        return None
+
+    def finish(self) -> Any:
+        if self.done:
+            return None
+        self.done = True
+        ok, value = _validate(self.scanner, self.adapter) if self.scanner.started else (False, None)
+        if not ok:
+            extraction_counts["failed"] += 1
+        return value
+
+def extraction_stats() -> Dict[str, int]:
+    return dict(extraction_counts)
@@ -0,0 +1,74 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+class TaskGraph:
+    """
+    Small async dependency graph.
+    Each node is a coroutine function called with its dependencies'
+    results as keyword arguments; it starts as soon as those finish, so
+    independent nodes run concurrently. A failed node fails its
+    dependents. Wall time per node (excluding the wait on dependencies)
+    is kept in `timings`. `on_done`, if given, is awaited with the name
+    of every node that succeeds (progress reporting; its errors are logged
+    and ignored).
+    """
+
+    def __init__(self, name: str, on_done: Optional[Callable[[str], Awaitable[None]]] = None):
+        self.name = name
+        self.on_done = on_done
+        self._nodes: Dict[str, Tuple[Callable[..., Awaitable[Any]], Tuple[str, ...]]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.timings: Dict[str, float] = {}
+
+    def add(self, name: str, fn: Callable[..., Awaitable[Any]], *deps: str) -> "TaskGraph":
+        """Adds a node; dependencies must already be in the graph (so there are no cycles)."""
+        if name in self._nodes:
+            raise ValueError(f"{self.name}: duplicate node {name!r}")
+        for dep in deps:
+            if dep not in self._nodes:
+                raise ValueError(f"{self.name}: {name!r} depends on unknown node {dep!r}")
+        self._nodes[name] = (fn, deps)
+        return self
+
+    def start(self) -> "TaskGraph":
+        for name in self._nodes:
+            self._tasks[name] = asyncio.create_task(self._run_node(name), name=f"{self.name}:{name}")
+        return self
+
+    async def _run_node(self, name: str) -> Any:
+        fn, deps = self._nodes[name]
+        kwargs = {dep: await self._tasks[dep] for dep in deps}
+        started = time.perf_counter()
+        try:
+            result = await fn(**kwargs)
+        finally:
+            self.timings[name] = time.perf_counter() - started
+
+        if self.on_done is not None:
+            try:
+                await self.on_done(name)
+            except Exception as e:
+                print(f"[TASKGRAPH WARNING] {self.name}: progress callback for {name} failed: {str(e)}")
+        return result
+
+    async def wait(self, *names: str) -> Dict[str, Any]:
+        """
+        Results of the named nodes; raises the first failure. Shielded, so a
+        cancelled caller does not cancel the nodes.
+        """
+        results = await asyncio.shield(asyncio.gather(*(self._tasks[name] for name in names)))
+        return dict(zip(names, results))
+
+    async def finished(self) -> Dict[str, BaseException]:
+        """Waits for every node; returns the ones that failed."""
+        results = await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        return {
+            name: result
+            for name, result in zip(self._tasks, results)
+            if isinstance(result, BaseException)
+        }
+
+    def cancel(self):
+        for task in self._tasks.values():
+            task.cancel()
@@ -1,12 +1,48 @@
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.app.core.config import settings
 from backend.app.routers import oracle, foundry, chat, simulations, system
+from backend.app.services.openrouter import openrouter_service
+from backend.app.services.supabase import supabase_service
+from backend.app.services.persistence import write_behind_queue
+from backend.app.services.embedding_cache import embedding_cache
+from backend.app.services.summarizer import summary_service
+from backend.app.services.pregen import time_skip_pregenerator
+from backend.app.services.persona_pool import persona_pool
+from backend.app.services.genesis_queue import genesis_queue
+from backend.app.services.foundry import foundry_service
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    """
+    Startup/shutdown hooks for process-wide resources.
+    """
+    await openrouter_service.startup()
+    await supabase_service.startup()
+    await write_behind_queue.startup()
+    await embedding_cache.startup()
+    await time_skip_pregenerator.startup()
+    await persona_pool.startup()
+    await genesis_queue.startup()
+    try:
+        yield
+    finally:
+        # Flush queued writes before the HTTP pool goes away
+        await genesis_queue.shutdown()
+        await foundry_service.shutdown()
+        await persona_pool.shutdown()
+        await time_skip_pregenerator.shutdown()
+        await summary_service.shutdown()
+        await write_behind_queue.shutdown()
+        await openrouter_service.shutdown()
+        await embedding_cache.shutdown()
 
 def create_application() -> FastAPI:
     application = FastAPI(
         title=settings.PROJECT_NAME,
+        lifespan=lifespan,
         openapi_url=f"{settings.API_V1_STR}/openapi.json",
         docs_url=f"{settings.API_V1_STR}/docs",
     )
@@ -18,6 +54,7 @@ def create_application() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
     
     # REGISTER ALL ROUTERS (The Full Brain)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Dict, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, Optional, Union
 from uuid import UUID
 from datetime import datetime
 
@@ -36,3 +36,39 @@ class DirectorOutput(BaseModel):
     emotional_reaction: str # e.g., "Annoyed", "Intrigued", "Scared"
     strategy: str # e.g., "Deflect", "Engage", "Test him"
     actor_instruction: str # The specific direction for the dialogue generator
+
+# LLM output shapes (validated with TypeAdapters in core/llm_json.py)
+
+class GeneratedPersona(BaseModel):
+    """
+    Foundry persona JSON; extra keys (age, occupation, hometown, ...) are kept.
+    The core fields are required, so a stray or empty object is rejected.
+    """
+    model_config = ConfigDict(extra="allow")
+
+    name: str = Field(min_length=1)
+    appearance: str = Field(min_length=1)
+    voice_texture: str = Field(min_length=1)
+    core_wound: str = Field(min_length=1)
+    defense_mechanism: str = Field(min_length=1)
+    attachment_style: str = Field(min_length=1)
+    values_matrix: Dict[str, Union[int, float]] = Field(
+        default_factory=lambda: {"silence": 5, "money": 5, "loyalty": 5, "independence": 5}
+    )
+    sexual_orientation: str = "Heterosexual"
+
+class ScenarioAnalysis(BaseModel):
+    empathy: float = 0.5
+    assertiveness: float = 0.5
+    honesty: float = 0.5
+    creativity: float = 0.5
+    anxiety: float = 0.5
+
+class UserBasics(BaseModel):
+    name: str = "User"
+    age: int = 25
+    gender: str = "Unknown"
+
+class TimeSkipNarrative(BaseModel):
+    narrative_text: str
+    new_status: Optional[str] = None
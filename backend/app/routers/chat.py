@@ -1,18 +1,26 @@
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
 from datetime import datetime
+from backend.app.core.config import settings
+from backend.app.core.deadline import Deadline
 from backend.app.services.supabase import supabase_service
 from backend.app.services.cortex import cortex_service
 from backend.app.services.world import world_service
 from backend.app.services.oracle import oracle_service
-from backend.app.services.foundry import foundry_service
+from backend.app.services.genesis_queue import genesis_queue
+from backend.app.services.memory import memory_service
+from backend.app.services.persistence import write_behind_queue
+from backend.app.services.summarizer import summary_service
 
 router = APIRouter()
 
 class ChatRequest(BaseModel):
     simulation_id: str
     user_message: str
+    fused: Optional[bool] = None  # one Director+Actor completion; None = CORTEX_FUSED_MODE
 
 class ChatResponse(BaseModel):
     reply_text: Optional[str] = None
@@ -22,6 +30,187 @@ class ChatResponse(BaseModel):
     is_calibrated: Optional[bool] = None
     persona_name: Optional[str] = None
     opening_scenario: Optional[str] = None
+    genesis_job_id: Optional[str] = None
+    genesis_status: Optional[str] = None  # PENDING | RUNNING | DONE | FAILED
+
+def in_calibration(simulation: Dict[str, Any]) -> bool:
+    """
+    True until genesis has activated the simulation (calibrated simulations
+    stay CALIBRATING while their genesis job runs).
+    """
+    return not simulation.get('is_calibrated', False) or simulation.get('status') == 'CALIBRATING'
+
+async def run_calibration_turn(sim_id: str, simulation: Dict[str, Any], user_message: str) -> ChatResponse:
+    """
+    PHASE 1 (Calibration): Oracle interview, then Genesis once it completes.
+    Genesis runs as a background job (services/genesis_queue.py); the reply
+    carries its id and the client polls /simulations/{id}/genesis-status.
+    """
+    if simulation.get('is_calibrated', False):
+        # Calibrated but not yet active: genesis is running (or failed and is requeued)
+        job = await genesis_queue.submit(sim_id)
+        return ChatResponse(
+            reply_text="[SYSTEM] Reality is still being generated. Stand by...",
+            is_calibrated=True,
+            genesis_job_id=job['id'],
+            genesis_status=job['status']
+        )
+
+    calibration_step = simulation.get('calibration_step', 0)
+    user_profile = simulation.get('user_profile', {})
+
+    # Process calibration step
+    result = await oracle_service.process_calibration_step(
+        simulation_id=sim_id,
+        user_input=user_message,
+        current_step=calibration_step,
+        current_profile=user_profile
+    )
+    
+    # Check if calibration just completed
+    if result['is_calibrated']:
+        # Hand the persona and opening scenario for THIS simulation to the genesis queue
+        job = await genesis_queue.submit(sim_id)
+        
+        return ChatResponse(
+            reply_text="""[CALIBRATION COMPLETE]
+
+Profile analyzed. Match found.
+
+Generating reality...""",
+            is_calibrated=True,
+            genesis_job_id=job['id'],
+            genesis_status=job['status']
+        )
+    else:
+        # Still calibrating - return next System message
+        return ChatResponse(
+            reply_text=result['system_reply'],
+            is_calibrated=False
+        )
+
+
+async def prepare_chat_turn(
+    sim_id: str,
+    context: Dict[str, Any],
+    user_message: str,
+    deadline: Optional[Deadline] = None
+) -> Dict[str, Any]:
+    """
+    PHASE 2 (Chat): Turns the loaded chat context into everything the
+    Cortex needs for one turn (persona, fluid state, time skip, running
+    summary + recent history, memories).
+    """
+    persona = context['persona']
+    if not persona:
+        raise HTTPException(status_code=404, detail="Persona not found for simulation")
+    
+    fluid_state = context['fluid_state']
+    if not fluid_state:
+        raise HTTPException(status_code=404, detail="Fluid state not found")
+    
+    # Last Interaction Time
+    last_interaction = None
+    if context['last_interaction_at']:
+        try:
+            last_interaction = datetime.fromisoformat(
+                context['last_interaction_at'].replace('Z', '+00:00')
+            )
+        except ValueError:
+            last_interaction = datetime.now()
+    else:
+        last_interaction = datetime.now()
+
+    # WORLD ENGINE (Time Skips & Schedule)
+    current_time = datetime.now()
+    narrative_text = None
+    
+    # (the narrative is persisted with the rest of the turn in persist_chat_turn)
+    time_skip_result = await world_service.calculate_time_skip(
+        last_interaction,
+        current_time,
+        persona,
+        pending_time_skip=context.get('pending_time_skip'),
+        deadline=deadline
+    )
+    if time_skip_result:
+        narrative_text = time_skip_result.get('narrative_text')
+        
+    # Get Schedule Context
+    schedule = world_service.get_schedule_state(current_time, persona)
+    fluid_state['current_context'] = f"{schedule['activity']} at {schedule['location']}"
+    
+    # PREPARE CORTEX INPUTS
+    chat_history = list(context['history'])
+    if narrative_text:
+        chat_history = (chat_history + [narrative_text])[-10:]
+    
+    # Memories relevant to this message (falls back to CORE memories)
+    recent_memories = await memory_service.retrieve_relevant_memories(
+        sim_id,
+        user_message,
+        limit=settings.MEMORY_RETRIEVAL_LIMIT,
+        exclude=chat_history
+    )
+    if not recent_memories:
+        recent_memories = list(context['core_memories'])
+
+    return {
+        "persona": persona,
+        "fluid_state": fluid_state,
+        "narrative_text": narrative_text,
+        "chat_history": chat_history,
+        "summary": context.get('summary'),
+        "recent_memories": recent_memories,
+        "message_count": context.get('message_count', 0)
+    }
+
+
+async def persist_chat_turn(
+    sim_id: str,
+    persona: Dict[str, Any],
+    user_message: str,
+    reply_text: Optional[str],
+    narrative_text: Optional[str] = None,
+    message_count: int = 0
+):
+    """
+    PERSISTENCE: Queues the time-skip narrative (if any), the user line and
+    the persona reply for one multi-row insert by the write-behind worker.
+    Every SUMMARY_EVERY_TURNS turns this also schedules summary compaction.
+    """
+    contents = []
+    memory_types = []
+    
+    if narrative_text:
+        contents.append(narrative_text)
+        memory_types.append("NARRATIVE")
+    
+    contents.append(f"User: {user_message}")
+    memory_types.append("CHAT_HISTORY")
+    
+    if reply_text:
+        contents.append(f"{persona.get('name', 'Character')}: {reply_text}")
+        memory_types.append("CHAT_HISTORY")
+    
+    rows = memory_service.build_memory_rows(sim_id, contents, memory_types)
+    await write_behind_queue.enqueue_memories(sim_id, rows)
+    summary_service.after_turn(sim_id, message_count, memory_types.count("CHAT_HISTORY"))
+
+
+async def load_context_or_404(sim_id: str) -> Dict[str, Any]:
+    """
+    FETCH SIMULATION STATE with the rest of the chat context (404 if missing).
+    """
+    # Read-your-writes: let this simulation's queued writes land first
+    await write_behind_queue.wait_idle(sim_id)
+    context = await supabase_service.load_chat_context(sim_id)
+    
+    if not context['simulation']:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    
+    return context
+
 
 @router.post("/message", response_model=ChatResponse)
 async def send_message(request: ChatRequest):
@@ -30,194 +219,148 @@ async def send_message(request: ChatRequest):
     
     PHASE 1 (Calibration):
     - If is_calibrated = False -> Route to Oracle (System Interview)
-    - After calibration completes -> Generate Persona + Scenario
+    - After calibration completes -> Queue Genesis (Persona + Scenario), poll genesis-status
     
     PHASE 2 (Chat):
     - If is_calibrated = True -> Route to Cortex (Character AI)
     """
     try:
-        client = supabase_service.get_client()
+        # Latency budget for the whole turn (each LLM stage degrades instead of overrunning)
+        deadline = Deadline(settings.CHAT_DEADLINE_SECONDS)
         sim_id = request.simulation_id
         
-        # 1. FETCH SIMULATION STATE
-        sim_data = client.table("simulations").select("*").eq("id", sim_id).execute()
-        
-        if not sim_data.data:
-            raise HTTPException(status_code=404, detail="Simulation not found")
-        
-        simulation = sim_data.data[0]
-        is_calibrated = simulation.get('is_calibrated', False)
-        calibration_step = simulation.get('calibration_step', 0)
-        user_profile = simulation.get('user_profile', {})
+        # 1. FETCH SIMULATION STATE (+ chat context, one round trip)
+        context = await load_context_or_404(sim_id)
+        simulation = context['simulation']
         
         # ========================================
         # PHASE 1: CALIBRATION MODE (The System)
         # ========================================
-        if not is_calibrated:
-            # Process calibration step
-            result = oracle_service.process_calibration_step(
-                simulation_id=sim_id,
-                user_input=request.user_message,
-                current_step=calibration_step,
-                current_profile=user_profile
-            )
+        if in_calibration(simulation):
+            return await run_calibration_turn(sim_id, simulation, request.user_message)
+        
+        # ========================================
+        # PHASE 2: CHAT MODE (The Character)
+        # ========================================
+        turn = await prepare_chat_turn(sim_id, context, request.user_message, deadline)
+        persona = turn['persona']
+
+        # RUN CORTEX (Director -> Actor)
+        cortex_result = await cortex_service.process_chat(
+            simulation_id=sim_id,
+            user_input=request.user_message,
+            persona=persona,
+            fluid_state=turn['fluid_state'],
+            recent_memories=turn['recent_memories'],
+            chat_history=turn['chat_history'],
+            summary=turn['summary'],
+            fused=request.fused,
+            deadline=deadline
+        )
+        
+        # PERSISTENCE
+        await persist_chat_turn(sim_id, persona, request.user_message, cortex_result.get('reply_text'), turn['narrative_text'], turn['message_count'])
+
+        return ChatResponse(
+            reply_text=cortex_result.get('reply_text'),
+            narrative_bridge=turn['narrative_text'],
+            director_log=cortex_result.get('director_log'),
+            new_state=cortex_result.get('new_state'),
+            is_calibrated=True,
+            persona_name=persona.get('name')
+        )
             
-            # Check if calibration just completed
-            if result['is_calibrated']:
-                # Generate the persona and opening scenario for THIS simulation
-                genesis_result = foundry_service.genesis_for_simulation(
-                    simulation_id=sim_id,
-                    user_profile=result['user_profile']
-                )
-                
-                # Update simulation with new data
-                print(f"[CHAT] Updating simulation {sim_id} to calibrated")
-                update_result = client.table("simulations").update({
-                    "is_calibrated": True,
-                    "status": "ACTIVE",
-                    "opening_scenario": genesis_result['opening_scenario']
-                }).eq("id", sim_id).execute()
-                print(f"[CHAT] Update result: {update_result.data}")
-                
-                # Create the transition narrative
-                persona_name = genesis_result['persona']['name']
-                transition_text = f"""[CALIBRATION COMPLETE]
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"CHAT ERROR: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-Profile analyzed. Match found.
 
-Generating reality...
+def ndjson_event(event: Dict[str, Any]) -> str:
+    return json.dumps(event, default=str) + "\n"
 
----
 
-{genesis_result['opening_scenario']}"""
-                
-                return ChatResponse(
-                    reply_text=transition_text,
-                    is_calibrated=True,
-                    persona_name=persona_name,
-                    opening_scenario=genesis_result['opening_scenario']
-                )
-            else:
-                # Still calibrating - return next System message
-                return ChatResponse(
-                    reply_text=result['system_reply'],
-                    is_calibrated=False
-                )
+@router.post("/message/stream")
+async def send_message_stream(request: ChatRequest):
+    """
+    Streaming variant of /message (NDJSON, one event per line):
+    
+    - {"type": "bridge", "narrative_bridge": ...}   time-skip narrative (if any)
+    - {"type": "director", "director_log": ...}     Director decision
+    - {"type": "token", "text": ...}               Actor tokens as they arrive
+    - {"type": "done", ...ChatResponse fields}     final reply, persisted
+    - {"type": "error", "detail": ...}             failure after streaming began
+    
+    Calibration turns have no tokens to stream and emit a single "done" event.
+    """
+    try:
+        deadline = Deadline(settings.CHAT_DEADLINE_SECONDS)
+        sim_id = request.simulation_id
+        context = await load_context_or_404(sim_id)
+        simulation = context['simulation']
         
-        # ========================================
-        # PHASE 2: CHAT MODE (The Character)
-        # ========================================
-        else:
-            # Fetch Persona
-            p_data = client.table("persona_core").select("*").eq("simulation_id", sim_id).execute()
-            if not p_data.data:
-                raise HTTPException(status_code=404, detail="Persona not found for simulation")
-            persona = p_data.data[0]
-            
-            # Fetch Fluid State
-            s_data = client.table("fluid_states").select("*").eq("simulation_id", sim_id).execute()
-            if not s_data.data:
-                raise HTTPException(status_code=404, detail="Fluid state not found")
-            fluid_state = s_data.data[0]
+        if in_calibration(simulation):
+            calibration_response = await run_calibration_turn(sim_id, simulation, request.user_message)
             
-            # Fetch Last Interaction Time
-            last_msg_data = client.table("memories")\
-                .select("created_at")\
-                .eq("simulation_id", sim_id)\
-                .order("created_at", desc=True)\
-                .limit(1)\
-                .execute()
-                
-            last_interaction = None
-            if last_msg_data.data:
-                try:
-                    last_interaction = datetime.fromisoformat(
-                        last_msg_data.data[0]['created_at'].replace('Z', '+00:00')
-                    )
-                except ValueError:
-                    last_interaction = datetime.now()
-            else:
-                last_interaction = datetime.now()
-
-            # WORLD ENGINE (Time Skips & Schedule)
-            current_time = datetime.now()
-            narrative_text = None
-            
-            time_skip_result = world_service.calculate_time_skip(last_interaction, current_time, persona)
-            if time_skip_result:
-                narrative_text = time_skip_result.get('narrative_text')
-                if narrative_text:
-                    client.table("memories").insert({
-                        "simulation_id": sim_id,
-                        "content": narrative_text,
-                        "memory_type": "NARRATIVE",
-                        "embedding": None 
-                    }).execute()
-                
-            # Get Schedule Context
-            schedule = world_service.get_schedule_state(current_time, persona)
-            fluid_state['current_context'] = f"{schedule['activity']} at {schedule['location']}"
-            
-            # PREPARE CORTEX INPUTS
-            history_data = client.table("memories")\
-                .select("content")\
-                .eq("simulation_id", sim_id)\
-                .in_("memory_type", ["CHAT_HISTORY", "NARRATIVE"])\
-                .order("created_at", desc=True)\
-                .limit(10)\
-                .execute()
-            
-            chat_history = [row['content'] for row in history_data.data][::-1] if history_data.data else []
-            
-            mem_data = client.table("memories")\
-                .select("content")\
-                .eq("simulation_id", sim_id)\
-                .eq("memory_type", "CORE")\
-                .limit(3)\
-                .execute()
-            recent_memories = [row['content'] for row in mem_data.data] if mem_data.data else []
-
-            # RUN CORTEX (Director -> Actor)
-            cortex_result = cortex_service.process_chat(
-                simulation_id=sim_id,
-                user_input=request.user_message,
-                persona=persona,
-                fluid_state=fluid_state,
-                recent_memories=recent_memories,
-                chat_history=chat_history
-            )
-            
-            # PERSISTENCE
-            client.table("memories").insert({
-                "simulation_id": sim_id,
-                "content": f"User: {request.user_message}",
-                "memory_type": "CHAT_HISTORY"
-            }).execute()
-            
-            if cortex_result.get('reply_text'):
-                client.table("memories").insert({
-                    "simulation_id": sim_id,
-                    "content": f"{persona.get('name', 'Character')}: {cortex_result['reply_text']}",
-                    "memory_type": "CHAT_HISTORY"
-                }).execute()
-
-            return ChatResponse(
-                reply_text=cortex_result.get('reply_text'),
-                narrative_bridge=narrative_text,
-                director_log=cortex_result.get('director_log'),
-                new_state=cortex_result.get('new_state'),
-                is_calibrated=True,
-                persona_name=persona.get('name')
-            )
+            async def calibration_events():
+                yield ndjson_event({"type": "done", **calibration_response.model_dump()})
             
+            return StreamingResponse(calibration_events(), media_type="application/x-ndjson")
+        
+        turn = await prepare_chat_turn(sim_id, context, request.user_message, deadline)
+        
     except HTTPException:
         raise
     except Exception as e:
         import traceback
-        error_detail = f"{str(e)}\n{traceback.format_exc()}"
-        print(f"CHAT ERROR: {error_detail}")
+        print(f"CHAT STREAM ERROR: {str(e)}\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    persona = turn['persona']
+
+    async def chat_events():
+        try:
+            if turn['narrative_text']:
+                yield ndjson_event({"type": "bridge", "narrative_bridge": turn['narrative_text']})
+            
+            async for event in cortex_service.process_chat_stream(
+                simulation_id=sim_id,
+                user_input=request.user_message,
+                persona=persona,
+                fluid_state=turn['fluid_state'],
+                recent_memories=turn['recent_memories'],
+                chat_history=turn['chat_history'],
+                summary=turn['summary'],
+                fused=request.fused,
+                deadline=deadline
+            ):
+                if event['type'] != "result":
+                    yield ndjson_event(event)
+                    continue
+                
+                # PERSISTENCE (once the full reply exists)
+                await persist_chat_turn(sim_id, persona, request.user_message, event.get('reply_text'), turn['narrative_text'], turn['message_count'])
+                
+                final = ChatResponse(
+                    reply_text=event.get('reply_text'),
+                    narrative_bridge=turn['narrative_text'],
+                    director_log=event.get('director_log'),
+                    new_state=event.get('new_state'),
+                    is_calibrated=True,
+                    persona_name=persona.get('name')
+                )
+                yield ndjson_event({"type": "done", **final.model_dump()})
+                
+        except Exception as e:
+            import traceback
+            print(f"CHAT STREAM ERROR: {str(e)}\n{traceback.format_exc()}")
+            yield ndjson_event({"type": "error", "detail": str(e)})
+
+    return StreamingResponse(chat_events(), media_type="application/x-ndjson")
+
 
 @router.post("/start", response_model=ChatResponse)
 async def start_new_simulation():
@@ -225,10 +368,10 @@ async def start_new_simulation():
     Creates a new simulation in calibration mode and returns the first System message.
     """
     try:
-        client = supabase_service.get_client()
+        client = await supabase_service.get_client()
         
         # Create new simulation in calibration mode
-        sim_response = client.table("simulations").insert({
+        sim_response = await client.table("simulations").insert({
             "status": "CALIBRATING",
             "is_calibrated": False,
             "calibration_step": 0,
@@ -23,10 +23,10 @@ async def genesis(request: GenesisRequest):
     """
     try:
         # Generate the Soul
-        persona_data = foundry_service.generate_soul(request.user_vibe)
+        persona_data = await foundry_service.generate_soul(request.user_vibe)
         
         # Persist to DB
-        simulation_id = foundry_service.create_simulation(request.user_vibe, persona_data)
+        simulation_id = await foundry_service.create_simulation(request.user_vibe, persona_data)
         
         return GenesisResponse(
             simulation_id=simulation_id,
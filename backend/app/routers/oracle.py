@@ -34,7 +34,7 @@ async def analyze_user(request: AnalysisRequest):
     Returns the psychometric profile (UserVibe) needed to spawn the Nomi.
     """
     try:
-        profile_data = oracle_service.analyze_reaction(request.scenario, request.user_reaction)
+        profile_data = await oracle_service.analyze_reaction(request.scenario, request.user_reaction)
         # Validate against domain model
         user_vibe = UserVibe(**profile_data)
         return AnalysisResponse(user_vibe=user_vibe)
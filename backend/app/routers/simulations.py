@@ -1,8 +1,17 @@
 
-from fastapi import APIRouter, HTTPException
+import base64
+from datetime import datetime
+from uuid import UUID
+from fastapi import APIRouter, HTTPException, Query, Response
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-from backend.app.services.supabase import supabase_service
+from typing import List, Dict, Any, Optional, Tuple
+from backend.app.core.config import settings
+from backend.app.services.supabase import first_embedded, supabase_service
+from backend.app.services.cache import invalidate_simulation
+from backend.app.services.persistence import write_behind_queue
+from backend.app.services.vector_index import vector_index_registry
+from backend.app.services.summarizer import summary_service
+from backend.app.services.genesis_queue import genesis_queue
 
 router = APIRouter()
 
@@ -16,27 +25,71 @@ class SimulationStatus(BaseModel):
 class ResetRequest(BaseModel):
     simulation_id: str
 
+class GenesisStatus(BaseModel):
+    simulation_id: str
+    job_id: str
+    status: str # PENDING, RUNNING, DONE, FAILED
+    stages: List[str] # completed: profile, persona, scenario, persona_core, fluid_state, backstory, memories
+    attempts: int
+    error: Optional[str] = None
+    persona_name: Optional[str] = None
+    opening_scenario: Optional[str] = None
+
+LIST_PAGE_SIZE = 50
+LIST_MAX_PAGE_SIZE = 100
+
+def encode_cursor(sim: Dict[str, Any]) -> str:
+    """Opaque keyset cursor: the (created_at, id) of the last row on a page."""
+    raw = f"{sim['created_at']}|{sim['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    (created_at, id) from a cursor, re-serialized after parsing: the values
+    go into a PostgREST filter string, so nothing else may pass through.
+    """
+    try:
+        created_at, sim_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at).isoformat(), str(UUID(sim_id))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/list", response_model=List[SimulationStatus])
-async def list_simulations():
+async def list_simulations(
+    response: Response,
+    limit: int = Query(LIST_PAGE_SIZE, ge=1, le=LIST_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None
+):
     """
-    Returns all simulations for the user (in a real app, filtering by user_id would happen here).
+    Returns simulations for the user, newest first (in a real app, filtering by user_id would happen here).
+    One query: persona_core and fluid_states are embedded via PostgREST.
+    Keyset pagination: pass the X-Next-Cursor header of a page as ?cursor= to get the next one.
     """
-    client = supabase_service.get_client()
+    client = await supabase_service.get_client()
+    
+    # Join simulations with persona_core and fluid_states (embedded resources, FK on simulation_id)
+    query = client.table("simulations")\
+        .select("id, status, created_at, persona_core(name, appearance), fluid_states(emotional_bank_account)")\
+        .order("created_at", desc=True)\
+        .order("id", desc=True)\
+        .limit(limit)
     
-    # Join simulations with persona_core and fluid_states
-    # Note: Supabase-py syntax for joins can be tricky. We'll do distinct fetches for safety/speed in this MVP.
+    if status:
+        query = query.eq("status", status)
     
-    sims = client.table("simulations").select("*").execute()
+    if cursor:
+        created_at, sim_id = decode_cursor(cursor)
+        query = query.or_(
+            f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{sim_id})'
+        )
+    
+    sims = await query.execute()
     results = []
     
     for sim in sims.data:
-        # Fetch Persona Name
-        p_data = client.table("persona_core").select("name, appearance").eq("simulation_id", sim['id']).execute()
-        persona = p_data.data[0] if p_data.data else {"name": "Unknown", "appearance": ""}
-        
-        # Fetch State
-        s_data = client.table("fluid_states").select("emotional_bank_account").eq("simulation_id", sim['id']).execute()
-        state = s_data.data[0] if s_data.data else {"emotional_bank_account": 0}
+        persona = first_embedded(sim.get('persona_core')) or {"name": "Unknown", "appearance": ""}
+        state = first_embedded(sim.get('fluid_states')) or {"emotional_bank_account": 0}
         
         results.append(SimulationStatus(
             id=sim['id'],
@@ -45,6 +98,9 @@ async def list_simulations():
             name=persona['name'],
             avatar=persona['appearance'] or "" # Handle None
         ))
+    
+    if len(sims.data) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(sims.data[-1])
         
     return results
 
@@ -55,15 +111,25 @@ async def reset_timeline(request: ResetRequest):
     Wipes the relationship history but keeps the Persona's soul intact.
     Used when a user hits 'Permadeath' and wants to try again.
     """
-    client = supabase_service.get_client()
+    client = await supabase_service.get_client()
     sim_id = request.simulation_id
     
     try:
-        # 1. Reset Status to ACTIVE
-        client.table("simulations").update({"status": "ACTIVE"}).eq("id", sim_id).execute()
+        # 0. Let queued chat writes land so they are not re-added after the wipe,
+        #    and stop any summary compaction that would re-create a SUMMARY row
+        summary_service.cancel(sim_id)
+        await write_behind_queue.wait_idle(sim_id)
+        
+        # 1. Reset Status to ACTIVE (and the activity counters kept by record_memories)
+        await client.table("simulations").update({
+            "status": "ACTIVE",
+            "last_interaction_at": None,
+            "message_count": 0,
+            "pending_time_skip": None
+        }).eq("id", sim_id).execute()
         
         # 2. Reset Fluid State to Neutral
-        client.table("fluid_states").update({
+        await client.table("fluid_states").update({
             "emotional_bank_account": 0,
             "intellectual_boredom": 0,
             "current_craving": "Neutral",
@@ -72,12 +138,51 @@ async def reset_timeline(request: ResetRequest):
         
         # 3. Wipe Chat History (But keep CORE memories so she has a backstory)
         # Deleting rows where memory_type IS NOT 'CORE'
-        client.table("memories").delete()\
+        await client.table("memories").delete()\
             .eq("simulation_id", sim_id)\
             .neq("memory_type", "CORE")\
             .execute()
+        # ...including chat rows already folded into summaries
+        await client.table("memories_archive").delete()\
+            .eq("simulation_id", sim_id)\
+            .execute()
+        
+        # 4. Drop cached simulation/persona rows and the memory index
+        invalidate_simulation(sim_id)
+        vector_index_registry.evict(sim_id)
             
         return {"message": "Timeline reset successfully. She doesn't remember you."}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{simulation_id}/genesis-status", response_model=GenesisStatus)
+async def genesis_status(
+    simulation_id: str,
+    wait: float = Query(0.0, ge=0.0, le=settings.GENESIS_STATUS_MAX_WAIT_SECONDS)
+):
+    """
+    Progress of the simulation's genesis job (queued when calibration completes).
+    With ?wait=N and an unfinished job, long-polls up to N seconds for the
+    next change. A job left stale by a stopped worker is requeued.
+    """
+    job = await genesis_queue.get_job(simulation_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No genesis job for this simulation")
+
+    if genesis_queue.is_stale(job):
+        job = await genesis_queue.submit(simulation_id)
+    elif wait > 0 and job['status'] in ("PENDING", "RUNNING"):
+        job = await genesis_queue.wait_for_change(simulation_id, job, wait)
+
+    result = job.get('result') or {}
+    return GenesisStatus(
+        simulation_id=simulation_id,
+        job_id=job['id'],
+        status=job['status'],
+        stages=job.get('stages') or [],
+        attempts=job.get('attempts', 0),
+        error=job.get('error'),
+        persona_name=result.get('persona_name'),
+        opening_scenario=result.get('opening_scenario')
+    )
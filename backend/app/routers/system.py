@@ -4,6 +4,20 @@ from pydantic import BaseModel
 from typing import Dict, Any
 from backend.app.services.supabase import supabase_service
 from backend.app.services.openrouter import openrouter_service
+from backend.app.core.deadline import deadline_stats
+from backend.app.core.llm_json import extraction_stats
+from backend.app.services.cache import cache_stats
+from backend.app.services.persistence import write_behind_queue
+from backend.app.services.embedding_cache import embedding_cache
+from backend.app.services.vector_index import vector_index_registry
+from backend.app.services.summarizer import summary_service
+from backend.app.services.cortex import cortex_service
+from backend.app.services.intent import intent_classifier
+from backend.app.services.pregen import time_skip_pregenerator
+from backend.app.services.persona_pool import persona_pool
+from backend.app.services.foundry import foundry_service
+from backend.app.services.genesis_queue import genesis_queue
+from backend.app.services.oracle import oracle_service
 
 router = APIRouter()
 
@@ -44,7 +58,8 @@ async def run_diagnostics():
     """
     # 1. Check Database
     try:
-        supabase_service.get_client().table("simulations").select("count", count="exact").limit(1).execute()
+        client = await supabase_service.get_client()
+        await client.table("simulations").select("count", count="exact").limit(1).execute()
         db_status = "connected"
     except Exception as e:
         db_status = f"error: {str(e)}"
@@ -52,7 +67,7 @@ async def run_diagnostics():
     # 2. Check AI Engine (Nvidia)
     try:
         # Simple generation check - SKIPPED to prevent timeouts on mobile launch
-        # openrouter_service.generate_text("test", max_tokens=1)
+        # await openrouter_service.agenerate_text("test", max_tokens=1)
         ai_status = "operational"
     except Exception as e:
         ai_status = f"error: {str(e)}"
@@ -62,3 +77,25 @@ async def run_diagnostics():
         ai_engine=ai_status,
         vector_store="ready" if db_status == "connected" else "unavailable"
     )
+
+@router.get("/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    """
+    In-process performance counters (per worker).
+    """
+    return {
+        "cache": cache_stats(),
+        "write_behind": write_behind_queue.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "vector_index": vector_index_registry.stats(),
+        "summaries": summary_service.stats(),
+        "cortex": cortex_service.stats(),
+        "intent": intent_classifier.stats(),
+        "deadline": deadline_stats(),
+        "time_skip": time_skip_pregenerator.stats(),
+        "persona_pool": persona_pool.stats(),
+        "genesis": foundry_service.stats(),
+        "genesis_queue": genesis_queue.stats(),
+        "calibration": oracle_service.stats(),
+        "llm_json": extraction_stats()
+    }
@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional
+from backend.app.core.config import settings
+
+class TTLCache:
+    """
+    Bounded LRU cache with a per-entry time-to-live and hit/miss counters.
+    Values are shared, not copied: callers must treat them as read-only.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+# Persona rows are written once at genesis and never change.
+persona_cache = TTLCache("persona", settings.CONTEXT_CACHE_MAX_ENTRIES, settings.CONTEXT_CACHE_TTL_SECONDS)
+
+# Simulation metadata (only cached once calibrated; calibration rewrites it every step).
+simulation_cache = TTLCache("simulation", settings.CONTEXT_CACHE_MAX_ENTRIES, settings.CONTEXT_CACHE_TTL_SECONDS)
+
+# Compiled weekly schedules by persona id (persona rows never change)
+schedule_cache = TTLCache("schedule", settings.CONTEXT_CACHE_MAX_ENTRIES, settings.CONTEXT_CACHE_TTL_SECONDS)
+
+def invalidate_simulation(simulation_id: str):
+    """
+    Drops every cached row for a simulation. Call after any write to
+    simulations/persona_core (reset, calibration, status changes).
+    """
+    persona_cache.invalidate(simulation_id)
+    simulation_cache.invalidate(simulation_id)
+
+def cache_stats() -> Dict[str, Any]:
+    return {
+        persona_cache.name: persona_cache.stats(),
+        simulation_cache.name: simulation_cache.stats(),
+        schedule_cache.name: schedule_cache.stats()
+    }
@@ -1,28 +1,54 @@
 
+import asyncio
 import json
-import re
-from typing import Dict, List, Any, Optional
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
+from pydantic import TypeAdapter
+from backend.app.core.config import settings
+from backend.app.core.deadline import Deadline, record_degradation, stream_within_deadline, within_deadline
+from backend.app.core.llm_json import JsonStreamExtractor, extract_json
 from backend.app.services.openrouter import openrouter_service
 from backend.app.services.supabase import supabase_service
+from backend.app.services.cache import invalidate_simulation
+from backend.app.services.persistence import write_behind_queue
+from backend.app.services.intent import intent_classifier
 from backend.app.models.domain import DirectorOutput
 
+# Separates the Director JSON from the reply in fused completions
+FUSED_REPLY_MARKER = "===REPLY==="
+# Give up on a fused stream if no marker shows up within this many characters
+FUSED_HEADER_MAX_CHARS = 2000
+
+DIRECTOR_ADAPTER = TypeAdapter(DirectorOutput)
+
 class CortexService:
     """
     The Cortex - Handles all character AI interactions.
     Uses DYNAMIC persona data injected at runtime.
     """
+
+    def __init__(self):
+        self.fused_turns = 0
+        self.fused_fallbacks = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "fused_turns": self.fused_turns,
+            "fused_fallbacks": self.fused_fallbacks
+        }
     
-    def check_relationship_health(self, simulation_id: str, fluid_state: Dict[str, Any]) -> Optional[str]:
+    async def check_relationship_health(self, simulation_id: str, fluid_state: Dict[str, Any]) -> Optional[str]:
         """
         Gatekeeper: Checks if the relationship is healthy enough to continue.
         """
         trust = fluid_state.get('emotional_bank_account', 0)
         boredom = fluid_state.get('intellectual_boredom', 0)
-        client = supabase_service.get_client()
+        client = await supabase_service.get_client()
 
         # 1. PERMADEATH
         if trust <= -100:
-            client.table("simulations").update({"status": "BROKEN"}).eq("id", simulation_id).execute()
+            await client.table("simulations").update({"status": "BROKEN"}).eq("id", simulation_id).execute()
+            invalidate_simulation(simulation_id)
             return "[SYSTEM] This contact has blocked you. The connection is severed."
 
         # 2. GHOSTING
@@ -31,16 +57,78 @@ class CortexService:
 
         return None
 
-    def director_analysis(
+    def _intimacy_logic(self, trust: int) -> str:
+        """Intimacy Gating rules shared by the Director and the fused prompt."""
+        return f"""
+        RELATIONSHIP RULES:
+        1. Current Trust Score: {trust}/100.
+        2. IF User makes a Sexual/Romantic advance AND Trust < 50:
+           - REACTION: Disgust or Coldness.
+           - STRATEGY: Reject firmly. Use the character's defense mechanism.
+        3. IF User makes a Sexual/Romantic advance AND Trust >= 50:
+           - REACTION: Reciprocal/Flirty.
+           - STRATEGY: Lean into it authentically.
+        """
+
+    def _writing_rules(self, persona_name: str) -> str:
+        """Actor writing rules + example, shared by the Actor and the fused prompt."""
+        return f"""═══════════════════════════════════════════════════════════
+        WRITING RULES (CRITICAL - FOLLOW EXACTLY)
+        ═══════════════════════════════════════════════════════════
+        
+        1. **3-LAYER FORMAT:**
+           - *Italics* for narration: body language, environment, sensory details, internal thoughts
+           - Normal text for spoken dialogue
+           - Mix both in every response
+        
+        2. **SHOW THE SCENE:**
+           - Describe what {persona_name} is doing physically (leaning forward, playing with hair, looking away)
+           - Include environment details (the coffee cup, the rain outside, the café noise)
+           - Show micro-expressions (a slight smirk, eyes narrowing, a quick glance)
+        
+        3. **USE EMOJIS:**
+           - Add 1-3 relevant emojis per response
+           - Use them for tone (😅 for awkward, 🙄 for sarcasm, 💀 for dramatic)
+           - Place them naturally in the text
+        
+        4. **BE REAL:**
+           - {persona_name} has opinions, sass, and personality
+           - They ask questions back
+           - They tease, challenge, and react genuinely
+           - Show vulnerability when appropriate
+        
+        5. **LENGTH:**
+           - Usually 2-4 paragraphs
+           - Enough to be immersive but not overwhelming
+        
+        ═══════════════════════════════════════════════════════════
+        EXAMPLE OUTPUT FORMAT
+        ═══════════════════════════════════════════════════════════
+        
+        *{persona_name} looks up from their coffee, one eyebrow raised. A strand of hair falls across their face, but they don't bother fixing it. There's a spark of genuine amusement in their eyes.*
+
+        "Okay, that's... actually kind of hilarious," they say, a dry laugh escaping. *They lean back in the chair, crossing their arms loosely.* "But seriously though, you can't just say that and not explain. I'm going to need the full story." 😏
+
+        *They take a sip of coffee, watching you over the rim of the cup, waiting.*"""
+
+    def parse_director_output(self, raw_response: str) -> Optional[DirectorOutput]:
+        """Parses the Director JSON (fences, prose and small slips tolerated); None if it is unusable."""
+        return extract_json(raw_response, DIRECTOR_ADAPTER)
+
+    async def director_analysis(
         self, 
         user_input: str, 
         persona: Dict[str, Any], 
         fluid_state: Dict[str, Any], 
-        recent_memories: List[str]
+        recent_memories: List[str],
+        summary: Optional[str] = None,
+        deadline: Optional[Deadline] = None
     ) -> DirectorOutput:
         """
         The Director Agent: Analyzes input and enforces Intimacy Gating.
         Uses DYNAMIC persona data - no hardcoded names or traits.
+        Gets DEADLINE_DIRECTOR_FRACTION of the remaining budget, then
+        degrades to the local heuristic director.
         """
         trust = fluid_state.get('emotional_bank_account', 0)
         
@@ -50,18 +138,10 @@ class CortexService:
         defense_mechanism = persona.get('defense_mechanism', 'Emotional avoidance')
         values_matrix = persona.get('values_matrix', {})
         
-        intimacy_logic = f"""
-        RELATIONSHIP RULES:
-        1. Current Trust Score: {trust}/100.
-        2. IF User makes a Sexual/Romantic advance AND Trust < 50:
-           - REACTION: Disgust or Coldness.
-           - STRATEGY: Reject firmly. Use the character's defense mechanism.
-        3. IF User makes a Sexual/Romantic advance AND Trust >= 50:
-           - REACTION: Reciprocal/Flirty.
-           - STRATEGY: Lean into it authentically.
-        """
+        intimacy_logic = self._intimacy_logic(trust)
 
         memory_context = "\n".join([f"- {m}" for m in recent_memories]) if recent_memories else "No recent memories."
+        story_so_far = summary or "Nothing yet."
 
         system_prompt = f"""
         You are the DIRECTOR for the persona "{persona_name}".
@@ -78,6 +158,9 @@ class CortexService:
 
         {intimacy_logic}
 
+        STORY SO FAR:
+        {story_so_far}
+
         RECENT CONTEXT:
         {memory_context}
 
@@ -97,32 +180,38 @@ class CortexService:
         }}
         """
 
-        raw_response = openrouter_service.generate_text(system_prompt, temperature=0.4)
-        clean_json = re.sub(r"```json|```", "", raw_response).strip()
-        
         try:
-            data = json.loads(clean_json)
-            return DirectorOutput(**data)
-        except (json.JSONDecodeError, ValueError):
-            return DirectorOutput(
-                internal_monologue="Processing error.",
-                emotional_reaction="Neutral",
-                strategy="Default",
-                actor_instruction="Respond normally."
+            raw_response = await within_deadline(
+                deadline,
+                openrouter_service.agenerate_text(system_prompt, temperature=0.4),
+                settings.DEADLINE_DIRECTOR_FRACTION,
+                "director"
             )
+        except asyncio.TimeoutError:
+            return intent_classifier.heuristic_director_output(user_input, persona, trust)
+        director_output = self.parse_director_output(raw_response)
+        if director_output is not None:
+            return director_output
+        return DirectorOutput(
+            internal_monologue="Processing error.",
+            emotional_reaction="Neutral",
+            strategy="Default",
+            actor_instruction="Respond normally."
+        )
 
-    def actor_generation(
+    def build_actor_prompt(
         self, 
         user_input: str, 
         director_output: DirectorOutput, 
         persona: Dict[str, Any], 
-        chat_history: List[str]
+        chat_history: List[str],
+        summary: Optional[str] = None
     ) -> str:
         """
-        The Actor Agent: Generates RICH, CINEMATIC, IMMERSIVE dialogue.
-        Uses the 3-Layer Format with emojis and personality.
+        Builds the Actor prompt (shared by the blocking and streaming paths).
         """
         history_text = "\n".join(chat_history[-5:]) if chat_history else "First interaction."
+        story_so_far = summary or "This is a new relationship."
         
         # Get ALL dynamic persona data
         persona_name = persona.get('name', 'Character')
@@ -148,56 +237,250 @@ class CortexService:
         Director Note: {director_output.actor_instruction}
         Internal Thought: {director_output.internal_monologue}
         
+        Story So Far:
+        {story_so_far}
+        
         Previous Chat:
         {history_text}
         
+        {self._writing_rules(persona_name)}
+        
         ═══════════════════════════════════════════════════════════
-        WRITING RULES (CRITICAL - FOLLOW EXACTLY)
+        NOW WRITE {persona_name.upper()}'S RESPONSE
         ═══════════════════════════════════════════════════════════
+        """
         
-        1. **3-LAYER FORMAT:**
-           - *Italics* for narration: body language, environment, sensory details, internal thoughts
-           - Normal text for spoken dialogue
-           - Mix both in every response
+        return system_prompt
+
+    async def actor_generation(
+        self, 
+        user_input: str, 
+        director_output: DirectorOutput, 
+        persona: Dict[str, Any], 
+        chat_history: List[str],
+        summary: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """
+        The Actor Agent: Generates RICH, CINEMATIC, IMMERSIVE dialogue.
+        Uses the 3-Layer Format with emojis and personality.
+        Uses the rest of the budget: a shorter reply when little is left,
+        a canned in-character line when it runs out.
+        """
+        system_prompt = self.build_actor_prompt(user_input, director_output, persona, chat_history, summary)
+        try:
+            return await within_deadline(
+                deadline,
+                openrouter_service.agenerate_text(system_prompt, temperature=0.9, max_tokens=self._actor_max_tokens(deadline)),
+                1.0,
+                "actor"
+            )
+        except asyncio.TimeoutError:
+            return self._degraded_reply()
+
+    async def actor_generation_stream(
+        self, 
+        user_input: str, 
+        director_output: DirectorOutput, 
+        persona: Dict[str, Any], 
+        chat_history: List[str],
+        summary: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[str]:
+        """
+        Streaming Actor: yields reply tokens as the model produces them.
+        Stops at the deadline (with a canned line if nothing arrived yet).
+        """
+        system_prompt = self.build_actor_prompt(user_input, director_output, persona, chat_history, summary)
+        stream = openrouter_service.astream_text(system_prompt, temperature=0.9, max_tokens=self._actor_max_tokens(deadline))
+        emitted = False
+        try:
+            async for token in stream_within_deadline(deadline, stream, "actor"):
+                emitted = True
+                yield token
+        except asyncio.TimeoutError:
+            if not emitted:
+                yield self._degraded_reply()
+
+    def _actor_max_tokens(self, deadline: Optional[Deadline]) -> int:
+        if deadline is not None and deadline.remaining() < settings.ACTOR_DEGRADE_BELOW_SECONDS:
+            record_degradation("actor_short")
+            return settings.ACTOR_DEGRADED_MAX_TOKENS
+        return settings.ACTOR_MAX_TOKENS
+
+    def _degraded_reply(self) -> str:
+        """In-character stand-in when the Actor has no time left."""
+        return "*glances at their phone, distracted for a second* Sorry... say that again? 😅"
+
+    def build_fused_prompt(
+        self,
+        user_input: str,
+        persona: Dict[str, Any],
+        fluid_state: Dict[str, Any],
+        recent_memories: List[str],
+        chat_history: List[str],
+        summary: Optional[str] = None
+    ) -> str:
+        """
+        One prompt for Director + Actor: the Director JSON on the first line,
+        then FUSED_REPLY_MARKER, then the reply (so the reply can be streamed).
+        """
+        trust = fluid_state.get('emotional_bank_account', 0)
+        persona_name = persona.get('name', 'Character')
+        memory_context = "\n".join([f"- {m}" for m in recent_memories]) if recent_memories else "No recent memories."
+        history_text = "\n".join(chat_history[-5:]) if chat_history else "First interaction."
+        story_so_far = summary or "This is a new relationship."
+
+        system_prompt = f"""
+        You are both the DIRECTOR and the MASTER STORYTELLER for the character "{persona_name}".
         
-        2. **SHOW THE SCENE:**
-           - Describe what {persona_name} is doing physically (leaning forward, playing with hair, looking away)
-           - Include environment details (the coffee cup, the rain outside, the café noise)
-           - Show micro-expressions (a slight smirk, eyes narrowing, a quick glance)
+        ═══════════════════════════════════════════════════════════
+        CHARACTER FILE
+        ═══════════════════════════════════════════════════════════
+        Name: {persona_name}
+        Appearance: {persona.get('appearance', '')}
+        Voice: {persona.get('voice_texture', 'Natural speaking voice')}
+        Core Wound (HIDDEN - affects behavior): {persona.get('core_wound', 'Unknown trauma')}
+        Defense Mechanism: {persona.get('defense_mechanism', 'Emotional avoidance')}
+        Values: {json.dumps(persona.get('values_matrix', {}))}
         
-        3. **USE EMOJIS:**
-           - Add 1-3 relevant emojis per response
-           - Use them for tone (😅 for awkward, 🙄 for sarcasm, 💀 for dramatic)
-           - Place them naturally in the text
+        CURRENT STATE:
+        - Trust: {trust} / 100
+        - Context: {fluid_state.get('current_context', 'Unknown location')}
+        {self._intimacy_logic(trust)}
+        Story So Far:
+        {story_so_far}
         
-        4. **BE REAL:**
-           - {persona_name} has opinions, sass, and personality
-           - They ask questions back
-           - They tease, challenge, and react genuinely
-           - Show vulnerability when appropriate
+        Relevant Memories:
+        {memory_context}
         
-        5. **LENGTH:**
-           - Usually 2-4 paragraphs
-           - Enough to be immersive but not overwhelming
+        Previous Chat:
+        {history_text}
+        
+        User said: "{user_input}"
         
         ═══════════════════════════════════════════════════════════
-        EXAMPLE OUTPUT FORMAT
+        STEP 1 - DIRECTOR
         ═══════════════════════════════════════════════════════════
+        Analyze the input. Is it normal chat, conflict, or romantic advance?
+        Determine the Strategy based on Trust Score and {persona_name}'s personality.
+        Write your decision as ONE LINE of JSON with exactly these keys:
+        {{"internal_monologue": "...", "emotional_reaction": "...", "strategy": "...", "actor_instruction": "..."}}
         
-        *{persona_name} looks up from their coffee, one eyebrow raised. A strand of hair falls across their face, but they don't bother fixing it. There's a spark of genuine amusement in their eyes.*
-
-        "Okay, that's... actually kind of hilarious," they say, a dry laugh escaping. *They lean back in the chair, crossing their arms loosely.* "But seriously though, you can't just say that and not explain. I'm going to need the full story." 😏
-
-        *They take a sip of coffee, watching you over the rim of the cup, waiting.*
+        ═══════════════════════════════════════════════════════════
+        STEP 2 - ACTOR
+        ═══════════════════════════════════════════════════════════
+        On the next line write {FUSED_REPLY_MARKER} and then {persona_name}'s response,
+        following your own actor_instruction.
+        
+        {self._writing_rules(persona_name)}
         
         ═══════════════════════════════════════════════════════════
-        NOW WRITE {persona_name.upper()}'S RESPONSE
+        OUTPUT FORMAT (EXACTLY)
         ═══════════════════════════════════════════════════════════
+        {{"internal_monologue": "...", "emotional_reaction": "...", "strategy": "...", "actor_instruction": "..."}}
+        {FUSED_REPLY_MARKER}
+        {persona_name.upper()}'S RESPONSE
         """
-        
-        return openrouter_service.generate_text(system_prompt, temperature=0.9)
 
-    def update_fluid_state(
+        return system_prompt
+
+    def split_fused_output(self, raw_response: str) -> Optional[Tuple[DirectorOutput, str]]:
+        """
+        Splits a fused completion into (DirectorOutput, reply); None when the
+        model did not follow the format.
+        """
+        head, marker, reply = raw_response.partition(FUSED_REPLY_MARKER)
+        if not marker:
+            return None
+        director_output = self.parse_director_output(head)
+        reply = reply.strip()
+        if director_output is None or not reply:
+            return None
+        return director_output, reply
+
+    async def fused_generation(
+        self,
+        user_input: str,
+        persona: Dict[str, Any],
+        fluid_state: Dict[str, Any],
+        recent_memories: List[str],
+        chat_history: List[str],
+        summary: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Optional[Tuple[DirectorOutput, str]]:
+        """
+        Director + Actor in a single completion (None on parse failure or timeout).
+        """
+        system_prompt = self.build_fused_prompt(user_input, persona, fluid_state, recent_memories, chat_history, summary)
+        try:
+            raw_response = await within_deadline(
+                deadline,
+                openrouter_service.agenerate_text(system_prompt, temperature=0.8, max_tokens=1280),
+                1.0,
+                "fused"
+            )
+        except asyncio.TimeoutError:
+            return None
+        return self.split_fused_output(raw_response)
+
+    async def fused_generation_stream(
+        self,
+        user_input: str,
+        persona: Dict[str, Any],
+        fluid_state: Dict[str, Any],
+        recent_memories: List[str],
+        chat_history: List[str],
+        summary: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming fused completion. Yields ("director", DirectorOutput) once the
+        marker arrives, then ("token", text) per reply delta. Yields nothing if
+        the Director header is malformed (or the deadline passes before it),
+        so the caller can fall back. The header is parsed as soon as its JSON
+        closes; if the marker arrives before any valid Director JSON, the
+        header is given up on.
+        """
+        system_prompt = self.build_fused_prompt(user_input, persona, fluid_state, recent_memories, chat_history, summary)
+        stream = openrouter_service.astream_text(system_prompt, temperature=0.8, max_tokens=1280)
+        extractor = JsonStreamExtractor(DIRECTOR_ADAPTER)
+        director_output = None
+        header = ""
+        in_reply = False
+        try:
+            async for token in stream_within_deadline(deadline, stream, "fused"):
+                if in_reply:
+                    yield ("token", token)
+                    continue
+
+                header += token
+                if extractor.done:
+                    extractor.feed(token)
+                else:
+                    director_output = extractor.feed(token)
+                    if director_output is None and (extractor.done or FUSED_REPLY_MARKER in header):
+                        return
+
+                marker = ""
+                if extractor.done:
+                    _, marker, rest = extractor.rest.partition(FUSED_REPLY_MARKER)
+                if not marker:
+                    if len(header) > FUSED_HEADER_MAX_CHARS:
+                        return
+                    continue
+
+                in_reply = True
+                yield ("director", director_output)
+                rest = rest.lstrip()
+                if rest:
+                    yield ("token", rest)
+        except asyncio.TimeoutError:
+            return
+        finally:
+            await stream.aclose()
+
+    async def update_fluid_state(
         self,
         simulation_id: str,
         director_output: DirectorOutput,
@@ -229,47 +512,66 @@ class CortexService:
         new_trust = max(-100, min(100, current_state.get('emotional_bank_account', 0) + trust_delta))
         new_boredom = max(0, min(100, current_state.get('intellectual_boredom', 0) + boredom_delta))
         
-        client = supabase_service.get_client()
-        client.table("fluid_states").update({
+        # Persisted off the critical path (write-behind queue)
+        await write_behind_queue.enqueue_fluid_state(simulation_id, {
             "emotional_bank_account": new_trust,
             "intellectual_boredom": new_boredom,
-            "last_updated": "now()"
-        }).eq("simulation_id", simulation_id).execute()
+            "last_updated": datetime.now(timezone.utc).isoformat()
+        })
         
         return {
             "emotional_bank_account": new_trust,
             "intellectual_boredom": new_boredom
         }
 
-    def process_chat(
+    async def process_chat(
         self, 
         simulation_id: str,
         user_input: str, 
         persona: Dict[str, Any], 
         fluid_state: Dict[str, Any], 
         recent_memories: List[str],
-        chat_history: List[str]
+        chat_history: List[str],
+        summary: Optional[str] = None,
+        fused: Optional[bool] = None,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """
         Orchestrator: Check Health -> Director -> Actor -> State Manager
+        Confident small talk gets its Director decision from the local intent
+        classifier. In fused mode (per call, or CORTEX_FUSED_MODE by default)
+        Director and Actor share one completion; a malformed one falls back
+        to two calls. With a deadline every LLM stage degrades instead of
+        overrunning it.
         """
         # 1. Gatekeeper Check
-        block_reason = self.check_relationship_health(simulation_id, fluid_state)
+        block_reason = await self.check_relationship_health(simulation_id, fluid_state)
         if block_reason:
-            return {
-                "reply_text": block_reason,
-                "director_log": {"internal_monologue": "Connection blocked."},
-                "new_state": fluid_state
-            }
+            return self._blocked_result(block_reason, fluid_state)
 
-        # 2. Director Thinks (With Intimacy Check)
-        director_result = self.director_analysis(user_input, persona, fluid_state, recent_memories)
-        
-        # 3. Actor Speaks
-        actor_reply = self.actor_generation(user_input, director_result, persona, chat_history)
+        if fused is None:
+            fused = settings.CORTEX_FUSED_MODE
+
+        # Local fast path (no LLM call for the Director)
+        director_result = intent_classifier.fast_director_output(user_input, persona)
+
+        fused_result = None
+        if fused and director_result is None:
+            fused_result = await self.fused_generation(user_input, persona, fluid_state, recent_memories, chat_history, summary, deadline)
+            self._count_fused(fused_result is not None)
+
+        if fused_result is not None:
+            director_result, actor_reply = fused_result
+        else:
+            # 2. Director Thinks (With Intimacy Check)
+            if director_result is None:
+                director_result = await self.director_analysis(user_input, persona, fluid_state, recent_memories, summary, deadline)
+            
+            # 3. Actor Speaks
+            actor_reply = await self.actor_generation(user_input, director_result, persona, chat_history, summary, deadline)
         
         # 4. State Updates
-        new_state = self.update_fluid_state(simulation_id, director_result, fluid_state, user_input)
+        new_state = await self.update_fluid_state(simulation_id, director_result, fluid_state, user_input)
         
         return {
             "reply_text": actor_reply,
@@ -277,4 +579,82 @@ class CortexService:
             "new_state": new_state
         }
 
+    async def process_chat_stream(
+        self, 
+        simulation_id: str,
+        user_input: str, 
+        persona: Dict[str, Any], 
+        fluid_state: Dict[str, Any], 
+        recent_memories: List[str],
+        chat_history: List[str],
+        summary: Optional[str] = None,
+        fused: Optional[bool] = None,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming Orchestrator: same pipeline as process_chat, emitted as events.
+        Yields {"type": "director"}, then {"type": "token"} per Actor delta,
+        and finally {"type": "result"} carrying the same dict process_chat returns.
+        """
+        # 1. Gatekeeper Check
+        block_reason = await self.check_relationship_health(simulation_id, fluid_state)
+        if block_reason:
+            yield {"type": "result", **self._blocked_result(block_reason, fluid_state)}
+            return
+
+        if fused is None:
+            fused = settings.CORTEX_FUSED_MODE
+
+        # Local fast path (no LLM call for the Director)
+        director_result = intent_classifier.fast_director_output(user_input, persona)
+        if director_result is not None:
+            yield {"type": "director", "director_log": director_result.model_dump()}
+        reply_parts: List[str] = []
+
+        # Fused: Director header, then the reply streams from the same completion
+        if fused and director_result is None:
+            async for kind, value in self.fused_generation_stream(user_input, persona, fluid_state, recent_memories, chat_history, summary, deadline):
+                if kind == "director":
+                    director_result = value
+                    yield {"type": "director", "director_log": director_result.model_dump()}
+                else:
+                    reply_parts.append(value)
+                    yield {"type": "token", "text": value}
+            self._count_fused(director_result is not None and bool(reply_parts))
+
+        # 2. Director Thinks (With Intimacy Check)
+        if director_result is None:
+            director_result = await self.director_analysis(user_input, persona, fluid_state, recent_memories, summary, deadline)
+            yield {"type": "director", "director_log": director_result.model_dump()}
+
+        # 3. Actor Speaks (token by token)
+        if not reply_parts:
+            async for token in self.actor_generation_stream(user_input, director_result, persona, chat_history, summary, deadline):
+                reply_parts.append(token)
+                yield {"type": "token", "text": token}
+
+        # 4. State Updates
+        new_state = await self.update_fluid_state(simulation_id, director_result, fluid_state, user_input)
+
+        yield {
+            "type": "result",
+            "reply_text": "".join(reply_parts),
+            "director_log": director_result.model_dump(),
+            "new_state": new_state
+        }
+
+    def _count_fused(self, succeeded: bool):
+        self.fused_turns += 1
+        if not succeeded:
+            self.fused_fallbacks += 1
+            print("[CORTEX] Fused output malformed, falling back to Director -> Actor")
+
+    def _blocked_result(self, block_reason: str, fluid_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Response used when the Gatekeeper refuses the message."""
+        return {
+            "reply_text": block_reason,
+            "director_log": {"internal_monologue": "Connection blocked."},
+            "new_state": fluid_state
+        }
+
 cortex_service = CortexService()
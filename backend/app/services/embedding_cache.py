@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+from backend.app.core.config import settings
+from backend.app.services.embeddings import local_embedder
+
+KEY_BYTES = 32
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache.
+
+    Keys are sha256(embedder version + text), so a new embedder version
+    never sees old vectors. Two tiers:
+    - an in-memory LRU of recently used vectors;
+    - an on-disk ring of float32 vectors in memory-mapped files that
+      survives restarts ({version}-{dim}.vectors / .keys / .cursor).
+    Disk slots are reused oldest-first once the ring is full. Each slot
+    stores its own key and reads re-check it, so a slot overwritten by
+    another process is treated as a miss rather than a wrong vector.
+    A miss only copies the vector into the mapping; dirty pages are synced
+    every EMBEDDING_CACHE_FLUSH_INTERVAL_SECONDS off the event loop, and
+    on shutdown.
+    """
+
+    def __init__(self, version: str, dim: int, directory: str, memory_entries: int, disk_capacity: int):
+        self.version = version
+        self.dim = dim
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_capacity = disk_capacity
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._disk_opened = False
+        self._vectors: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        self._cursor: Optional[np.memmap] = None
+        self._slots: Dict[bytes, int] = {}
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.version}\x00{text}".encode()).digest()
+
+    def embed_texts(self, texts: Sequence[str], embed_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Returns (len(texts), dim) float32 vectors, calling embed_fn once
+        for the distinct texts that are not cached yet.
+        """
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        missing: Dict[bytes, List[int]] = {}
+        missing_texts: List[str] = []
+
+        for i, text in enumerate(texts):
+            key = self.key(text)
+            vector = self._get(key)
+            if vector is not None:
+                out[i] = vector
+            elif key in missing:
+                missing[key].append(i)
+            else:
+                missing[key] = [i]
+                missing_texts.append(text)
+
+        if missing_texts:
+            self.misses += len(missing_texts)
+            computed = embed_fn(missing_texts)
+            for (key, positions), vector in zip(missing.items(), computed):
+                out[positions] = vector
+                self._remember(key, vector)
+            self._write_disk(list(missing.keys()), computed)
+
+        return out
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._slots),
+            "disk_capacity": self.disk_capacity if self._vectors is not None else 0,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses
+        }
+
+    async def startup(self):
+        self._flush_task = asyncio.create_task(self._flush_loop(), name="embedding-cache-flush")
+
+    async def shutdown(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        self.flush()
+
+    def flush(self):
+        if self._vectors is not None and self._dirty:
+            self._dirty = False
+            self._vectors.flush()
+            self._keys.flush()
+            self._cursor.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.EMBEDDING_CACHE_FLUSH_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                print(f"[EMBEDDING CACHE WARNING] Flush failed: {str(e)}")
+
+    def _get(self, key: bytes) -> Optional[np.ndarray]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return vector
+
+        self._open_disk()
+        slot = self._slots.get(key)
+        if slot is None:
+            return None
+        if self._keys[slot].tobytes() != key:
+            del self._slots[key]
+            return None
+
+        vector = np.array(self._vectors[slot])
+        self._remember(key, vector)
+        self.disk_hits += 1
+        return vector
+
+    def _remember(self, key: bytes, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _open_disk(self):
+        if self._disk_opened:
+            return
+        self._disk_opened = True
+        if self.disk_capacity <= 0:
+            return
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, f"{self.version}-{self.dim}")
+            self._vectors = self._open_memmap(f"{base}.vectors", np.float32, (self.disk_capacity, self.dim))
+            self._keys = self._open_memmap(f"{base}.keys", np.uint8, (self.disk_capacity, KEY_BYTES))
+            self._cursor = self._open_memmap(f"{base}.cursor", np.int64, (1,))
+        except (OSError, ValueError) as e:
+            print(f"[EMBEDDING CACHE WARNING] Disk tier disabled: {e}")
+            self._vectors = self._keys = self._cursor = None
+            return
+
+        empty = bytes(KEY_BYTES)
+        for slot in np.flatnonzero(self._keys.any(axis=1)):
+            key = self._keys[slot].tobytes()
+            if key != empty:
+                self._slots[key] = int(slot)
+
+    def _open_memmap(self, path: str, dtype, shape) -> np.memmap:
+        expected = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        mode = "r+" if os.path.exists(path) and os.path.getsize(path) == expected else "w+"
+        return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+    def _write_disk(self, keys: List[bytes], vectors: np.ndarray):
+        self._open_disk()
+        if self._vectors is None:
+            return
+
+        cursor = int(self._cursor[0])
+        for key, vector in zip(keys, vectors):
+            slot = cursor % self.disk_capacity
+            previous = self._keys[slot].tobytes()
+            self._slots.pop(previous, None)
+            # Vector first, key last: a torn write leaves a slot that never matches
+            self._keys[slot] = 0
+            self._vectors[slot] = vector
+            self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+            self._slots[key] = slot
+            cursor += 1
+        self._cursor[0] = cursor
+        self._dirty = True
+
+# Singleton instance (keyed to the active embedder version)
+embedding_cache = EmbeddingCache(
+    version=local_embedder.version,
+    dim=local_embedder.dim,
+    directory=settings.EMBEDDING_CACHE_DIR,
+    memory_entries=settings.EMBEDDING_CACHE_MEMORY_ENTRIES,
+    disk_capacity=settings.EMBEDDING_CACHE_DISK_CAPACITY
+)
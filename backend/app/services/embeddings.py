@@ -0,0 +1,132 @@
+import re
+import unicodedata
+import zlib
+from typing import List, Optional, Sequence
+import numpy as np
+
+EMBEDDING_DIM = 768
+
+def splitmix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer over a uint64 array (wrapping integer arithmetic)."""
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+class HashingEmbedder:
+    """
+    Local, network-free text embeddings.
+
+    Each text is featurized into hashed word unigrams, word bigrams and
+    character 3-5 grams (crc32 buckets, so identical across processes),
+    weighted with sublinear TF and mapped to EMBEDDING_DIM with a fixed
+    random-sign projection. Each projection entry is a splitmix64 hash of
+    (seed, row, column), so it does not depend on NumPy's random streams
+    and is the same under any NumPy version. Rows are L2-normalised, so
+    cosine similarity is a plain dot product.
+
+    Texts that share words or word fragments land close together, which
+    gives match_memories real (if shallow) semantic signal.
+    Bump `version` whenever featurization or projection changes, because
+    stored vectors are only comparable within one version.
+    """
+
+    version = "hash-ngram-signproj-v2"
+
+    WORD_RE = re.compile(r"\w+", re.UNICODE)
+    CHAR_NGRAM_SIZES = (3, 4, 5)
+    WORD_WEIGHT = 1.0
+    BIGRAM_WEIGHT = 0.7
+    CHAR_WEIGHT = 0.4
+
+    def __init__(self, dim: int = EMBEDDING_DIM, n_features: int = 2 ** 13, seed: int = 20241207):
+        self.dim = dim
+        self.n_features = n_features
+        self.seed = seed
+        self._projection: Optional[np.ndarray] = None
+
+    @property
+    def projection(self) -> np.ndarray:
+        """(n_features, dim) float32 +-1/sqrt(dim) projection, built once on first use."""
+        if self._projection is None:
+            matrix = np.empty((self.n_features, self.dim), dtype=np.float32)
+            offset = np.uint64(self.seed) * np.uint64(self.n_features * self.dim)
+            scale = np.float32(1 / np.sqrt(self.dim))
+            # 1024 rows at a time keeps the uint64 temporaries small
+            for start in range(0, self.n_features, 1024):
+                stop = min(start + 1024, self.n_features)
+                cells = np.arange(start * self.dim, stop * self.dim, dtype=np.uint64) + offset
+                signs = (splitmix64(cells) >> np.uint64(63)).astype(np.float32) * np.float32(2) - np.float32(1)
+                matrix[start:stop] = (signs * scale).reshape(stop - start, self.dim)
+            self._projection = matrix
+        return self._projection
+
+    def _features(self, text: str) -> List[tuple]:
+        """Returns (bucket, weight) pairs for one text."""
+        text = unicodedata.normalize("NFKC", text).lower()
+        words = self.WORD_RE.findall(text)
+        n_features = self.n_features
+        features = []
+
+        for word in words:
+            features.append((zlib.crc32(b"w:" + word.encode()) % n_features, self.WORD_WEIGHT))
+            padded = f"<{word}>".encode()
+            for n in self.CHAR_NGRAM_SIZES:
+                for i in range(len(padded) - n + 1):
+                    features.append((zlib.crc32(b"c:" + padded[i:i + n]) % n_features, self.CHAR_WEIGHT))
+
+        for first, second in zip(words, words[1:]):
+            features.append((zlib.crc32(f"b:{first} {second}".encode()) % n_features, self.BIGRAM_WEIGHT))
+
+        return features
+
+    def embed_texts(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embeds a batch. Returns a (len(texts), dim) float32 array; texts
+        without any word characters map to the zero vector (to_pgvector
+        gives None for it: it has no cosine distance).
+        """
+        n_texts = len(texts)
+        out = np.zeros((n_texts, self.dim), dtype=np.float32)
+        if n_texts == 0:
+            return out
+
+        rows, cols, weights = [], [], []
+        for row, text in enumerate(texts):
+            for bucket, weight in self._features(text or ""):
+                rows.append(row)
+                cols.append(bucket)
+                weights.append(weight)
+        if not rows:
+            return out
+
+        # Sum weights per (text, bucket), then sublinear TF
+        keys = np.asarray(rows, dtype=np.int64) * self.n_features + np.asarray(cols, dtype=np.int64)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        tf = np.log1p(np.bincount(inverse, weights=np.asarray(weights, dtype=np.float64))).astype(np.float32)
+        key_rows = unique_keys // self.n_features
+        key_cols = unique_keys % self.n_features
+
+        # Sparse x dense projection: gather projection rows, reduce per text
+        contributions = self.projection[key_cols] * tf[:, None]
+        row_ids, starts = np.unique(key_rows, return_index=True)
+        out[row_ids] = np.add.reduceat(contributions, starts, axis=0)
+
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+    def embed_text(self, text: str) -> np.ndarray:
+        return self.embed_texts([text])[0]
+
+def to_pgvector(vector: np.ndarray) -> Optional[str]:
+    """
+    Formats a vector as a pgvector literal ('[x1,x2,...]') for PostgREST.
+    None for the zero vector (empty text), whose cosine distance is NaN.
+    """
+    if not vector.any():
+        return None
+    return "[" + ",".join(map("{:.6g}".format, vector.tolist())) + "]"
+
+# Singleton instance
+local_embedder = HashingEmbedder()
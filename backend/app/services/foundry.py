@@ -1,17 +1,41 @@
-import json
-import re
-from typing import Dict, Any, List
+import asyncio
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Set
+from pydantic import TypeAdapter
+from backend.app.core.config import settings
+from backend.app.core.llm_json import extract_json
+from backend.app.core.taskgraph import TaskGraph
+from backend.app.services.embeddings import local_embedder
 from backend.app.services.openrouter import openrouter_service
 from backend.app.services.supabase import supabase_service
-from backend.app.models.domain import UserVibe
+from backend.app.services.memory import memory_service
+from backend.app.services.schedule import compile_weekly_schedule
+from backend.app.models.domain import GeneratedPersona, UserVibe
+
+PERSONA_ADAPTER = TypeAdapter(GeneratedPersona)
+# Prompt suffix for the one repair round after an unusable persona reply
+PERSONA_REPAIR_SUFFIX = """
+        YOUR PREVIOUS REPLY COULD NOT BE USED:
+        {previous}
+
+        Reply again with ONLY the JSON object above, every field filled in.
+        """
+
+class PersonaGenerationError(ValueError):
+    """The LLM did not produce a usable persona, even after a repair round."""
+BACKSTORY_ADAPTER = TypeAdapter(List[str])
 
 class FoundryService:
     """
     The Foundry - Generates unique personas and opening scenarios
     based on user calibration profiles.
     """
+
+    def __init__(self):
+        self._background: Set[asyncio.Task] = set()
+        self.geneses = 0
+        self.node_seconds: Dict[str, float] = {}
     
-    def generate_dynamic_persona(self, user_profile: Dict[str, Any]) -> Dict[str, Any]:
+    async def generate_dynamic_persona(self, user_profile: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generates a COMPLETELY UNIQUE persona based on the user's calibration profile.
         No hardcoded names, locations, or occupations.
@@ -60,25 +84,19 @@ class FoundryService:
         }}
         """
         
-        raw_response = openrouter_service.generate_text(system_prompt, temperature=0.95)
-        clean_json = re.sub(r"```json|```", "", raw_response).strip()
-        
-        try:
-            persona = json.loads(clean_json)
-            # Ensure required fields exist
-            persona.setdefault('name', 'Unknown')
-            persona.setdefault('appearance', 'Average appearance')
-            persona.setdefault('voice_texture', 'Normal speaking voice')
-            persona.setdefault('core_wound', 'Fear of abandonment')
-            persona.setdefault('defense_mechanism', 'Emotional distance')
-            persona.setdefault('attachment_style', 'Avoidant')
-            persona.setdefault('values_matrix', {"silence": 5, "money": 5, "loyalty": 5, "independence": 5})
-            persona.setdefault('sexual_orientation', 'Heterosexual')
-            return persona
-        except json.JSONDecodeError:
-            raise ValueError(f"Foundry generation failed: {raw_response}")
+        raw_response = await openrouter_service.agenerate_text(system_prompt, temperature=0.95)
+        persona = extract_json(raw_response, PERSONA_ADAPTER)
+        if persona is None:
+            # One repair round: the model sees its unusable reply
+            print("[FOUNDRY WARNING] Unusable persona JSON, retrying once")
+            repair_prompt = system_prompt + PERSONA_REPAIR_SUFFIX.format(previous=raw_response[:2000])
+            raw_response = await openrouter_service.agenerate_text(repair_prompt, temperature=0.4)
+            persona = extract_json(raw_response, PERSONA_ADAPTER)
+        if persona is None:
+            raise PersonaGenerationError(f"Foundry generation failed: {raw_response[:500]}")
+        return persona.model_dump()
 
-    def generate_opening_scenario(self, persona: Dict[str, Any], user_profile: Dict[str, Any]) -> str:
+    async def generate_opening_scenario(self, persona: Dict[str, Any], user_profile: Dict[str, Any]) -> str:
         """
         Generates a CINEMATIC, IMMERSIVE opening scene where the user first meets the persona.
         Uses the same 3-layer format as the chat (italics + dialogue + emojis).
@@ -156,9 +174,9 @@ class FoundryService:
         ═══════════════════════════════════════════════════════════
         """
         
-        return openrouter_service.generate_text(system_prompt, temperature=0.95)
+        return await openrouter_service.agenerate_text(system_prompt, temperature=0.95)
 
-    def generate_soul(self, user_vibe: UserVibe) -> Dict[str, Any]:
+    async def generate_soul(self, user_vibe: UserVibe) -> Dict[str, Any]:
         """
         Legacy method - now wraps generate_dynamic_persona.
         """
@@ -169,9 +187,9 @@ class FoundryService:
             "detected_archetype": user_vibe.detected_archetype,
             "match_strategy": user_vibe.match_strategy
         }
-        return self.generate_dynamic_persona(profile)
+        return await self.generate_dynamic_persona(profile)
 
-    def generate_backstory(self, persona_core: Dict[str, Any]) -> List[str]:
+    async def generate_backstory(self, persona_core: Dict[str, Any]) -> List[str]:
         """
         Generates 5 specific 'Core Memories' based on the Persona's Core Wound.
         """
@@ -198,59 +216,67 @@ class FoundryService:
         ["Memory 1...", "Memory 2...", "Memory 3...", "Memory 4...", "Memory 5..."]
         """
         
-        raw_response = openrouter_service.generate_text(system_prompt, temperature=0.8)
-        clean_json = re.sub(r"```json|```", "", raw_response).strip()
-        
-        try:
-            return json.loads(clean_json)
-        except json.JSONDecodeError:
+        raw_response = await openrouter_service.agenerate_text(system_prompt, temperature=0.8)
+        memories = extract_json(raw_response, BACKSTORY_ADAPTER)
+        if memories is None:
             return [line.strip() for line in raw_response.split('\n') if line.strip()]
+        return memories
 
-    def embed_and_store_memories(self, simulation_id: str, memories: List[str]):
+    async def embed_and_store_memories(
+        self,
+        simulation_id: str,
+        memories: List[str],
+        vectors: Optional[List[Optional[str]]] = None
+    ):
         """
-        Embeds the text memories into vectors and stores them in Supabase.
+        Embeds the text memories into vectors and stores them in Supabase
+        (one batched embedding pass, one multi-row insert). Precomputed
+        vectors (pooled personas) are stored as they are.
         """
-        client = supabase_service.get_client()
-        if not client:
-            print("Skipping memory storage: Supabase client not initialized")
-            return
-
-        for memory_text in memories:
-            vector = openrouter_service.embed_text(memory_text)
-            client.table("memories").insert({
-                "simulation_id": simulation_id,
-                "content": memory_text,
-                "memory_type": "CORE",
-                "embedding": vector
-            }).execute()
+        await memory_service.store_memories_bulk(simulation_id, memories, "CORE", vectors=vectors)
 
-    def genesis_for_simulation(
+    async def genesis_for_simulation(
         self,
         simulation_id: str,
-        user_profile: Dict[str, Any]
+        user_profile: Dict[str, Any],
+        pooled: Optional[Dict[str, Any]] = None,
+        on_stage: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> Dict[str, Any]:
         """
         Generates persona and opening scenario for an EXISTING simulation.
         This is used after calibration completes to populate the simulation
         with persona_core, fluid_states, and memories.
+        With a persona claimed from the warm pool (services/persona_pool.py)
+        only the opening scenario is generated.
+
+        Runs as a dependency graph: once the persona exists, the opening
+        scenario, the row inserts and the backstory run concurrently. This
+        returns when the scenario and the inserts are done; backstory
+        generation and embedding finish in the background. on_stage is
+        awaited with the name of each step as it completes (persona,
+        scenario, persona_core, fluid_state, backstory, memories).
         """
-        client = supabase_service.get_client()
+        client = await supabase_service.get_client()
         if not client:
             raise RuntimeError("Supabase client is not available.")
 
         # 1. Generate the unique persona
-        print(f"[GENESIS] Generating persona for simulation {simulation_id}")
-        persona = self.generate_dynamic_persona(user_profile)
-        print(f"[GENESIS] Persona generated: {persona.get('name', 'Unknown')}")
-        
+        async def persona_node() -> Dict[str, Any]:
+            if pooled:
+                print(f"[GENESIS] Using pooled persona {pooled['persona'].get('name', 'Unknown')} for simulation {simulation_id}")
+                return pooled['persona']
+            print(f"[GENESIS] Generating persona for simulation {simulation_id}")
+            persona = await self.generate_dynamic_persona(user_profile)
+            print(f"[GENESIS] Persona generated: {persona.get('name', 'Unknown')}")
+            return persona
+
         # 2. Generate the opening scenario
-        opening_scenario = self.generate_opening_scenario(persona, user_profile)
-        print(f"[GENESIS] Opening scenario generated")
-        
-        try:
-            # 3. Create Persona Core for this simulation
-            print(f"[GENESIS] Inserting persona_core for {simulation_id}")
-            persona_result = client.table("persona_core").insert({
+        async def scenario_node(persona: Dict[str, Any]) -> str:
+            return await self.generate_opening_scenario(persona, user_profile)
+
+        # 3. Create Persona Core for this simulation
+        async def persona_core_node(persona: Dict[str, Any]):
+            persona_result = await client.table("persona_core").upsert({
                 "simulation_id": simulation_id,
                 "name": persona.get("name", "Unknown"),
                 "appearance": persona.get("appearance", ""),
@@ -259,39 +285,129 @@ class FoundryService:
                 "defense_mechanism": persona.get("defense_mechanism", ""),
                 "attachment_style": persona.get("attachment_style", "Avoidant"),
                 "values_matrix": persona.get("values_matrix", {}),
-                "sexual_orientation": persona.get("sexual_orientation", "Unknown")
-            }).execute()
+                "sexual_orientation": persona.get("sexual_orientation", "Unknown"),
+                "occupation": persona.get("occupation"),
+                "hometown": persona.get("hometown"),
+                "weekly_schedule": compile_weekly_schedule(persona)
+            }, on_conflict="simulation_id").execute()
             print(f"[GENESIS] persona_core insert result: {persona_result.data}")
-            
-            # 4. Initialize Fluid State
-            print(f"[GENESIS] Inserting fluid_states for {simulation_id}")
-            fluid_result = client.table("fluid_states").insert({
+
+        # 4. Initialize Fluid State (needs nothing from the persona)
+        async def fluid_state_node():
+            fluid_result = await client.table("fluid_states").upsert({
                 "simulation_id": simulation_id,
                 "emotional_bank_account": 0,
                 "arousal_level": 0,
                 "intellectual_boredom": 0,
                 "current_craving": "Neutral"
-            }).execute()
+            }, on_conflict="simulation_id").execute()
             print(f"[GENESIS] fluid_states insert result: {fluid_result.data}")
-            
-        except Exception as e:
-            print(f"[GENESIS ERROR] Failed to insert records: {str(e)}")
-            raise RuntimeError(f"Failed to persist persona data: {str(e)}")
-        
-        # 5. Generate and embed backstory (non-critical)
+
+        # 5. Generate and embed backstory (non-critical, background)
+        async def backstory_node(persona: Dict[str, Any]) -> List[Dict[str, Any]]:
+            if pooled:
+                return pooled.get('memories') or []
+            return [{"content": content} for content in await self.generate_backstory(persona)]
+
+        async def memories_node(backstory: List[Dict[str, Any]]):
+            # Pooled vectors are reused only if the current embedder made them
+            vectors = None
+            if pooled and all(memory.get('embedding_version') == local_embedder.version for memory in backstory):
+                vectors = [memory.get('embedding') for memory in backstory]
+            await self.embed_and_store_memories(simulation_id, [memory['content'] for memory in backstory], vectors)
+
+        graph = TaskGraph(f"genesis:{simulation_id}", on_done=on_stage)
+        graph.add("persona", persona_node)
+        graph.add("scenario", scenario_node, "persona")
+        graph.add("persona_core", persona_core_node, "persona")
+        graph.add("fluid_state", fluid_state_node)
+        graph.add("backstory", backstory_node, "persona")
+        graph.add("memories", memories_node, "backstory")
+        graph.start()
+
         try:
-            memories = self.generate_backstory(persona)
-            self.embed_and_store_memories(simulation_id, memories)
-        except Exception as e:
-            print(f"[GENESIS WARNING] Backstory failed: {str(e)}")
-        
+            results = await graph.wait("persona", "scenario")
+            try:
+                await graph.wait("persona_core", "fluid_state")
+            except Exception as e:
+                print(f"[GENESIS ERROR] Failed to insert records: {str(e)}")
+                raise RuntimeError(f"Failed to persist persona data: {str(e)}")
+        except BaseException:
+            graph.cancel()
+            await graph.finished()
+            raise
+
+        print(f"[GENESIS] Opening scenario ready for {simulation_id}")
+        task = asyncio.create_task(self._finish_genesis(graph, simulation_id))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
         return {
             "simulation_id": simulation_id,
-            "persona": persona,
-            "opening_scenario": opening_scenario
+            "persona": results['persona'],
+            "opening_scenario": results['scenario']
+        }
+
+    async def complete_memories(self, simulation_id: str):
+        """
+        Regenerates the CORE memories of a simulation whose genesis finished
+        without them (background task cut off by a shutdown).
+        """
+        client = await supabase_service.get_client()
+        response = await client.table("persona_core")\
+            .select("*")\
+            .eq("simulation_id", simulation_id)\
+            .limit(1)\
+            .execute()
+        if not response.data:
+            raise RuntimeError(f"No persona_core for simulation {simulation_id}")
+
+        await client.table("memories").delete()\
+            .eq("simulation_id", simulation_id)\
+            .eq("memory_type", "CORE")\
+            .execute()
+        backstory = await self.generate_backstory(response.data[0])
+        await self.embed_and_store_memories(simulation_id, backstory)
+
+    async def shutdown(self):
+        """
+        Gives in-flight backstory/memory tasks GENESIS_SHUTDOWN_TIMEOUT_SECONDS,
+        then cancels them; the genesis queue completes those on next startup.
+        """
+        if not self._background:
+            return
+        _, pending = await asyncio.wait(set(self._background), timeout=settings.GENESIS_SHUTDOWN_TIMEOUT_SECONDS)
+        if pending:
+            print(f"[GENESIS WARNING] Cancelling {len(pending)} unfinished backstory tasks at shutdown")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _finish_genesis(self, graph: TaskGraph, simulation_id: str):
+        """Waits for the background nodes, then records per-node timings."""
+        failed = await graph.finished()
+        for name, error in failed.items():
+            if not isinstance(error, asyncio.CancelledError):
+                print(f"[GENESIS WARNING] {name} failed for {simulation_id}: {str(error)}")
+
+        self.geneses += 1
+        for name, seconds in graph.timings.items():
+            self.node_seconds[name] = self.node_seconds.get(name, 0.0) + seconds
+        print("[GENESIS] Node timings for " + simulation_id + ": " + ", ".join(
+            f"{name}={seconds:.2f}s" for name, seconds in graph.timings.items()
+        ))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "geneses": self.geneses,
+            "background": len(self._background),
+            "avg_node_seconds": {
+                name: round(total / self.geneses, 3)
+                for name, total in self.node_seconds.items()
+            } if self.geneses else {}
         }
 
-    def create_simulation_from_calibration(
+    async def create_simulation_from_calibration(
         self, 
         user_profile: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -299,18 +415,18 @@ class FoundryService:
         Creates a complete simulation from a calibrated user profile.
         Returns simulation_id, persona, and opening scenario.
         """
-        client = supabase_service.get_client()
+        client = await supabase_service.get_client()
         if not client:
             raise RuntimeError("Supabase client is not available.")
 
         # 1. Generate the unique persona
-        persona = self.generate_dynamic_persona(user_profile)
+        persona = await self.generate_dynamic_persona(user_profile)
         
         # 2. Generate the opening scenario
-        opening_scenario = self.generate_opening_scenario(persona, user_profile)
+        opening_scenario = await self.generate_opening_scenario(persona, user_profile)
         
         # 3. Create simulation with is_calibrated = True
-        sim_response = client.table("simulations").insert({
+        sim_response = await client.table("simulations").insert({
             "user_vibe": user_profile,
             "user_profile": user_profile,
             "status": "ACTIVE",
@@ -325,7 +441,7 @@ class FoundryService:
         simulation_id = sim_response.data[0]["id"]
         
         # 4. Create Persona Core
-        client.table("persona_core").insert({
+        await client.table("persona_core").insert({
             "simulation_id": simulation_id,
             "name": persona.get("name", "Unknown"),
             "appearance": persona.get("appearance", ""),
@@ -334,11 +450,14 @@ class FoundryService:
             "defense_mechanism": persona.get("defense_mechanism", ""),
             "attachment_style": persona.get("attachment_style", "Avoidant"),
             "values_matrix": persona.get("values_matrix", {}),
-            "sexual_orientation": persona.get("sexual_orientation", "Unknown")
+            "sexual_orientation": persona.get("sexual_orientation", "Unknown"),
+            "occupation": persona.get("occupation"),
+            "hometown": persona.get("hometown"),
+            "weekly_schedule": compile_weekly_schedule(persona)
         }).execute()
         
         # 5. Initialize Fluid State
-        client.table("fluid_states").insert({
+        await client.table("fluid_states").insert({
             "simulation_id": simulation_id,
             "emotional_bank_account": 0,
             "arousal_level": 0,
@@ -347,8 +466,8 @@ class FoundryService:
         }).execute()
         
         # 6. Generate and embed backstory
-        memories = self.generate_backstory(persona)
-        self.embed_and_store_memories(simulation_id, memories)
+        memories = await self.generate_backstory(persona)
+        await self.embed_and_store_memories(simulation_id, memories)
         
         return {
             "simulation_id": simulation_id,
@@ -356,15 +475,15 @@ class FoundryService:
             "opening_scenario": opening_scenario
         }
 
-    def create_simulation(self, user_vibe: UserVibe, persona_data: Dict[str, Any]) -> str:
+    async def create_simulation(self, user_vibe: UserVibe, persona_data: Dict[str, Any]) -> str:
         """
         Legacy method for backwards compatibility.
         """
-        client = supabase_service.get_client()
+        client = await supabase_service.get_client()
         if not client:
             raise RuntimeError("Supabase client is not available.")
 
-        sim_response = client.table("simulations").insert({
+        sim_response = await client.table("simulations").insert({
             "user_vibe": user_vibe.model_dump(),
             "status": "ACTIVE",
             "is_calibrated": True
@@ -375,7 +494,7 @@ class FoundryService:
             
         simulation_id = sim_response.data[0]["id"]
         
-        client.table("persona_core").insert({
+        await client.table("persona_core").insert({
             "simulation_id": simulation_id,
             "name": persona_data["name"],
             "appearance": persona_data["appearance"],
@@ -384,10 +503,13 @@ class FoundryService:
             "defense_mechanism": persona_data["defense_mechanism"],
             "attachment_style": persona_data["attachment_style"],
             "values_matrix": persona_data["values_matrix"],
-            "sexual_orientation": persona_data["sexual_orientation"]
+            "sexual_orientation": persona_data["sexual_orientation"],
+            "occupation": persona_data.get("occupation"),
+            "hometown": persona_data.get("hometown"),
+            "weekly_schedule": compile_weekly_schedule(persona_data)
         }).execute()
         
-        client.table("fluid_states").insert({
+        await client.table("fluid_states").insert({
             "simulation_id": simulation_id,
             "emotional_bank_account": 0,
             "arousal_level": 0,
@@ -395,8 +517,8 @@ class FoundryService:
             "current_craving": "Neutral"
         }).execute()
         
-        memories = self.generate_backstory(persona_data)
-        self.embed_and_store_memories(simulation_id, memories)
+        memories = await self.generate_backstory(persona_data)
+        await self.embed_and_store_memories(simulation_id, memories)
         
         return simulation_id
 
@@ -0,0 +1,250 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+from backend.app.core.config import settings
+from backend.app.services.cache import invalidate_simulation
+from backend.app.services.foundry import PersonaGenerationError, foundry_service
+from backend.app.services.oracle import oracle_service
+from backend.app.services.persona_pool import persona_pool
+from backend.app.services.supabase import supabase_service
+
+class GenesisQueue:
+    """
+    In-process job queue for genesis (persona + opening scenario + backstory).
+
+    The calibration turn submits a job and returns at once; up to
+    GENESIS_MAX_CONCURRENCY workers run FoundryService.genesis_for_simulation.
+    Job state lives in genesis_jobs (one row per simulation), so clients
+    can poll /simulations/{id}/genesis-status from any worker, and a retry
+    or a second submit returns the existing job instead of starting a
+    duplicate genesis. A job whose worker died is requeued once it has not
+    been updated for GENESIS_JOB_STALE_SECONDS; every run first clears what
+    an earlier attempt wrote (reset_genesis RPC). A job is DONE once the
+    simulation is playable; its CORE memories land afterwards (the
+    "memories" stage), and startup completes any DONE job left without them.
+    """
+
+    def __init__(self):
+        # Created here so submit() before startup() queues instead of failing
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._repairs: Set[asyncio.Task] = set()
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._waiters: Dict[str, int] = {}
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    async def startup(self):
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"genesis-worker-{i}")
+            for i in range(max(1, settings.GENESIS_MAX_CONCURRENCY))
+        ]
+        try:
+            await self.recover()
+        except Exception as e:
+            print(f"[GENESIS QUEUE WARNING] Recovery failed: {str(e)}")
+
+    async def shutdown(self):
+        """Stops the workers; interrupted jobs are requeued once they go stale."""
+        for task in self._workers + list(self._repairs):
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._repairs, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize(),
+            "memory_repairs": len(self._repairs),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+    async def submit(self, simulation_id: str) -> Dict[str, Any]:
+        """
+        Returns the simulation's genesis job, queueing it if it is new,
+        failed or stale (enqueue_genesis RPC).
+        """
+        client = await supabase_service.get_client()
+        response = await client.rpc("enqueue_genesis", {
+            "p_simulation_id": simulation_id,
+            "p_stale_seconds": settings.GENESIS_JOB_STALE_SECONDS
+        }).execute()
+        job = response.data
+
+        if job.pop('queued', False):
+            self.submitted += 1
+            self._queue.put_nowait(job)
+            print(f"[GENESIS QUEUE] Queued genesis {job['id']} for simulation {simulation_id}")
+        return job
+
+    async def get_job(self, simulation_id: str) -> Optional[Dict[str, Any]]:
+        client = await supabase_service.get_client()
+        response = await client.table("genesis_jobs")\
+            .select("*")\
+            .eq("simulation_id", simulation_id)\
+            .limit(1)\
+            .execute()
+        return response.data[0] if response.data else None
+
+    async def wait_for_change(self, simulation_id: str, job: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        Long-poll helper: returns the job as soon as its status or stages
+        differ from `job`, or as it is after `timeout` seconds. Wakes at
+        once when this worker updates it, and re-reads it every
+        GENESIS_STATUS_POLL_SECONDS in case it runs on another worker.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        self._waiters[simulation_id] = self._waiters.get(simulation_id, 0) + 1
+        latest = job
+        try:
+            while latest.get('status') in ('PENDING', 'RUNNING'):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                # _notify pops the event it sets, so take the current one each round
+                event = self._changed.setdefault(simulation_id, asyncio.Event())
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=min(remaining, settings.GENESIS_STATUS_POLL_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+                latest = await self.get_job(simulation_id) or latest
+                if (latest.get('status'), latest.get('stages')) != (job.get('status'), job.get('stages')):
+                    break
+            return latest
+        finally:
+            waiting = self._waiters.pop(simulation_id) - 1
+            if waiting:
+                self._waiters[simulation_id] = waiting
+            else:
+                self._changed.pop(simulation_id, None)
+
+    def is_stale(self, job: Dict[str, Any]) -> bool:
+        if job.get('status') not in ('PENDING', 'RUNNING'):
+            return False
+        updated_at = datetime.fromisoformat(job['updated_at'].replace('Z', '+00:00'))
+        return datetime.now(timezone.utc) - updated_at > timedelta(seconds=settings.GENESIS_JOB_STALE_SECONDS)
+
+    async def recover(self):
+        """
+        Requeues open jobs left stale by a stopped worker, and regenerates
+        the CORE memories of DONE jobs whose background step was cut off.
+        """
+        client = await supabase_service.get_client()
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.GENESIS_JOB_STALE_SECONDS)
+        response = await client.table("genesis_jobs")\
+            .select("simulation_id")\
+            .in_("status", ["PENDING", "RUNNING"])\
+            .lt("updated_at", cutoff.isoformat())\
+            .execute()
+        for row in response.data or []:
+            await self.submit(row['simulation_id'])
+
+        # stages is jsonb, so the filter value is a JSON literal, not a Python list
+        response = await client.table("genesis_jobs")\
+            .select("id, simulation_id")\
+            .eq("status", "DONE")\
+            .not_.contains("stages", '["memories"]')\
+            .lt("updated_at", cutoff.isoformat())\
+            .execute()
+        for row in response.data or []:
+            task = asyncio.create_task(self._repair_memories(client, row))
+            self._repairs.add(task)
+            task.add_done_callback(self._repairs.discard)
+
+    async def _repair_memories(self, client, job: Dict[str, Any]):
+        try:
+            await foundry_service.complete_memories(job['simulation_id'])
+            await client.rpc("genesis_job_stage", {"p_job_id": job['id'], "p_stage": "memories"}).execute()
+            print(f"[GENESIS QUEUE] Restored CORE memories for {job['simulation_id']}")
+        except Exception as e:
+            print(f"[GENESIS QUEUE WARNING] Memory repair failed for {job['simulation_id']}: {str(e)}")
+
+    def _notify(self, simulation_id: str):
+        event = self._changed.pop(simulation_id, None)
+        if event is not None:
+            event.set()
+
+    async def _update(self, client, job: Dict[str, Any], values: Dict[str, Any]):
+        values["updated_at"] = datetime.now(timezone.utc).isoformat()
+        await client.table("genesis_jobs").update(values).eq("id", job['id']).execute()
+        self._notify(job['simulation_id'])
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception as e:
+                print(f"[GENESIS QUEUE ERROR] Job {job.get('id')} crashed: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Dict[str, Any]):
+        client = await supabase_service.get_client()
+        sim_id = job['simulation_id']
+        await self._update(client, job, {"status": "RUNNING", "attempts": job.get('attempts', 0) + 1})
+
+        async def on_stage(stage: str):
+            await client.rpc("genesis_job_stage", {"p_job_id": job['id'], "p_stage": stage}).execute()
+            self._notify(sim_id)
+
+        try:
+            # A retried job starts from scratch: drop rows a failed or
+            # interrupted attempt already wrote (persona, fluid state, CORE memories)
+            await client.rpc("reset_genesis", {"p_simulation_id": sim_id}).execute()
+            invalidate_simulation(sim_id)
+
+            # Scenario answers are analyzed in the background during calibration
+            user_profile = await oracle_service.finalize_profile(sim_id)
+            await on_stage("profile")
+
+            # A ready persona from the warm pool when one is available
+            pooled = await persona_pool.claim(user_profile)
+            try:
+                genesis_result = await foundry_service.genesis_for_simulation(
+                    simulation_id=sim_id,
+                    user_profile=user_profile,
+                    pooled=pooled,
+                    on_stage=on_stage
+                )
+            except PersonaGenerationError:
+                # The LLM would not produce a persona: use the closest pooled one
+                pooled = None if pooled else await persona_pool.claim_fallback(user_profile)
+                if pooled is None:
+                    raise
+                print(f"[GENESIS QUEUE] Persona generation failed for {sim_id}, using a pooled persona")
+                genesis_result = await foundry_service.genesis_for_simulation(
+                    simulation_id=sim_id,
+                    user_profile=user_profile,
+                    pooled=pooled,
+                    on_stage=on_stage
+                )
+
+            print(f"[GENESIS QUEUE] Activating simulation {sim_id}")
+            await client.table("simulations").update({
+                "is_calibrated": True,
+                "status": "ACTIVE",
+                "opening_scenario": genesis_result['opening_scenario']
+            }).eq("id", sim_id).execute()
+            invalidate_simulation(sim_id)
+        except Exception as e:
+            self.failed += 1
+            print(f"[GENESIS QUEUE ERROR] Genesis failed for {sim_id}: {str(e)}")
+            await self._update(client, job, {"status": "FAILED", "error": str(e)})
+            return
+
+        self.completed += 1
+        await self._update(client, job, {
+            "status": "DONE",
+            "result": {
+                "persona_name": genesis_result['persona'].get('name'),
+                "opening_scenario": genesis_result['opening_scenario']
+            }
+        })
+
+# Singleton instance
+genesis_queue = GenesisQueue()
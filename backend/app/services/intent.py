@@ -0,0 +1,290 @@
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from backend.app.core.config import settings
+from backend.app.models.domain import DirectorOutput
+
+INTENTS = ("small_talk", "chat", "conflict", "romantic")
+
+# Linear lexicon model: token/phrase -> (intent, weight). Hand-tuned so a
+# message made only of throwaway tokens scores ~0.95 small_talk while any
+# unknown word, question or loaded term pulls the mass elsewhere. Only
+# messages made entirely of small-talk tokens can take the fast path.
+LEXICON: Dict[str, tuple] = {
+    **{w: ("small_talk", 2.5) for w in (
+        "lol", "lmao", "haha", "ok", "okay", "k", "kk", "sure", "yeah", "yea", "yep", "yup",
+        "ya", "cool", "nice", "hmm", "hm", "oh", "ah", "wow", "hi", "hey", "hello", "yo",
+        "sup", "gm", "gn", "thanks", "thx", "ty", "np", "same", "true", "fr", "bet", "mhm",
+        "lmk", "idk", "meh", "ugh", "whatever", "alright", "fine", "yes",
+        "rofl", "omg", "bruh", "damn", "morning", "night", "good", "great", "😂", "🤣",
+        "😅", "🙂", "😊", "👍", "🙄", "😐", "😴", "👀", "💀"
+    )},
+    **{w: ("conflict", 3.0) for w in (
+        "hate", "stupid", "idiot", "dumb", "annoying", "liar", "shut", "fuck", "screw",
+        "pathetic", "ugly", "boring", "worst", "disgusting", "loser", "bitch", "leave", "suck", "sucks"
+    )},
+    **{w: ("romantic", 3.0) for w in (
+        "love", "kiss", "cute", "sexy", "hot", "beautiful", "gorgeous", "date", "miss",
+        "babe", "baby", "darling", "cuddle", "marry", "crush", "❤️", "❤", "😘", "😍", "🥰", "💕"
+    )},
+}
+
+# Safety, farewell and negation terms: a message containing any of them
+# always goes to the LLM Director, however short or casual it looks
+DEFER_TERMS = frozenset((
+    "stop", "kill", "killing", "quit", "quitting", "die", "dying", "dead", "death", "suicide", "suicidal",
+    "hurt", "hurting", "pain", "bleeding", "hospital", "sick", "cancer", "pregnant", "abortion", "depressed",
+    "crying", "cry", "scared", "afraid", "help", "emergency", "abuse", "abused", "hit", "attack", "police",
+    "bye", "goodbye", "cya", "leaving", "done", "over", "forever", "never", "hate", "sorry", "alone",
+    "no", "nah", "nope", "not", "don't", "dont", "can't", "cant", "won't", "wont", "didn't", "didnt",
+    "isn't", "isnt", "wasn't", "wasnt", "shouldn't", "couldn't", "wouldn't", "😭", "😢", "💔"
+))
+
+# Function words: neither evidence for an intent nor an unknown word, so
+# "kiss me" is scored on "kiss" alone
+FUNCTION_WORDS = frozenset((
+    "i", "me", "my", "mine", "myself", "you", "your", "yours", "u", "ur", "we", "us", "our", "it", "its", "it's",
+    "he", "him", "his", "she", "her", "they", "them", "their", "this", "that", "these", "those", "a", "an",
+    "the", "is", "am", "are", "was", "were", "be", "been", "so", "and", "but", "or", "to", "of", "in", "on",
+    "at", "for", "with", "just", "really", "too", "very", "i'm", "im", "you're", "youre"
+))
+
+PHRASES: Dict[str, tuple] = {
+    "what's up": ("small_talk", 2.5),
+    "whats up": ("small_talk", 2.5),
+    "good morning": ("small_talk", 2.5),
+    "good night": ("small_talk", 2.5),
+    "how are you": ("chat", 1.5),
+    "shut up": ("conflict", 4.0),
+    "leave me alone": ("conflict", 4.0),
+    "love you": ("romantic", 4.0),
+    "go out": ("romantic", 3.0),
+    "miss you": ("romantic", 3.5),
+}
+
+POSITIVE = {"lol", "lmao", "haha", "rofl", "nice", "cool", "great", "good", "thanks", "thx", "ty", "wow", "yay",
+            "😂", "🤣", "😊", "🙂", "👍", "😅", "💀"}
+NEGATIVE = {"ugh", "meh", "whatever", "boring", "bruh", "🙄", "😐", "😴", "fine", "😭", "😢", "💔"}
+
+TOKEN_RE = re.compile(r"[\w']+|[^\w\s]", re.UNICODE)
+REPEATS_RE = re.compile(r"(.)\1{2,}")
+LAUGH_RE = re.compile(r"^(?:(?:ha|he|ah)+h?|l+o+l+|lmf?a+o+|rofl+)$")
+
+@dataclass
+class IntentResult:
+    intent: str
+    confidence: float
+    sentiment: str  # positive | neutral | negative
+    words: int
+    unknown: int  # words outside the lexicon and FUNCTION_WORDS
+    deferred_terms: int  # DEFER_TERMS hits
+    hits: Dict[str, float]  # lexicon + phrase weight per intent
+
+    @property
+    def pure_small_talk(self) -> bool:
+        """Small talk made only of lexicon tokens, with nothing loaded or sensitive in it."""
+        return (
+            self.intent == "small_talk"
+            and self.unknown == 0
+            and self.deferred_terms == 0
+            and not self.hits["conflict"]
+            and not self.hits["romantic"]
+        )
+
+class IntentClassifier:
+    """
+    Local, CPU-only intent + sentiment classifier (no network).
+
+    Scores each intent with a linear lexicon model (token and phrase weights,
+    a length prior, and evidence for "chat" from unknown words and questions)
+    and takes a softmax for the confidence. When a short message is made
+    only of small-talk tokens and scores high confidence, fast_director_output()
+    builds the DirectorOutput directly and the Director LLM call is skipped;
+    everything else, including any DEFER_TERMS hit, defers to the LLM.
+    """
+
+    # An unknown word must outweigh the short-message length prior
+    UNKNOWN_WORD_WEIGHT = 2.5
+    DEFER_TERM_WEIGHT = 3.0
+    QUESTION_WEIGHT = 1.5
+    CHAT_BIAS = 0.5
+
+    def __init__(self):
+        self.classified = 0
+        self.fast_path = 0
+        self.deferred = 0
+        self.heuristic_fallbacks = 0
+        self.by_intent: Dict[str, int] = {intent: 0 for intent in INTENTS}
+        self.total_seconds = 0.0
+
+    def tokenize(self, text: str) -> List[str]:
+        tokens = []
+        for token in TOKEN_RE.findall(text.lower()):
+            token = REPEATS_RE.sub(r"\1", token)  # "heyyy" -> "hey", "okkk" -> "ok"
+            if LAUGH_RE.match(token):
+                token = "lol" if token.startswith("l") else "haha"
+            tokens.append(token)
+        return tokens
+
+    def classify(self, text: str) -> IntentResult:
+        started = time.perf_counter()
+        tokens = self.tokenize(text)
+        words = sum(1 for token in tokens if token[0].isalnum())
+        scores = {intent: 0.0 for intent in INTENTS}
+        scores["chat"] = self.CHAT_BIAS
+        hits = {intent: 0.0 for intent in INTENTS}
+
+        # Phrases first; their tokens are consumed so they are not scored twice
+        joined = " " + " ".join(tokens) + " "
+        for phrase, (intent, weight) in PHRASES.items():
+            if f" {phrase} " in joined:
+                scores[intent] += weight
+                hits[intent] += weight
+                joined = joined.replace(f" {phrase} ", " ")
+        tokens = joined.split()
+
+        sentiment_score = 0
+        unknown = 0
+        deferred_terms = 0
+        for token in tokens:
+            entry = LEXICON.get(token)
+            if token in DEFER_TERMS:
+                deferred_terms += 1
+                if entry is None:
+                    scores["chat"] += self.DEFER_TERM_WEIGHT
+            if entry is not None:
+                scores[entry[0]] += entry[1]
+                hits[entry[0]] += entry[1]
+            elif token == "?":
+                scores["chat"] += self.QUESTION_WEIGHT
+            elif token[0].isalnum() and token not in DEFER_TERMS and token not in FUNCTION_WORDS:
+                unknown += 1
+                scores["chat"] += self.UNKNOWN_WORD_WEIGHT
+            sentiment_score += (token in POSITIVE) - (token in NEGATIVE)
+
+        # Length prior: the shorter the message, the likelier it is throwaway
+        scores["small_talk"] += 2.0 if words <= 3 else 1.0 if words <= 6 else -1.0
+
+        peak = max(scores.values())
+        exps = {intent: math.exp(score - peak) for intent, score in scores.items()}
+        total = sum(exps.values())
+        intent = max(exps, key=exps.get)
+        sentiment = "positive" if sentiment_score > 0 else "negative" if sentiment_score < 0 else "neutral"
+
+        self.classified += 1
+        self.by_intent[intent] += 1
+        self.total_seconds += time.perf_counter() - started
+        return IntentResult(
+            intent=intent,
+            confidence=exps[intent] / total,
+            sentiment=sentiment,
+            words=words,
+            unknown=unknown,
+            deferred_terms=deferred_terms,
+            hits=hits
+        )
+
+    def fast_director_output(self, user_input: str, persona: Dict[str, Any]) -> Optional[DirectorOutput]:
+        """
+        DirectorOutput for high-confidence small talk, or None to defer to the LLM.
+        """
+        if not settings.INTENT_FAST_PATH:
+            return None
+
+        result = self.classify(user_input)
+        if (
+            not result.pure_small_talk
+            or result.confidence < settings.INTENT_FAST_PATH_THRESHOLD
+            or result.words > settings.INTENT_FAST_PATH_MAX_WORDS
+        ):
+            self.deferred += 1
+            return None
+
+        self.fast_path += 1
+        return self._small_talk_output(result, persona.get('name', 'Character'))
+
+    def heuristic_director_output(self, user_input: str, persona: Dict[str, Any], trust: int) -> DirectorOutput:
+        """
+        Best-effort DirectorOutput for any input (used when the Director LLM
+        runs out of time budget). Follows the same Intimacy Gating rules:
+        any romantic or conflict term takes its branch whatever the argmax
+        says, so an advance is never answered with a neutral plan.
+        """
+        self.heuristic_fallbacks += 1
+        result = self.classify(user_input)
+        persona_name = persona.get('name', 'Character')
+        defense = persona.get('defense_mechanism', 'emotional avoidance')
+
+        intent = result.intent
+        if result.hits["romantic"] or result.hits["conflict"]:
+            intent = "romantic" if result.hits["romantic"] > result.hits["conflict"] else "conflict"
+        elif result.pure_small_talk:
+            return self._small_talk_output(result, persona_name)
+
+        if intent == "conflict":
+            return DirectorOutput(
+                internal_monologue="Seriously? Where is this coming from?",
+                emotional_reaction="Annoyed",
+                strategy="Push back",
+                actor_instruction=f"{persona_name} is stung and pushes back, leaning on their defense mechanism ({defense}). Don't grovel."
+            )
+        if intent == "romantic":
+            if trust < 50:
+                return DirectorOutput(
+                    internal_monologue="Too fast. I barely know them.",
+                    emotional_reaction="Uncomfortable",
+                    strategy="Hard Reject",
+                    actor_instruction=f"{persona_name} shuts the advance down firmly and coolly, using their defense mechanism ({defense})."
+                )
+            return DirectorOutput(
+                internal_monologue="Okay... I kind of like this.",
+                emotional_reaction="Warm",
+                strategy="Flirt back",
+                actor_instruction=f"{persona_name} leans into it authentically, a little flustered but clearly interested."
+            )
+        return DirectorOutput(
+            internal_monologue="Let me actually think about what they said.",
+            emotional_reaction="Neutral",
+            strategy="Engage",
+            actor_instruction=f"{persona_name} responds genuinely to what was said, with their usual personality, and asks something back."
+        )
+
+    def _small_talk_output(self, result: IntentResult, persona_name: str) -> DirectorOutput:
+        if result.sentiment == "positive":
+            return DirectorOutput(
+                internal_monologue="Ha. At least they're having fun.",
+                emotional_reaction="Amused",
+                strategy="Banter",
+                actor_instruction=f"Keep it light and short. {persona_name} plays along, teases a little, and nudges the conversation somewhere more interesting."
+            )
+        if result.sentiment == "negative":
+            return DirectorOutput(
+                internal_monologue="That's it? Not exactly giving me much.",
+                emotional_reaction="Bored",
+                strategy="Call it out",
+                actor_instruction=f"Short reply. {persona_name} notices the low effort and calls it out with some sass, then asks something that demands a real answer."
+            )
+        return DirectorOutput(
+            internal_monologue="Okay... small talk. Let's see where this goes.",
+            emotional_reaction="Neutral",
+            strategy="Keep it casual",
+            actor_instruction=f"Brief, casual reply in {persona_name}'s voice. Acknowledge it and toss the ball back with a question or a small observation."
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        decisions = self.fast_path + self.deferred
+        return {
+            "classified": self.classified,
+            "fast_path": self.fast_path,
+            "deferred": self.deferred,
+            "heuristic_fallbacks": self.heuristic_fallbacks,
+            # Share of fast-path decisions (heuristic fallbacks are not decisions)
+            "fast_path_rate": round(self.fast_path / decisions, 4) if decisions else 0.0,
+            "by_intent": dict(self.by_intent),
+            "avg_microseconds": round(self.total_seconds / self.classified * 1e6, 1) if self.classified else 0.0
+        }
+
+# Singleton instance
+intent_classifier = IntentClassifier()
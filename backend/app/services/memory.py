@@ -1,61 +1,177 @@
-
-from typing import List, Dict, Any
-from backend.app.services.openrouter import openrouter_service
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Sequence, Union
+import numpy as np
+from backend.app.services.embeddings import local_embedder, to_pgvector
+from backend.app.services.embedding_cache import embedding_cache
 from backend.app.services.supabase import supabase_service
+from backend.app.services.vector_index import parse_pgvector, vector_index_registry
+from backend.app.core.config import settings
 
 class MemoryService:
     def __init__(self):
-        pass  # No initialization needed, using openrouter_service singleton
+        pass  # No initialization needed, using the local_embedder/embedding_cache singletons
 
-    def get_embedding(self, text: str) -> List[float]:
+    def get_embedding(self, text: str) -> Optional[np.ndarray]:
         """
-        Generates a 768-dimensional vector for the given text.
+        Generates a 768-dimensional float32 vector for the given text
+        (None for text without words, which has no usable direction).
         """
         try:
-            return openrouter_service.embed_text(text)
+            vector = embedding_cache.embed_texts([text], local_embedder.embed_texts)[0]
+            return vector if vector.any() else None
         except Exception as e:
             print(f"Embedding Error: {e}")
-            return []
+            return None
 
-    def store_memory(self, simulation_id: str, content: str, memory_type: str = "EPISODIC"):
+    def get_embeddings(self, texts: List[str]) -> Optional[np.ndarray]:
         """
-        Embeds and saves a new memory.
+        Embeds a whole list in one vectorized pass: (len(texts), 768) float32.
+        Cached texts are served from the embedding cache; only misses are embedded.
+        Returns None if embedding failed.
+        """
+        try:
+            return embedding_cache.embed_texts(texts, local_embedder.embed_texts)
+        except Exception as e:
+            print(f"Embedding Error: {e}")
+            return None
+
+    def build_memory_rows(
+        self,
+        simulation_id: str,
+        contents: Sequence[str],
+        memory_types: Union[str, Sequence[str]] = "EPISODIC",
+        embed: bool = True,
+        vectors: Optional[Sequence[Optional[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Builds `memories` rows for a multi-row insert.
+        memory_types is either one type for every row or one type per row.
+        vectors are precomputed pgvector literals (e.g. from the persona
+        pool, made by the current embedder); when given, nothing is embedded.
+        created_at is set explicitly (1 microsecond apart) so rows written in
+        one statement keep their order instead of sharing now().
+        """
+        contents = list(contents)
+        if isinstance(memory_types, str):
+            memory_types = [memory_types] * len(contents)
+
+        if vectors is not None:
+            vectors = list(vectors)
+        else:
+            vectors = [None] * len(contents)
+            matrix = self.get_embeddings(contents) if embed else None
+            if matrix is not None:
+                vectors = [to_pgvector(vector) for vector in matrix]
+
+        base_time = datetime.now(timezone.utc)
+        rows = [
+            {
+                "simulation_id": simulation_id,
+                "content": content,
+                "memory_type": memory_type,
+                "embedding": vector,
+                "embedding_version": local_embedder.version if vector is not None else None,
+                "created_at": (base_time + timedelta(microseconds=i)).isoformat()
+            }
+            for i, (content, memory_type, vector) in enumerate(zip(contents, memory_types, vectors))
+        ]
+        return rows
+
+    async def insert_memory_rows(self, rows: List[Dict[str, Any]]):
+        """
+        Writes prepared rows with a single multi-row insert (record_memories RPC),
+        which also bumps simulations.last_interaction_at / message_count in the
+        same transaction.
+        """
+        if not rows:
+            return
+
+        client = await supabase_service.get_client()
+        await client.rpc("record_memories", {"p_rows": rows}).execute()
+        self.index_rows(rows)
+
+    def index_rows(self, rows: List[Dict[str, Any]]):
+        """
+        Adds stored rows to the simulations' resident vector indexes. Called
+        only once the insert succeeded, so rows that never reach the
+        database (e.g. dead-lettered writes) are never retrievable.
+        """
+        by_simulation: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            if row.get("embedding") is not None and row.get("embedding_version") == local_embedder.version:
+                by_simulation.setdefault(row["simulation_id"], []).append(row)
+
+        for simulation_id, simulation_rows in by_simulation.items():
+            vector_index_registry.add(
+                simulation_id,
+                [row["content"] for row in simulation_rows],
+                np.stack([parse_pgvector(row["embedding"]) for row in simulation_rows]),
+                [row["created_at"] for row in simulation_rows]
+            )
+
+    async def store_memories_bulk(
+        self,
+        simulation_id: str,
+        contents: Sequence[str],
+        memory_types: Union[str, Sequence[str]] = "EPISODIC",
+        embed: bool = True,
+        vectors: Optional[Sequence[Optional[str]]] = None
+    ) -> List[Dict[str, Any]]:
         """
-        vector = self.get_embedding(content)
-        if not vector:
-            return # Skip if embedding failed
+        Embeds a list of memories in one vectorized pass and saves them in one insert.
+        Returns the rows that were written.
+        """
+        rows = self.build_memory_rows(simulation_id, contents, memory_types, embed, vectors)
+        await self.insert_memory_rows(rows)
+        return rows
 
-        client = supabase_service.get_client()
-        client.table("memories").insert({
-            "simulation_id": simulation_id,
-            "content": content,
-            "memory_type": memory_type,
-            "embedding": vector
-        }).execute()
+    async def store_memory(self, simulation_id: str, content: str, memory_type: str = "EPISODIC"):
+        """
+        Embeds and saves a new memory.
+        """
+        await self.store_memories_bulk(simulation_id, [content], memory_type)
 
-    def retrieve_relevant_memories(self, simulation_id: str, query: str, limit: int = 5) -> List[str]:
+    async def retrieve_relevant_memories(
+        self,
+        simulation_id: str,
+        query: str,
+        limit: int = 5,
+        exclude: Sequence[str] = ()
+    ) -> List[str]:
         """
         Semantic Search: Finds memories conceptually related to the query.
-        Uses the 'match_memories' RPC function in Supabase.
+        Served from the simulation's in-process vector index when it is resident;
+        on a miss the index is loaded in the background and this call uses the
+        'match_memories' RPC function in Supabase.
+        Memories listed in `exclude` (e.g. lines already in the prompt) are skipped.
         """
         vector = self.get_embedding(query)
-        if not vector:
+        if vector is None:
             return []
 
-        client = supabase_service.get_client()
+        index = vector_index_registry.get(simulation_id)
+        if index is not None:
+            matches = index.search(vector, limit, settings.MEMORY_MATCH_THRESHOLD, exclude)
+            return [content for content, _ in matches]
+
+        vector_index_registry.schedule_load(simulation_id)
+        client = await supabase_service.get_client()
         
         # Call the PostgreSQL function we defined in SQL
-        response = client.rpc(
+        response = await client.rpc(
             "match_memories",
             {
-                "query_embedding": vector,
-                "match_threshold": 0.5, # Relevance threshold (0-1)
-                "match_count": limit,
-                "p_simulation_id": simulation_id
+                "query_embedding": to_pgvector(vector),
+                "match_threshold": settings.MEMORY_MATCH_THRESHOLD, # Relevance threshold (0-1)
+                "match_count": limit + len(exclude),
+                "p_simulation_id": simulation_id,
+                "p_embedding_version": local_embedder.version
             }
         ).execute()
 
         # Extract just the text content
-        return [item['content'] for item in response.data] if response.data else []
+        excluded = set(exclude)
+        contents = [item['content'] for item in response.data if item['content'] not in excluded] if response.data else []
+        return contents[:limit]
 
 memory_service = MemoryService()
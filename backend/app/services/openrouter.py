@@ -1,30 +1,65 @@
+import json
 import httpx
-from typing import List
+from typing import AsyncIterator, List, Optional
 from backend.app.core.config import settings
+from backend.app.services.embeddings import EMBEDDING_DIM, local_embedder
 
 class OpenRouterService:
     """
     AI Service using OpenRouter with NVIDIA Nemotron model.
     Primary AI provider for Project Nomi.
     """
-    
+
     def __init__(self):
         self.api_key = settings.OPENROUTER_API_KEY
         self.base_url = "https://openrouter.ai/api/v1"
         self.model = "nvidia/nemotron-nano-12b-v2-vl:free"
-    
-    def generate_text(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> str:
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def startup(self):
+        """
+        Opens the process-wide connection pool (called from the app lifespan).
+        """
+        self.get_client()
+
+    async def shutdown(self):
+        """
+        Closes the pool and its keep-alive connections.
+        """
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        """
+        Returns the shared AsyncClient, creating it on first use so scripts
+        that never run the app lifespan still work.
+        """
+        if self.client is None or self.client.is_closed:
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=settings.OPENROUTER_HTTP2,
+                timeout=httpx.Timeout(settings.OPENROUTER_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=settings.OPENROUTER_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OPENROUTER_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.OPENROUTER_KEEPALIVE_EXPIRY_SECONDS
+                ),
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                    "HTTP-Referer": "https://project-nomi.app",
+                    "X-Title": "Project Nomi"
+                }
+            )
+        return self.client
+
+    async def agenerate_text(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> str:
         """
         Generates text using OpenRouter with NVIDIA Nemotron model.
+        Reuses pooled connections, so only the first call pays TCP+TLS setup.
         """
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://project-nomi.app",
-                "X-Title": "Project Nomi"
-            }
-            
             payload = {
                 "model": self.model,
                 "messages": [
@@ -33,55 +68,82 @@ class OpenRouterService:
                 "temperature": temperature,
                 "max_tokens": max_tokens
             }
-            
-            with httpx.Client(timeout=60.0) as client:
-                response = client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=payload
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                if "choices" in data and len(data["choices"]) > 0:
-                    return data["choices"][0]["message"]["content"]
-                else:
-                    return "[Error: No content returned from OpenRouter API]"
-                    
+
+            response = await self.get_client().post("/chat/completions", json=payload)
+            response.raise_for_status()
+
+            data = response.json()
+            if "choices" in data and len(data["choices"]) > 0:
+                return data["choices"][0]["message"]["content"]
+            else:
+                return "[Error: No content returned from OpenRouter API]"
+
         except Exception as e:
             error_msg = f"OpenRouter API Error: {str(e)}"
             print(error_msg)
             return "[System Error: AI generation failed]"
-    
+
+    async def astream_text(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> AsyncIterator[str]:
+        """
+        Streaming variant of agenerate_text.
+        Yields content deltas as OpenRouter emits them over SSE (stream: true).
+        """
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+
+        emitted = False
+        try:
+            async with self.get_client().stream("POST", "/chat/completions", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    # SSE: "data: {...}" events, ": OPENROUTER PROCESSING" keep-alive comments
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data)
+                    except json.JSONDecodeError:
+                        continue
+                    choices = chunk.get("choices") or []
+                    if not choices:
+                        continue
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        emitted = True
+                        yield delta
+
+        except Exception as e:
+            print(f"OpenRouter Stream Error: {str(e)}")
+            if not emitted:
+                yield "[System Error: AI generation failed]"
+
     def embed_text(self, text: str) -> List[float]:
         """
-        Generates text embeddings using OpenRouter.
-        Used for memory storage and retrieval.
-        Note: Uses a simple embedding approach since OpenRouter doesn't have a dedicated embedding endpoint.
-        For production, consider using a dedicated embedding service.
+        Generates text embeddings for memory storage and retrieval.
+        OpenRouter has no embedding endpoint, so this delegates to the local
+        hashed n-gram embedder (services/embeddings.py).
         """
         try:
-            # OpenRouter doesn't have a dedicated embedding endpoint
-            # We'll use a simple hash-based embedding as a fallback
-            # For production, you should integrate a proper embedding service
-            import hashlib
-            
-            # Create a deterministic 768-dimension vector from text
-            hash_bytes = hashlib.sha256(text.encode()).digest()
-            # Expand to 768 dimensions by repeating and varying
-            embedding = []
-            for i in range(768):
-                byte_val = hash_bytes[i % 32]
-                # Normalize to [-1, 1] range with some variation
-                val = ((byte_val + i) % 256) / 255.0 * 2 - 1
-                embedding.append(val)
-            
-            return embedding
-                    
+            return local_embedder.embed_text(text).tolist()
         except Exception as e:
-            print(f"OpenRouter Embedding Error: {e}")
+            print(f"Embedding Error: {e}")
             # Return a zero vector as fallback (768 dimensions)
-            return [0.0] * 768
+            return [0.0] * EMBEDDING_DIM
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Batch form of embed_text (one vector per input, same order).
+        """
+        return local_embedder.embed_texts(texts).tolist()
 
 # Singleton instance
 openrouter_service = OpenRouterService()
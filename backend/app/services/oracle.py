@@ -1,8 +1,14 @@
-import json
+import asyncio
 import re
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, Tuple
+from pydantic import TypeAdapter
+from backend.app.core.config import settings
+from backend.app.core.llm_json import extract_json
+from backend.app.models.domain import ScenarioAnalysis, UserBasics
 from backend.app.services.openrouter import openrouter_service
 from backend.app.services.supabase import supabase_service
+from backend.app.services.cache import invalidate_simulation
 
 # Calibration scenarios for the System to ask
 CALIBRATION_SCENARIOS = [
@@ -11,11 +17,54 @@ CALIBRATION_SCENARIOS = [
     "You're in an elevator that stops between floors. A stranger next to you starts crying. What do you do?"
 ]
 
+# Possible calculate_final_profile outcomes (persona pool buckets)
+ARCHETYPES = ("The Caregiver", "The Leader", "The Artist", "The Rebel", "The Observer")
+MATCH_STRATEGIES = ("COMPLEMENTARY", "CHALLENGE")
+
+BASICS_ADAPTER = TypeAdapter(UserBasics)
+ANALYSIS_ADAPTER = TypeAdapter(ScenarioAnalysis)
+
+# Local parser for the step-0 answer ("Alex, 28, Male", "sam 31 f", "I'm Jo, 24/nb")
+GENDER_SYNONYMS: Dict[str, str] = {
+    **{w: "Male" for w in ("m", "male", "man", "guy", "boy", "dude", "masc", "he", "him", "he/him")},
+    **{w: "Female" for w in ("f", "female", "woman", "girl", "lady", "gal", "fem", "femme", "she", "her", "she/her")},
+    **{w: "Non-binary" for w in ("nb", "enby", "nonbinary", "non-binary", "non binary", "they", "them", "they/them",
+                                 "genderqueer", "genderfluid", "agender")},
+    **{w: w.capitalize() for w in ("trans man", "trans woman", "trans male", "trans female")},
+}
+GENDER_PHRASE_RE = re.compile(r"\b(non[\s-]binary|(?:he|she|they)\s*/\s*(?:him|her|them)|trans\s+(?:man|woman|male|female))\b", re.IGNORECASE)
+# Fields are separated by punctuation; a name never runs across one
+BASICS_SEGMENT_RE = re.compile(r"[,;|/()\[\]:.!?]+|\s-\s")
+AGE_RE = re.compile(r"^(\d{1,3})(?:yo|y/o|yrs?|years?)?$", re.IGNORECASE)
+AGE_GENDER_RE = re.compile(r"^(?:(\d{1,2})([mf])|([mf])(\d{1,2}))$", re.IGNORECASE)
+NAME_RE = re.compile(r"^[^\W\d_][^\W\d_'’-]*(?:['’-][^\W\d_]+)*$")
+BASICS_FILLER = {
+    "hi", "hello", "hey", "yo", "my", "name", "name's", "names", "is", "i", "i'm", "im", "am", "call", "me",
+    "this", "it's", "its", "and", "a", "an", "age", "aged", "gender", "years", "year", "old", "yrs", "named",
+    "sex", "here", "y", "o"
+}
+# Replies that are not a name ("not telling you", "no", "none of your business")
+NAME_STOPWORDS = {
+    "no", "not", "nope", "nah", "none", "nothing", "nobody", "anonymous", "secret", "private", "skip", "pass",
+    "tell", "telling", "you", "your", "ur", "u", "the", "of", "business", "mind", "why", "what", "who", "guess",
+    "dont", "don't", "wont", "won't", "idk", "whatever", "yes", "yeah", "ok", "okay", "lol", "off", "fuck",
+    "fucking", "shit", "later", "nunya"
+}
+
 class OracleService:
     """
     The System - A neutral calibration interface that interviews users
     to build their psychological profile before generating a matched persona.
     """
+
+    def __init__(self):
+        # simulation_id -> scenario index -> in-flight analysis
+        self._analyses: Dict[str, Dict[int, asyncio.Task]] = {}
+        self.background_analyses = 0
+        self.late_analyses = 0
+        self.basics_fast_path = 0
+        self.basics_llm = 0
+        self.basics_fast_seconds = 0.0
     
     def get_system_message(self, step: int, user_profile: Dict[str, Any]) -> str:
         """
@@ -59,10 +108,85 @@ What do you do?"""
         else:
             return "[SYSTEM] Calibration complete. Generating your reality..."
 
-    def parse_user_basics(self, user_input: str) -> Dict[str, Any]:
+    def parse_user_basics_locally(self, user_input: str) -> Tuple[Dict[str, Any], float]:
+        """
+        Deterministic parse of name / age / gender with a confidence score
+        (0-1): each field found adds to it, words that fit none take away,
+        and so do name words that are lowercase or beyond the second. The
+        name ends at the first separator or other field. Without an age the
+        score is capped at 0.5, so a guessed default never skips the LLM.
+        Missing fields get the same defaults as the LLM path.
+        """
+        gender: Optional[str] = None
+        match = GENDER_PHRASE_RE.search(user_input)
+        if match:
+            gender = GENDER_SYNONYMS.get(re.sub(r"\s*([/\s-])\s*", r"\1", match.group(1).lower()).replace("-", " "))
+            user_input = user_input[:match.start()] + " , " + user_input[match.end():]
+
+        name_parts = []
+        name_closed = False
+        age: Optional[int] = None
+        unknown = 0
+
+        tokens = []
+        for segment in BASICS_SEGMENT_RE.split(user_input):
+            tokens.extend(segment.split())
+            tokens.append(None)  # end of field
+
+        for token in tokens:
+            if token is None:
+                name_closed = name_closed or bool(name_parts)
+                continue
+            lowered = token.lower()
+            combined = AGE_GENDER_RE.match(lowered)
+            numeric = AGE_RE.match(lowered)
+
+            if combined and age is None and gender is None:
+                age = int(combined.group(1) or combined.group(4))
+                gender = GENDER_SYNONYMS[combined.group(2) or combined.group(3)]
+            elif numeric:
+                if age is None and 13 <= int(numeric.group(1)) <= 99:
+                    age = int(numeric.group(1))
+                else:
+                    unknown += 1
+            elif lowered in GENDER_SYNONYMS and gender is None:
+                gender = GENDER_SYNONYMS[lowered]
+            elif lowered in BASICS_FILLER:
+                name_closed = name_closed or bool(name_parts)
+                continue
+            elif NAME_RE.match(token) and lowered not in NAME_STOPWORDS and not name_closed and len(name_parts) < 3:
+                name_parts.append(token)
+                continue
+            else:
+                unknown += 1
+            name_closed = name_closed or bool(name_parts)
+
+        confidence = 0.4 * bool(name_parts) + 0.3 * (age is not None) + 0.3 * (gender is not None) - 0.15 * unknown
+        confidence -= 0.1 * sum(1 for part in name_parts if part[0].islower())
+        confidence -= 0.2 * max(0, len(name_parts) - 2)
+        if age is None:
+            confidence = min(confidence, 0.5)
+        name = " ".join(part[:1].upper() + part[1:] for part in name_parts)
+        return {
+            "name": name or "User",
+            "age": age if age is not None else 25,
+            "gender": gender or "Unknown"
+        }, max(0.0, min(1.0, confidence))
+
+    async def parse_user_basics(self, user_input: str) -> Dict[str, Any]:
         """
-        Parses name, age, gender from user input like "Alex, 28, Male"
+        Parses name, age, gender from user input like "Alex, 28, Male".
+        The local parser answers when it is at least
+        ORACLE_BASICS_CONFIDENCE_THRESHOLD confident; the LLM handles the rest.
         """
+        started = time.perf_counter()
+        basics, confidence = self.parse_user_basics_locally(user_input)
+        if confidence >= settings.ORACLE_BASICS_CONFIDENCE_THRESHOLD:
+            self.basics_fast_path += 1
+            self.basics_fast_seconds += time.perf_counter() - started
+            return basics
+
+        self.basics_llm += 1
         prompt = f"""
         Extract the following from this user input: "{user_input}"
         
@@ -72,21 +196,14 @@ What do you do?"""
         If any field is missing, use reasonable defaults.
         """
         
-        raw = openrouter_service.generate_text(prompt, temperature=0.1)
-        clean = re.sub(r"```json|```", "", raw).strip()
-        
-        try:
-            return json.loads(clean)
-        except json.JSONDecodeError:
-            # Fallback parsing
-            parts = user_input.replace(",", " ").split()
-            return {
-                "name": parts[0] if parts else "User",
-                "age": 25,
-                "gender": "Unknown"
-            }
+        raw = await openrouter_service.agenerate_text(prompt, temperature=0.1)
+        parsed = extract_json(raw, BASICS_ADAPTER)
+        if parsed is None:
+            # Fallback: whatever the local parser found
+            return basics
+        return parsed.model_dump()
 
-    def analyze_scenario_response(self, scenario: str, response: str) -> Dict[str, float]:
+    async def analyze_scenario_response(self, scenario: str, response: str) -> Dict[str, float]:
         """
         Analyzes a single scenario response for personality traits.
         """
@@ -105,15 +222,12 @@ What do you do?"""
         {{"empathy": float, "assertiveness": float, "honesty": float, "creativity": float, "anxiety": float}}
         """
         
-        raw = openrouter_service.generate_text(prompt, temperature=0.2)
-        clean = re.sub(r"```json|```", "", raw).strip()
-        
-        try:
-            return json.loads(clean)
-        except json.JSONDecodeError:
-            return {"empathy": 0.5, "assertiveness": 0.5, "honesty": 0.5, "creativity": 0.5, "anxiety": 0.5}
+        raw = await openrouter_service.agenerate_text(prompt, temperature=0.2)
+        # Unparseable replies score neutral (0.5) on every trait
+        analysis = extract_json(raw, ANALYSIS_ADAPTER, default=ScenarioAnalysis())
+        return analysis.model_dump()
 
-    def process_calibration_step(
+    async def process_calibration_step(
         self, 
         simulation_id: str, 
         user_input: str, 
@@ -122,43 +236,46 @@ What do you do?"""
     ) -> Dict[str, Any]:
         """
         Processes a single step of calibration and returns the next System message.
+        Scenario answers are stored right away and analyzed in the background
+        (the next scenario never depends on the analysis); finalize_profile
+        collects the analyses before genesis.
         """
-        client = supabase_service.get_client()
-        updated_profile = current_profile.copy()
+        client = await supabase_service.get_client()
+        patch: Dict[str, Any] = {}
+        response_entry: Optional[Dict[str, Any]] = None
         
         if current_step == 0:
             # Parse name/age/gender
-            basics = self.parse_user_basics(user_input)
-            updated_profile.update(basics)
-            updated_profile['scenario_responses'] = []
+            patch = await self.parse_user_basics(user_input)
+            patch['scenario_responses'] = []
             
         elif current_step in [1, 2, 3]:
-            # Analyze scenario response
+            # Store the scenario response (analysis arrives later)
             scenario_idx = current_step - 1
-            analysis = self.analyze_scenario_response(
-                CALIBRATION_SCENARIOS[scenario_idx], 
-                user_input
-            )
-            
-            if 'scenario_responses' not in updated_profile:
-                updated_profile['scenario_responses'] = []
-            
-            updated_profile['scenario_responses'].append({
+            response_entry = {
                 'scenario': CALIBRATION_SCENARIOS[scenario_idx],
                 'response': user_input,
-                'analysis': analysis
-            })
+                'analysis': None
+            }
         
         # Move to next step
         next_step = current_step + 1
         is_complete = next_step > 3
         
-        # Update database
-        client.table("simulations").update({
-            "user_profile": updated_profile,
-            "calibration_step": next_step,
-            "is_calibrated": is_complete
-        }).eq("id", simulation_id).execute()
+        # Update database (atomic jsonb edit; background analyses write concurrently)
+        response = await client.rpc("update_user_profile", {
+            "p_simulation_id": simulation_id,
+            "p_patch": patch,
+            "p_response": response_entry,
+            "p_response_index": current_step - 1 if response_entry else None,
+            "p_calibration_step": next_step,
+            "p_is_calibrated": is_complete
+        }).execute()
+        invalidate_simulation(simulation_id)
+        updated_profile = response.data or {**current_profile, **patch}
+
+        if response_entry:
+            self.analyze_in_background(simulation_id, current_step - 1, user_input)
         
         # Get next message
         next_message = self.get_system_message(next_step, updated_profile)
@@ -170,11 +287,99 @@ What do you do?"""
             "user_profile": updated_profile
         }
 
+    def analyze_in_background(self, simulation_id: str, scenario_idx: int, user_input: str):
+        """
+        Analyzes a scenario response off the request path and stores the
+        result in user_profile (set_scenario_analysis RPC).
+        """
+        async def analyze():
+            analysis = await self.analyze_scenario_response(CALIBRATION_SCENARIOS[scenario_idx], user_input)
+            client = await supabase_service.get_client()
+            await client.rpc("set_scenario_analysis", {
+                "p_simulation_id": simulation_id,
+                "p_index": scenario_idx,
+                "p_analysis": analysis
+            }).execute()
+            self.background_analyses += 1
+
+        pending = self._analyses.setdefault(simulation_id, {})
+        task = asyncio.create_task(analyze())
+        pending[scenario_idx] = task
+
+        def done(finished: asyncio.Task):
+            if pending.get(scenario_idx) is finished:
+                del pending[scenario_idx]
+                if not pending:
+                    self._analyses.pop(simulation_id, None)
+            if not finished.cancelled() and finished.exception() is not None:
+                print(f"[ORACLE WARNING] Background analysis {scenario_idx} for {simulation_id} failed: {str(finished.exception())}")
+
+        task.add_done_callback(done)
+
+    async def finalize_profile(self, simulation_id: str) -> Dict[str, Any]:
+        """
+        Waits for this worker's outstanding scenario analyses, re-runs any
+        that never landed (failed, or dispatched by another worker that
+        stopped), then merges calculate_final_profile into user_profile.
+        Returns the final profile.
+        """
+        pending = list(self._analyses.get(simulation_id, {}).values())
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        client = await supabase_service.get_client()
+        response = await client.table("simulations")\
+            .select("user_profile")\
+            .eq("id", simulation_id)\
+            .limit(1)\
+            .execute()
+        if not response.data:
+            raise RuntimeError(f"Simulation {simulation_id} not found")
+        user_profile = response.data[0].get('user_profile') or {}
+
+        responses = user_profile.get('scenario_responses') or []
+        missing = [i for i, entry in enumerate(responses) if not entry.get('analysis')]
+        if missing:
+            analyses = await asyncio.gather(*(
+                self.analyze_scenario_response(responses[i]['scenario'], responses[i]['response'])
+                for i in missing
+            ))
+            self.late_analyses += len(missing)
+            for i, analysis in zip(missing, analyses):
+                responses[i]['analysis'] = analysis
+                await client.rpc("set_scenario_analysis", {
+                    "p_simulation_id": simulation_id,
+                    "p_index": i,
+                    "p_analysis": analysis
+                }).execute()
+
+        # Genesis matches on detected_archetype / match_strategy
+        final_profile = self.calculate_final_profile(user_profile)
+        await client.rpc("update_user_profile", {
+            "p_simulation_id": simulation_id,
+            "p_patch": final_profile
+        }).execute()
+        invalidate_simulation(simulation_id)
+        return {**user_profile, **final_profile}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_analyses": sum(len(tasks) for tasks in self._analyses.values()),
+            "background_analyses": self.background_analyses,
+            "late_analyses": self.late_analyses,
+            "basics": {
+                "fast_path": self.basics_fast_path,
+                "llm": self.basics_llm,
+                "fast_path_rate": round(self.basics_fast_path / (self.basics_fast_path + self.basics_llm), 4) if self.basics_fast_path + self.basics_llm else 0.0,
+                "avg_fast_microseconds": round(self.basics_fast_seconds / self.basics_fast_path * 1e6, 1) if self.basics_fast_path else 0.0
+            }
+        }
+
     def calculate_final_profile(self, user_profile: Dict[str, Any]) -> Dict[str, Any]:
         """
         Calculates the final psychometric profile from all scenario responses.
         """
-        responses = user_profile.get('scenario_responses', [])
+        responses = [r for r in user_profile.get('scenario_responses', []) if r.get('analysis')]
         
         if not responses:
             return {
@@ -223,9 +428,9 @@ What do you do?"""
         """Legacy: Generates an initial scene. Now returns System init message."""
         return self.get_system_message(0, {})
 
-    def analyze_reaction(self, scenario: str, user_reaction: str) -> Dict[str, Any]:
+    async def analyze_reaction(self, scenario: str, user_reaction: str) -> Dict[str, Any]:
         """Legacy: Analyze single reaction."""
-        analysis = self.analyze_scenario_response(scenario, user_reaction)
+        analysis = await self.analyze_scenario_response(scenario, user_reaction)
         return {
             "user_vibe": {
                 "openness": analysis.get('creativity', 0.5),
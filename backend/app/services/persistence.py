@@ -0,0 +1,279 @@
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from backend.app.core.config import settings
+from backend.app.services.memory import memory_service
+from backend.app.services.supabase import supabase_service
+
+@dataclass
+class WriteOp:
+    simulation_id: str
+    kind: str  # "memories" | "fluid_state"
+    payload: Any = field(default=None)
+
+class WriteBehindQueue:
+    """
+    Write-behind persistence for the chat hot path.
+
+    Chat history rows and fluid state updates are queued and written by a
+    single asyncio worker, so the HTTP response does not wait on them.
+    - Bounded buffer: enqueue waits when the queue is full (backpressure).
+    - Batching: all queued memory rows go out in one multi-row insert;
+      fluid state updates for the same simulation collapse to the latest.
+    - If the combined insert fails it is split per simulation, so one bad
+      row (e.g. a deleted simulation) only costs that simulation's writes.
+    - Retry with exponential backoff; a batch is retried before the next
+      one is taken, so per-simulation write order is preserved. Writes that
+      still fail are kept in `dead_letters` (last DEAD_LETTER_MAX) and
+      appended with their payload to WRITE_BEHIND_DEAD_LETTER_PATH, from
+      where replay_dead_letters() (python -m backend.replay) re-applies them.
+    - Flush on shutdown; wait_idle() gives the next request read-your-writes.
+
+    The queue lives in process memory: writes still queued when the process
+    dies without a shutdown (crash, SIGKILL, OOM) are lost. That window is
+    at most WRITE_BEHIND_MAX_QUEUE writes and usually one batch.
+    """
+
+    DEAD_LETTER_MAX = 100
+
+    def __init__(self):
+        self.dead_letters: deque = deque(maxlen=self.DEAD_LETTER_MAX)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._pending: Dict[str, int] = {}
+        self._idle: Dict[str, asyncio.Event] = {}
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def startup(self):
+        self._queue = asyncio.Queue(maxsize=settings.WRITE_BEHIND_MAX_QUEUE)
+        self._worker = asyncio.create_task(self._run(), name="write-behind")
+
+    async def shutdown(self):
+        """
+        Flushes everything still queued, then stops the worker.
+        """
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=settings.WRITE_BEHIND_SHUTDOWN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"[WRITE-BEHIND] Shutdown flush timed out with {self._queue.qsize()} writes queued")
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def enqueue_memories(self, simulation_id: str, rows: List[Dict[str, Any]]):
+        """
+        Queues prepared `memories` rows (see MemoryService.build_memory_rows).
+        """
+        if rows:
+            await self._enqueue(WriteOp(simulation_id, "memories", rows))
+
+    async def enqueue_fluid_state(self, simulation_id: str, values: Dict[str, Any]):
+        """
+        Queues a fluid_states update for a simulation.
+        """
+        await self._enqueue(WriteOp(simulation_id, "fluid_state", values))
+
+    async def wait_idle(self, simulation_id: str):
+        """
+        Waits until every queued write for this simulation has been applied,
+        so a following read sees them.
+        """
+        event = self._idle.get(simulation_id)
+        if event is None:
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout=settings.WRITE_BEHIND_READ_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"[WRITE-BEHIND] Reading {simulation_id} before its queued writes landed")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "simulations_pending": len(self._pending),
+            "written": self.written,
+            "failed": self.failed,
+            "retries": self.retries,
+            "dead_letters": len(self.dead_letters)
+        }
+
+    async def replay_dead_letters(self, path: Optional[str] = None) -> int:
+        """
+        Re-applies the memory inserts recorded in the dead-letter file and
+        returns how many were queued. Fluid state updates are skipped: later
+        turns have superseded them. Writes that fail again are dead-lettered
+        again, into a fresh file.
+        """
+        path = Path(path or settings.WRITE_BEHIND_DEAD_LETTER_PATH)
+        replaying = path.with_name(path.name + ".replaying")
+
+        # Move the file aside first so repeat failures start a new one
+        # (appending to what an interrupted replay left behind)
+        if path.exists():
+            if replaying.exists():
+                with open(replaying, "a", encoding="utf-8") as f:
+                    f.write(path.read_text(encoding="utf-8"))
+                path.unlink()
+            else:
+                path.replace(replaying)
+        if not replaying.exists():
+            return 0
+
+        replayed = 0
+        for line in replaying.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record["kind"] != "memories":
+                print(f"[WRITE-BEHIND] Skipping stale {record['kind']} write for {record['simulation_id']}")
+                continue
+            await self._enqueue(WriteOp(record["simulation_id"], "memories", record["payload"]))
+            replayed += 1
+
+        replaying.unlink()
+        return replayed
+
+    async def _enqueue(self, op: WriteOp):
+        if not self.running:
+            # No worker (scripts, or before startup): write through.
+            await self._write_batch([op])
+            return
+
+        self._pending[op.simulation_id] = self._pending.get(op.simulation_id, 0) + 1
+        self._idle.setdefault(op.simulation_id, asyncio.Event()).clear()
+        await self._queue.put(op)
+
+    def _mark_done(self, simulation_id: str):
+        remaining = self._pending.get(simulation_id, 1) - 1
+        if remaining > 0:
+            self._pending[simulation_id] = remaining
+            return
+        self._pending.pop(simulation_id, None)
+        event = self._idle.pop(simulation_id, None)
+        if event is not None:
+            event.set()
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < settings.WRITE_BEHIND_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                print(f"[WRITE-BEHIND] Unexpected error: {str(e)}")
+            finally:
+                for op in batch:
+                    self._mark_done(op.simulation_id)
+                    self._queue.task_done()
+
+    async def _write_batch(self, batch: List[WriteOp]):
+        rows_by_simulation: Dict[str, List[Dict[str, Any]]] = {}
+        fluid_updates: Dict[str, Dict[str, Any]] = {}
+        for op in batch:
+            if op.kind == "memories":
+                rows_by_simulation.setdefault(op.simulation_id, []).extend(op.payload)
+            elif op.kind == "fluid_state":
+                fluid_updates.setdefault(op.simulation_id, {}).update(op.payload)
+
+        if rows_by_simulation:
+            await self._insert_memories(rows_by_simulation)
+
+        if fluid_updates:
+            await asyncio.gather(*(
+                self._with_retry(
+                    f"update fluid_state {simulation_id}",
+                    WriteOp(simulation_id, "fluid_state", values),
+                    self._update_fluid_state, simulation_id, values
+                )
+                for simulation_id, values in fluid_updates.items()
+            ))
+
+    async def _insert_memories(self, rows_by_simulation: Dict[str, List[Dict[str, Any]]]):
+        """
+        One multi-row insert for the whole batch; if that fails, one insert
+        (with retries) per simulation so a bad row cannot drop other
+        simulations' chat history.
+        """
+        rows = [row for simulation_rows in rows_by_simulation.values() for row in simulation_rows]
+        try:
+            await memory_service.insert_memory_rows(rows)
+            self.written += 1
+            return
+        except Exception as e:
+            print(f"[WRITE-BEHIND WARNING] insert {len(rows)} memories failed, retrying per simulation: {str(e)}")
+
+        await asyncio.gather(*(
+            self._with_retry(
+                f"insert {len(simulation_rows)} memories for {simulation_id}",
+                WriteOp(simulation_id, "memories", simulation_rows),
+                memory_service.insert_memory_rows, simulation_rows
+            )
+            for simulation_id, simulation_rows in rows_by_simulation.items()
+        ))
+
+    async def _update_fluid_state(self, simulation_id: str, values: Dict[str, Any]):
+        client = await supabase_service.get_client()
+        await client.table("fluid_states").update(values).eq("simulation_id", simulation_id).execute()
+
+    async def _with_retry(self, description: str, op: WriteOp, fn, *args):
+        delay = settings.WRITE_BEHIND_RETRY_BACKOFF_SECONDS
+        for attempt in range(1, settings.WRITE_BEHIND_MAX_RETRIES + 1):
+            try:
+                await fn(*args)
+                self.written += 1
+                return
+            except Exception as e:
+                if attempt == settings.WRITE_BEHIND_MAX_RETRIES:
+                    self.failed += 1
+                    print(f"[WRITE-BEHIND ERROR] Giving up on {description} after {attempt} attempts: {str(e)}")
+                    self._dead_letter(op, str(e))
+                    return
+                self.retries += 1
+                print(f"[WRITE-BEHIND WARNING] {description} failed (attempt {attempt}): {str(e)}")
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    def _dead_letter(self, op: WriteOp, error: str):
+        """
+        Keeps a failed write in memory and appends it, payload included, to
+        the dead-letter file so it survives a restart and can be replayed.
+        """
+        self.dead_letters.append(op)
+        record = json.dumps({
+            "simulation_id": op.simulation_id,
+            "kind": op.kind,
+            "payload": op.payload,
+            "error": error,
+            "failed_at": datetime.now(timezone.utc).isoformat()
+        })
+        if not settings.WRITE_BEHIND_DEAD_LETTER_PATH:
+            print(f"[WRITE-BEHIND DEAD LETTER] {record}")
+            return
+        try:
+            with open(settings.WRITE_BEHIND_DEAD_LETTER_PATH, "a", encoding="utf-8") as f:
+                f.write(record + "\n")
+        except OSError as e:
+            print(f"[WRITE-BEHIND ERROR] Could not save dead letter ({str(e)}): {record}")
+
+# Singleton instance
+write_behind_queue = WriteBehindQueue()
@@ -0,0 +1,184 @@
+import asyncio
+from itertools import product
+from typing import Any, Dict, List, Optional, Tuple
+from backend.app.core.config import settings
+from backend.app.services.embeddings import local_embedder, to_pgvector
+from backend.app.services.foundry import foundry_service
+from backend.app.services.memory import memory_service
+from backend.app.services.oracle import ARCHETYPES, MATCH_STRATEGIES
+from backend.app.services.supabase import supabase_service
+
+BUCKETS: List[Tuple[str, str]] = list(product(ARCHETYPES, MATCH_STRATEGIES))
+
+class PersonaPool:
+    """
+    Warm pool of pre-generated personas (persona_pool table).
+
+    Keeps PERSONA_POOL_PER_BUCKET ready personas, each with its backstory
+    memories already embedded, per detected_archetype x match_strategy.
+    Genesis claims one (claim_pooled_persona RPC, FOR UPDATE SKIP LOCKED)
+    and only generates the opening scenario; the refill loop tops the
+    bucket back up in the background after every claim and every
+    PERSONA_POOL_REFILL_INTERVAL_SECONDS.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.PERSONA_POOL_ENABLED and settings.PERSONA_POOL_PER_BUCKET > 0
+
+    async def startup(self):
+        if self.enabled:
+            self._task = asyncio.create_task(self._run(), name="persona-pool-refill")
+
+    async def shutdown(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        claims = self.hits + self.misses
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / claims, 4) if claims else 0.0,
+            "generated": self.generated,
+            "failed": self.failed
+        }
+
+    async def claim(self, user_profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Atomically takes a ready persona for the profile's bucket
+        ({"persona", "memories"}), or None if the bucket is empty.
+        """
+        if not self.enabled:
+            return None
+
+        bucket = (user_profile.get('detected_archetype'), user_profile.get('match_strategy'))
+        if bucket not in BUCKETS:
+            self.misses += 1
+            return None
+
+        try:
+            client = await supabase_service.get_client()
+            response = await client.rpc("claim_pooled_persona", {
+                "p_archetype": bucket[0],
+                "p_match_strategy": bucket[1]
+            }).execute()
+        except Exception as e:
+            print(f"[POOL WARNING] Claim failed: {str(e)}")
+            response = None
+
+        self._wake.set()
+        if not response or not response.data:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return response.data[0]
+
+    async def claim_fallback(self, user_profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        A ready persona from any bucket (same archetype first), for when
+        persona generation fails outright; None if the pool is empty.
+        """
+        if not self.enabled:
+            return None
+
+        archetype = user_profile.get('detected_archetype')
+        client = await supabase_service.get_client()
+        for bucket in sorted(BUCKETS, key=lambda bucket: bucket[0] != archetype):
+            try:
+                response = await client.rpc("claim_pooled_persona", {
+                    "p_archetype": bucket[0],
+                    "p_match_strategy": bucket[1]
+                }).execute()
+            except Exception as e:
+                print(f"[POOL WARNING] Fallback claim failed: {str(e)}")
+                return None
+            if response.data:
+                self._wake.set()
+                return response.data[0]
+        return None
+
+    async def refill(self) -> int:
+        """
+        Generates personas for every bucket below PERSONA_POOL_PER_BUCKET;
+        returns the number added.
+        """
+        client = await supabase_service.get_client()
+        response = await client.rpc("persona_pool_levels", {}).execute()
+        levels = {(row['archetype'], row['match_strategy']): row['ready'] for row in response.data or []}
+
+        missing = [
+            bucket
+            for bucket in BUCKETS
+            for _ in range(settings.PERSONA_POOL_PER_BUCKET - levels.get(bucket, 0))
+        ]
+        semaphore = asyncio.Semaphore(settings.PERSONA_POOL_CONCURRENCY)
+
+        async def generate(bucket: Tuple[str, str]) -> bool:
+            async with semaphore:
+                try:
+                    await self._generate(client, *bucket)
+                    return True
+                except Exception as e:
+                    self.failed += 1
+                    print(f"[POOL WARNING] Generating {bucket} failed: {str(e)}")
+                    return False
+
+        added = sum(await asyncio.gather(*(generate(bucket) for bucket in missing)))
+        self.generated += added
+        return added
+
+    async def _generate(self, client, archetype: str, match_strategy: str):
+        profile = {"detected_archetype": archetype, "match_strategy": match_strategy}
+        persona = await foundry_service.generate_dynamic_persona(profile)
+        backstory = await foundry_service.generate_backstory(persona)
+
+        matrix = memory_service.get_embeddings(backstory) if backstory else None
+        memories = [
+            {
+                "content": content,
+                "embedding": to_pgvector(matrix[i]) if matrix is not None else None,
+                "embedding_version": local_embedder.version if matrix is not None else None
+            }
+            for i, content in enumerate(backstory)
+        ]
+
+        await client.table("persona_pool").insert({
+            "archetype": archetype,
+            "match_strategy": match_strategy,
+            "persona": persona,
+            "memories": memories
+        }).execute()
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                added = await self.refill()
+                if added:
+                    print(f"[POOL] Added {added} personas to the warm pool")
+            except Exception as e:
+                print(f"[POOL WARNING] Refill failed: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.PERSONA_POOL_REFILL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+# Singleton instance
+persona_pool = PersonaPool()
@@ -0,0 +1,138 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+from backend.app.core.config import settings
+from backend.app.services.supabase import first_embedded, supabase_service
+from backend.app.services.world import world_service
+
+class TimeSkipPregenerator:
+    """
+    Background pre-generation of time-skip narratives.
+
+    Every TIME_SKIP_PREGEN_INTERVAL_SECONDS it looks for active simulations
+    that are within TIME_SKIP_PREGEN_LEAD_MINUTES of the 4-hour gap (or
+    whose previous window has expired) and writes the bridge narrative for
+    the next return window into simulations.pending_time_skip. A window
+    lasts while get_schedule_state reports the same activity, capped at
+    TIME_SKIP_PREGEN_WINDOW_HOURS. The chat path picks it up in
+    WorldService.calculate_time_skip; record_memories clears it.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.scans = 0
+        self.generated = 0
+        self.failed = 0
+
+    async def startup(self):
+        if settings.TIME_SKIP_PREGEN_ENABLED:
+            self._task = asyncio.create_task(self._run(), name="time-skip-pregen")
+
+    async def shutdown(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "scans": self.scans,
+            "generated": self.generated,
+            "failed": self.failed,
+            **world_service.stats()
+        }
+
+    def return_window(self, last_interaction: datetime, now: datetime, persona: Dict[str, Any]) -> Tuple[datetime, datetime]:
+        """
+        [start, end) in which a returning user would get this narrative:
+        from the 4-hour mark (or now) while the schedule activity stays the same.
+        """
+        start = max(last_interaction + timedelta(hours=world_service.TIME_SKIP_HOURS), now)
+        limit = start + timedelta(hours=settings.TIME_SKIP_PREGEN_WINDOW_HOURS)
+        activity = world_service.get_schedule_state(start, persona)['activity']
+
+        end = start.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        while end < limit and world_service.get_schedule_state(end, persona)['activity'] == activity:
+            end += timedelta(hours=1)
+        return start, min(end, limit)
+
+    async def run_once(self) -> int:
+        """
+        One scan; returns the number of narratives written.
+        """
+        self.scans += 1
+        client = await supabase_service.get_client()
+        now_utc = datetime.now(timezone.utc)
+        # Window bounds follow WorldService's naive local clock
+        now = datetime.now()
+
+        due_before = now_utc - timedelta(hours=world_service.TIME_SKIP_HOURS) + timedelta(minutes=settings.TIME_SKIP_PREGEN_LEAD_MINUTES)
+        idle_since = now_utc - timedelta(hours=settings.TIME_SKIP_PREGEN_MAX_IDLE_HOURS)
+        response = await client.table("simulations")\
+            .select("id, last_interaction_at, persona_core(id, name, weekly_schedule)")\
+            .eq("status", "ACTIVE")\
+            .eq("is_calibrated", True)\
+            .lte("last_interaction_at", due_before.isoformat())\
+            .gte("last_interaction_at", idle_since.isoformat())\
+            .or_(f"pending_time_skip.is.null,pending_time_skip->>valid_until.lt.{now.isoformat(timespec='seconds')}")\
+            .order("last_interaction_at", desc=True)\
+            .limit(settings.TIME_SKIP_PREGEN_BATCH_SIZE)\
+            .execute()
+
+        semaphore = asyncio.Semaphore(settings.TIME_SKIP_PREGEN_CONCURRENCY)
+
+        async def pregenerate(row: Dict[str, Any]) -> bool:
+            async with semaphore:
+                try:
+                    return await self._pregenerate(client, row, now)
+                except Exception as e:
+                    self.failed += 1
+                    print(f"[PREGEN WARNING] Time skip for {row.get('id')} failed: {str(e)}")
+                    return False
+
+        results = await asyncio.gather(*(pregenerate(row) for row in response.data or []))
+        written = sum(results)
+        self.generated += written
+        return written
+
+    async def _pregenerate(self, client, row: Dict[str, Any], now: datetime) -> bool:
+        persona = first_embedded(row.get('persona_core')) or {}
+
+        last_interaction = datetime.fromisoformat(row['last_interaction_at'].replace('Z', '+00:00')).replace(tzinfo=None)
+        start, end = self.return_window(last_interaction, now, persona)
+        hours_elapsed = (start - last_interaction).total_seconds() / 3600
+
+        narrative = await world_service.generate_time_skip_narrative(persona, hours_elapsed, start, since=last_interaction)
+        pending = {
+            "narrative_text": narrative.get('narrative_text'),
+            "new_status": narrative.get('new_status'),
+            "last_interaction_at": row['last_interaction_at'],
+            "valid_from": start.isoformat(timespec="seconds"),
+            "valid_until": end.isoformat(timespec="seconds")
+        }
+
+        # Compare-and-set: skip if the user came back while we were generating
+        result = await client.table("simulations")\
+            .update({"pending_time_skip": pending})\
+            .eq("id", row['id'])\
+            .eq("last_interaction_at", row['last_interaction_at'])\
+            .execute()
+        return bool(result.data)
+
+    async def _run(self):
+        while True:
+            try:
+                written = await self.run_once()
+                if written:
+                    print(f"[PREGEN] Pre-generated {written} time-skip narratives")
+            except Exception as e:
+                print(f"[PREGEN WARNING] Scan failed: {str(e)}")
+            await asyncio.sleep(settings.TIME_SKIP_PREGEN_INTERVAL_SECONDS)
+
+# Singleton instance
+time_skip_pregenerator = TimeSkipPregenerator()
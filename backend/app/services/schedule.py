@@ -0,0 +1,224 @@
+import random
+import re
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from backend.app.services.cache import schedule_cache
+
+HOURS_PER_WEEK = 168
+
+# (activity, is_busy, location)
+Slot = Tuple[str, bool, str]
+
+# Routine archetypes. Hours are local; bed_hour >= 24 means after midnight
+# and work_hours may run past midnight (night shifts). The "office"
+# archetype reproduces the original fixed routine exactly.
+ARCHETYPES: Dict[str, Dict[str, Any]] = {
+    "office": {
+        "work_days": (0, 1, 2, 3, 4),
+        "wake": 7, "wake_off": 9, "bed_hour": 24,
+        "work_hours": (9, 17), "commute_hours": 2,
+        "work_location": "Office / School",
+        "after_work": ("Gym / Errands", True, "Gym / Shop", 2),
+    },
+    "early": {
+        "work_days": (0, 1, 2, 3, 4, 5),
+        "wake": 4, "wake_off": 8, "bed_hour": 21,
+        "work_hours": (5, 13), "commute_hours": 1,
+        "work_location": "Work",
+        "after_work": ("Napping / Errands", False, "Home", 2),
+    },
+    "night": {
+        "work_days": (2, 3, 4, 5, 6),
+        "wake": 11, "wake_off": 11, "bed_hour": 27,
+        "work_hours": (18, 26), "commute_hours": 1,
+        "work_location": "Work",
+        "before_work": ("Gym / Errands", False, "Gym / Shop"),
+        "after_work": None,
+    },
+    "creative": {
+        "work_days": (0, 1, 2, 3, 4, 5),
+        "wake": 9, "wake_off": 10, "bed_hour": 25,
+        "work_hours": (11, 18), "commute_hours": 1,
+        "work_location": "Studio",
+        "before_work": ("Slow Morning", False, "Café"),
+        "after_work": ("Out for Drinks", False, "Bar", 2),
+    },
+    "student": {
+        "work_days": (0, 1, 2, 3, 4),
+        "wake": 8, "wake_off": 10, "bed_hour": 25,
+        "work_hours": (9, 15), "commute_hours": 1,
+        "work_activity": "In Class", "work_location": "Campus",
+        "after_work": ("Studying", True, "Library", 3),
+    },
+    "service": {
+        "work_days": (0, 3, 4, 5, 6),
+        "wake": 8, "wake_off": 10, "bed_hour": 24,
+        "work_hours": (10, 18), "commute_hours": 2,
+        "work_location": "Work",
+        "after_work": ("Errands", True, "Shops", 1),
+    },
+}
+
+# First match wins; anything else is an office-hours job
+OCCUPATION_PATTERNS: List[Tuple[str, re.Pattern]] = [
+    ("student", re.compile(r"\b(student|phd|grad|undergrad|intern|apprentice)")),
+    ("night", re.compile(r"\b(bartend|nurse|dj|musician|chef|cook|security|guard|paramedic|night|club|taxi|driver|performer|comedian|dancer|croupier|dispatcher)")),
+    ("early", re.compile(r"\b(baker|farm|fisher|florist|butcher|postal|postman|gardener|groundskeeper|milk|market)")),
+    ("creative", re.compile(r"\b(artist|paint|photograph|writer|author|poet|illustrat|sculpt|potter|ceramic|tattoo|designer|filmmaker|animator|luthier|craft|restor)")),
+    ("service", re.compile(r"\b(barista|waiter|waitress|server|retail|cashier|shop|store|hairdress|stylist|barber|clerk|vendor)")),
+]
+
+def classify_occupation(occupation: str) -> str:
+    occupation = occupation.lower()
+    for archetype, pattern in OCCUPATION_PATTERNS:
+        if pattern.search(occupation):
+            return archetype
+    return "office"
+
+def compile_weekly_schedule(persona: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compiles the persona's weekly routine into a 168-slot table (index =
+    weekday * 24 + hour), stored as persona_core.weekly_schedule:
+    {"activities": [[activity, is_busy, location], ...], "slots": [int x 168]}.
+
+    Deterministic: the archetype comes from the occupation, the city from
+    the hometown, and a small shift of the working day from a seed over
+    both. Without an occupation it is the original fixed routine.
+    """
+    occupation = (persona.get('occupation') or '').strip()
+    hometown = (persona.get('hometown') or '').strip()
+    params = ARCHETYPES[classify_occupation(occupation)]
+    city = hometown.split(',')[0].strip() or "City"
+
+    shift = 0
+    if occupation:
+        seed = zlib.crc32(f"{persona.get('name', '')}|{occupation}|{hometown}".encode("utf-8"))
+        shift = random.Random(seed).choice((-1, 0, 0, 1))
+
+    activities: List[Slot] = []
+    index: Dict[Slot, int] = {}
+    slots = [0] * HOURS_PER_WEEK
+
+    def fill(start: int, end: int, slot: Slot):
+        """Fills week hours [start, end), wrapping around Sunday night."""
+        if slot not in index:
+            index[slot] = len(activities)
+            activities.append(slot)
+        for hour in range(start, end):
+            slots[hour % HOURS_PER_WEEK] = index[slot]
+
+    work_days = set(params["work_days"])
+    work_start, work_end = (hour + shift for hour in params["work_hours"])
+    wake = params["wake"] + shift
+    work_location = f"{params['work_location']} ({occupation})" if occupation else params["work_location"]
+
+    # Evenings first, then the day's blocks, then sleep on top (a night
+    # shift spills into the next day's early hours before that day's sleep)
+    for day in range(7):
+        base = day * 24
+        evening = ("Free Time", False, "Home") if day in work_days else ("Relaxing", False, "Home")
+        fill(base, base + 24, evening)
+
+    for day in range(7):
+        base = day * 24
+        if day in work_days:
+            commute_from = work_start - params["commute_hours"]
+            before = params.get("before_work")
+            if before and commute_from > wake:
+                fill(base + wake, base + commute_from, before)
+            fill(base + max(wake, commute_from), base + work_start, ("Commuting / Getting Ready", True, "Transit"))
+            fill(base + work_start, base + work_end, (params.get("work_activity", "Working"), True, work_location))
+            after = params.get("after_work")
+            if after:
+                activity, is_busy, location, hours = after
+                fill(base + work_end, base + work_end + hours, (activity, is_busy, location))
+        else:
+            wake_off = params["wake_off"]
+            if wake_off < 12:
+                fill(base + wake_off, base + 12, ("Lazy Morning", False, "Home"))
+            fill(base + max(wake_off, 12), base + 18, ("Socializing / Out", False, city))
+
+    for day in range(7):
+        wake_hour = wake if day in work_days else params["wake_off"]
+        # Sleep from the previous night's bedtime until this morning's wake-up
+        fill(day * 24 - 24 + params["bed_hour"], day * 24 + wake_hour, ("Sleeping", True, "Home - Bed"))
+
+    return {
+        "activities": [list(slot) for slot in activities],
+        "slots": slots
+    }
+
+class WeeklySchedule:
+    """
+    A compiled 168-slot routine. state_at() is a single array index and
+    activities_between() covers any interval in one vectorized pass.
+    """
+
+    def __init__(self, table: Dict[str, Any]):
+        self.activities: List[Slot] = [(str(a), bool(b), str(l)) for a, b, l in table["activities"]]
+        self.slots = np.asarray(table["slots"], dtype=np.int16)
+        if self.slots.shape != (HOURS_PER_WEEK,):
+            raise ValueError(f"weekly schedule needs {HOURS_PER_WEEK} slots, got {self.slots.shape}")
+
+    @staticmethod
+    def slot_index(moment: datetime) -> int:
+        return moment.weekday() * 24 + moment.hour
+
+    def state_at(self, moment: datetime) -> Dict[str, Any]:
+        activity, is_busy, location = self.activities[self.slots[self.slot_index(moment)]]
+        return {
+            "activity": activity,
+            "is_busy": is_busy,
+            "location": location
+        }
+
+    def activities_between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """
+        Every activity in the hour slots from start up to end, in order of
+        first occurrence, with the number of hours spent on each.
+        """
+        hours = int((end - start).total_seconds() // 3600)
+        if hours <= 0:
+            return []
+
+        week_slots = self.slots[(self.slot_index(start) + np.arange(hours)) % HOURS_PER_WEEK]
+        counts = np.bincount(week_slots, minlength=len(self.activities))
+        seen, first_hour = np.unique(week_slots, return_index=True)
+
+        return [
+            {
+                "activity": self.activities[slot][0],
+                "location": self.activities[slot][2],
+                "hours": int(counts[slot])
+            }
+            for slot in seen[np.argsort(first_hour)]
+        ]
+
+# Personas without a stored table (created before schedules were compiled)
+DEFAULT_SCHEDULE = WeeklySchedule(compile_weekly_schedule({}))
+
+def schedule_for(persona: Optional[Dict[str, Any]]) -> WeeklySchedule:
+    """
+    The compiled schedule for a persona row, cached by persona id.
+    """
+    if not persona:
+        return DEFAULT_SCHEDULE
+
+    key = persona.get('id')
+    if key is not None:
+        cached = schedule_cache.get(key)
+        if cached is not None:
+            return cached
+
+    table = persona.get('weekly_schedule')
+    try:
+        schedule = WeeklySchedule(table) if table else DEFAULT_SCHEDULE
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"[SCHEDULE WARNING] Invalid weekly schedule for persona {key}: {str(e)}")
+        schedule = DEFAULT_SCHEDULE
+
+    if key is not None:
+        schedule_cache.set(key, schedule)
+    return schedule
@@ -0,0 +1,171 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+from backend.app.core.config import settings
+from backend.app.services.openrouter import openrouter_service
+from backend.app.services.persistence import write_behind_queue
+from backend.app.services.supabase import supabase_service
+from backend.app.services.vector_index import vector_index_registry
+
+COMPACTED_TYPES = ["CHAT_HISTORY", "NARRATIVE"]
+
+class SummaryService:
+    """
+    Rolling conversation summarization (background compaction).
+
+    Every SUMMARY_EVERY_TURNS turns, chat rows older than the most recent
+    SUMMARY_KEEP_RECENT are folded into one running SUMMARY memory and
+    moved to memories_archive (compact_memories RPC). The chat context is
+    then the summary plus the recent tail, so prompt size and per-simulation
+    row counts stay bounded however long the relationship runs.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.compactions = 0
+        self.rows_archived = 0
+        self.failed = 0
+
+    def after_turn(self, simulation_id: str, message_count: int, new_messages: int):
+        """
+        Schedules a compaction when this turn crosses a SUMMARY_EVERY_TURNS
+        boundary (message_count is the count before the turn).
+        """
+        every = settings.SUMMARY_EVERY_TURNS * 2  # user line + reply per turn
+        if every <= 0 or new_messages <= 0:
+            return
+        if message_count // every != (message_count + new_messages) // every:
+            self.schedule(simulation_id)
+
+    def schedule(self, simulation_id: str):
+        if simulation_id in self._tasks:
+            return
+        self._tasks[simulation_id] = asyncio.create_task(self._compact(simulation_id))
+
+    def cancel(self, simulation_id: str):
+        task = self._tasks.pop(simulation_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def shutdown(self):
+        """Cancels in-flight compactions (they are safe to redo later)."""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": len(self._tasks),
+            "compactions": self.compactions,
+            "rows_archived": self.rows_archived,
+            "failed": self.failed
+        }
+
+    async def compact(self, simulation_id: str) -> int:
+        """
+        Folds everything older than the recent tail into the running summary,
+        oldest rows first. Returns the number of rows archived.
+        """
+        # The turn that triggered this may still be queued
+        await write_behind_queue.wait_idle(simulation_id)
+        client = await supabase_service.get_client()
+
+        # Boundary: created_at of the oldest row in the kept tail
+        tail = await client.table("memories")\
+            .select("created_at")\
+            .eq("simulation_id", simulation_id)\
+            .in_("memory_type", COMPACTED_TYPES)\
+            .order("created_at", desc=True)\
+            .range(settings.SUMMARY_KEEP_RECENT - 1, settings.SUMMARY_KEEP_RECENT - 1)\
+            .execute()
+        if not tail.data:
+            return 0
+        boundary = tail.data[0]['created_at']
+
+        archived = 0
+        while True:
+            page = await client.table("memories")\
+                .select("id, content")\
+                .eq("simulation_id", simulation_id)\
+                .in_("memory_type", COMPACTED_TYPES)\
+                .lt("created_at", boundary)\
+                .order("created_at")\
+                .limit(settings.SUMMARY_MAX_ROWS_PER_PASS)\
+                .execute()
+            rows = page.data or []
+            if not rows:
+                break
+
+            previous = await client.table("memories")\
+                .select("content")\
+                .eq("simulation_id", simulation_id)\
+                .eq("memory_type", "SUMMARY")\
+                .order("created_at", desc=True)\
+                .limit(1)\
+                .execute()
+            previous_summary = previous.data[0]['content'] if previous.data else None
+
+            summary = await self.summarize(previous_summary, [row['content'] for row in rows])
+            if summary is None:
+                raise RuntimeError("summary generation failed")
+
+            await client.rpc("compact_memories", {
+                "p_simulation_id": simulation_id,
+                "p_summary": summary,
+                "p_archive_ids": [row['id'] for row in rows]
+            }).execute()
+            archived += len(rows)
+
+            if len(rows) < settings.SUMMARY_MAX_ROWS_PER_PASS:
+                break
+
+        if archived:
+            # Archived lines must not be served from the resident index
+            vector_index_registry.evict(simulation_id)
+        return archived
+
+    async def summarize(self, previous_summary: Optional[str], lines: List[str]) -> Optional[str]:
+        """
+        Folds new transcript lines into the running summary (None on failure).
+        """
+        prompt = f"""
+        You maintain the long-term memory of an ongoing relationship roleplay.
+
+        CURRENT SUMMARY:
+        {previous_summary or "None yet (this is the start of the relationship)."}
+
+        NEW TRANSCRIPT (oldest first):
+        {chr(10).join(lines)}
+
+        TASK:
+        Rewrite the summary so it also covers the new transcript.
+        Keep names, facts the user revealed, promises, conflicts, inside jokes
+        and how the relationship has shifted. Drop small talk.
+        Write in the past tense, third person, at most {settings.SUMMARY_MAX_WORDS} words.
+
+        OUTPUT THE SUMMARY TEXT ONLY.
+        """
+        summary = (await openrouter_service.agenerate_text(prompt, temperature=0.3)).strip()
+        if not summary or summary.startswith("[System Error") or summary.startswith("[Error"):
+            return None
+        return summary
+
+    async def _compact(self, simulation_id: str):
+        try:
+            archived = await self.compact(simulation_id)
+            if archived:
+                self.compactions += 1
+                self.rows_archived += archived
+                print(f"[SUMMARY] Folded {archived} rows into the summary for {simulation_id}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            print(f"[SUMMARY WARNING] Compaction failed for {simulation_id}: {str(e)}")
+        finally:
+            if self._tasks.get(simulation_id) is asyncio.current_task():
+                del self._tasks[simulation_id]
+
+# Singleton instance
+summary_service = SummaryService()
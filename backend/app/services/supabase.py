@@ -1,24 +1,89 @@
-from supabase import create_client, Client
+import asyncio
+from typing import Any, Dict, Optional
+from supabase import acreate_client, AsyncClient
 from backend.app.core.config import settings
+from backend.app.services.cache import persona_cache, simulation_cache
+
+def first_embedded(value: Any) -> Optional[Dict[str, Any]]:
+    """PostgREST embeds one-to-many relations as lists, one-to-one as objects."""
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
 
 class SupabaseService:
+    """
+    Async Supabase client shared by every service.
+    All queries are awaited, so a slow request never blocks the event loop.
+    """
+
     def __init__(self):
         self.url: str = settings.SUPABASE_URL
         self.key: str = settings.SUPABASE_KEY
-        self.client: Client | None = None
+        self.client: AsyncClient | None = None
+        self._lock = asyncio.Lock()
+
+    async def startup(self):
+        """
+        Connects eagerly on app start (failures are retried lazily by get_client).
+        """
         try:
-            self.client = create_client(self.url, self.key)
-        except Exception as e:
+            await self.get_client()
+        except RuntimeError as e:
             print(f"Warning: Supabase client failed to initialize: {e}")
 
-    def get_client(self) -> Client:
+    async def get_client(self) -> AsyncClient:
         if not self.client:
-             # Try connecting again or raise error
-            try:
-                self.client = create_client(self.url, self.key)
-            except Exception:
-                raise RuntimeError("Supabase client is not initialized. Please check SUPABASE_URL and SUPABASE_KEY in .env")
+            async with self._lock:
+                if not self.client:
+                    # Try connecting again or raise error
+                    try:
+                        self.client = await acreate_client(self.url, self.key)
+                    except Exception:
+                        raise RuntimeError("Supabase client is not initialized. Please check SUPABASE_URL and SUPABASE_KEY in .env")
         return self.client
 
+    async def load_chat_context(self, simulation_id: str) -> Dict[str, Any]:
+        """
+        Loads simulation, persona, fluid state, last interaction time and
+        message count (denormalized on simulations), any pre-generated time
+        skip, the running summary, recent history and core memories in one round trip (load_chat_context RPC).
+        Simulation and persona rows are served from the in-process cache when
+        possible, in which case the RPC skips them.
+        Missing rows come back as None; history/core_memories default to [].
+        """
+        cached_simulation = simulation_cache.get(simulation_id)
+        cached_persona = persona_cache.get(simulation_id)
+        include_static = cached_simulation is None or cached_persona is None
+
+        client = await self.get_client()
+        response = await client.rpc("load_chat_context", {
+            "p_simulation_id": simulation_id,
+            "p_include_static": include_static
+        }).execute()
+        context = response.data or {}
+
+        simulation = cached_simulation
+        persona = cached_persona
+        if include_static:
+            simulation = context.get("simulation")
+            persona = context.get("persona")
+            # Calibration rewrites the simulation row every step; only cache it afterwards
+            if simulation and simulation.get("is_calibrated"):
+                simulation_cache.set(simulation_id, simulation)
+            if persona:
+                persona_cache.set(simulation_id, persona)
+
+        return {
+            "simulation": simulation,
+            "persona": persona,
+            "fluid_state": context.get("fluid_state"),
+            "last_interaction_at": context.get("last_interaction_at"),
+            "message_count": context.get("message_count") or 0,
+            "summary": context.get("summary"),
+            "pending_time_skip": context.get("pending_time_skip"),
+            "history": context.get("history") or [],
+            "core_memories": context.get("core_memories") or []
+        }
+
 # Singleton instance
 supabase_service = SupabaseService()
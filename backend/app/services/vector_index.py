@@ -0,0 +1,206 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from backend.app.core.config import settings
+from backend.app.services.embeddings import EMBEDDING_DIM, local_embedder
+from backend.app.services.supabase import supabase_service
+
+def parse_pgvector(value: Any) -> Optional[np.ndarray]:
+    """PostgREST returns vector columns as '[x1,x2,...]' strings."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
+def parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+class SimulationVectorIndex:
+    """
+    Exact top-k index for one simulation's memories: a contiguous
+    (capacity, dim) NumPy matrix that grows by doubling, searched with one
+    matrix-vector product. Vectors are L2-normalised, so dot = cosine.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        self.matrix = np.zeros((64, dim), dtype=self.dtype)
+        self.contents: List[str] = []
+        self.latest_created_at: Optional[datetime] = None
+        self.last_used = time.monotonic()
+
+    @property
+    def size(self) -> int:
+        return len(self.contents)
+
+    def add(self, contents: Sequence[str], vectors: np.ndarray, created_at: Sequence[str] = ()):
+        count = len(contents)
+        if count == 0:
+            return
+        needed = self.size + count
+        if needed > self.matrix.shape[0]:
+            capacity = self.matrix.shape[0]
+            while capacity < needed:
+                capacity *= 2
+            grown = np.zeros((capacity, self.matrix.shape[1]), dtype=self.dtype)
+            grown[:self.size] = self.matrix[:self.size]
+            self.matrix = grown
+        self.matrix[self.size:needed] = vectors
+        self.contents.extend(contents)
+        if created_at:
+            newest = max(parse_timestamp(ts) for ts in created_at)
+            if self.latest_created_at is None or newest > self.latest_created_at:
+                self.latest_created_at = newest
+
+    def search(self, query: np.ndarray, k: int, threshold: float, exclude: Sequence[str] = ()) -> List[Tuple[str, float]]:
+        self.last_used = time.monotonic()
+        if self.size == 0:
+            return []
+
+        scores = (self.matrix[:self.size] @ query.astype(self.dtype)).astype(np.float32)
+        # Rank only the candidates above the threshold; excluded and duplicate
+        # lines are skipped while walking them best-first
+        candidates = np.flatnonzero(scores >= threshold)
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        excluded = set(exclude)
+        results: List[Tuple[str, float]] = []
+        for i in ranked:
+            score = float(scores[i])
+            content = self.contents[i]
+            if content in excluded:
+                continue
+            excluded.add(content)
+            results.append((content, score))
+            if len(results) == k:
+                break
+        return results
+
+class VectorIndexRegistry:
+    """
+    Per-simulation in-process vector indexes.
+    - Loaded lazily in the background on first use (callers fall back to
+      the match_memories RPC until then).
+    - Updated incrementally as memories are stored.
+    - Evicted when idle or when too many simulations are resident.
+    """
+
+    PAGE_SIZE = 1000
+
+    def __init__(self):
+        self._indexes: "OrderedDict[str, SimulationVectorIndex]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._buffered: Dict[str, List[Tuple[List[str], np.ndarray, List[str]]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, simulation_id: str) -> Optional[SimulationVectorIndex]:
+        self.evict_idle()
+        index = self._indexes.get(simulation_id)
+        if index is None:
+            self.misses += 1
+            return None
+        self._indexes.move_to_end(simulation_id)
+        self.hits += 1
+        return index
+
+    def schedule_load(self, simulation_id: str):
+        if simulation_id in self._indexes or simulation_id in self._loading:
+            return
+        self._buffered[simulation_id] = []
+        self._loading[simulation_id] = asyncio.create_task(self._load(simulation_id))
+
+    def add(self, simulation_id: str, contents: List[str], vectors: np.ndarray, created_at: List[str]):
+        """
+        Incremental update after an insert (no-op unless the index is resident or loading).
+        """
+        index = self._indexes.get(simulation_id)
+        if index is not None:
+            index.add(contents, vectors, created_at)
+        elif simulation_id in self._buffered:
+            self._buffered[simulation_id].append((contents, vectors, created_at))
+
+    def evict(self, simulation_id: str):
+        """Drops a simulation's index (e.g. after its memories were deleted)."""
+        if self._indexes.pop(simulation_id, None) is not None:
+            self.evictions += 1
+        task = self._loading.pop(simulation_id, None)
+        if task is not None:
+            task.cancel()
+        self._buffered.pop(simulation_id, None)
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - settings.VECTOR_INDEX_IDLE_SECONDS
+        for simulation_id in [sid for sid, index in self._indexes.items() if index.last_used < cutoff]:
+            del self._indexes[simulation_id]
+            self.evictions += 1
+        while len(self._indexes) > settings.VECTOR_INDEX_MAX_SIMULATIONS:
+            self._indexes.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "resident": len(self._indexes),
+            "loading": len(self._loading),
+            "vectors": sum(index.size for index in self._indexes.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "evictions": self.evictions
+        }
+
+    async def _load(self, simulation_id: str):
+        try:
+            index = SimulationVectorIndex(dtype=settings.VECTOR_INDEX_DTYPE)
+            client = await supabase_service.get_client()
+            offset = 0
+            while True:
+                page = await client.table("memories")\
+                    .select("content, embedding, created_at")\
+                    .eq("simulation_id", simulation_id)\
+                    .not_.is_("embedding", "null")\
+                    .eq("embedding_version", local_embedder.version)\
+                    .order("created_at")\
+                    .range(offset, offset + self.PAGE_SIZE - 1)\
+                    .execute()
+                rows = page.data or []
+                if rows:
+                    index.add(
+                        [row['content'] for row in rows],
+                        np.stack([parse_pgvector(row['embedding']) for row in rows]),
+                        [row['created_at'] for row in rows]
+                    )
+                if len(rows) < self.PAGE_SIZE:
+                    break
+                offset += self.PAGE_SIZE
+
+            # Rows stored while the fetch was running (write-behind is FIFO, so
+            # anything newer than the newest fetched row was not fetched)
+            for contents, vectors, created_at in self._buffered.get(simulation_id, []):
+                keep = [
+                    i for i, ts in enumerate(created_at)
+                    if index.latest_created_at is None or parse_timestamp(ts) > index.latest_created_at
+                ]
+                if keep:
+                    index.add([contents[i] for i in keep], vectors[keep], [created_at[i] for i in keep])
+
+            self._indexes[simulation_id] = index
+            self.loads += 1
+            self.evict_idle()
+        except Exception as e:
+            print(f"[VECTOR INDEX WARNING] Load failed for {simulation_id}: {str(e)}")
+        finally:
+            # An evict() + reschedule may already have replaced this task
+            if self._loading.get(simulation_id) is asyncio.current_task():
+                del self._loading[simulation_id]
+                self._buffered.pop(simulation_id, None)
+
+# Singleton instance
+vector_index_registry = VectorIndexRegistry()
@@ -1,79 +1,53 @@
-import json
-import re
+import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from pydantic import TypeAdapter
+from backend.app.core.config import settings
+from backend.app.core.deadline import Deadline, within_deadline
+from backend.app.core.llm_json import extract_json
+from backend.app.models.domain import TimeSkipNarrative
 from backend.app.services.openrouter import openrouter_service
+from backend.app.services.schedule import schedule_for
+
+TIME_SKIP_ADAPTER = TypeAdapter(TimeSkipNarrative)
 
 class WorldService:
+    # Gap (in hours) after which a chat turn opens with a time-skip narrative
+    TIME_SKIP_HOURS = 4
+
+    def __init__(self):
+        self.pregenerated_hits = 0
+        self.live_generations = 0
+
     def get_schedule_state(self, current_time: datetime, persona: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Determines what the Persona is doing right now based on a standard routine.
+        Determines what the Persona is doing right now from their compiled
+        weekly schedule (services/schedule.py; the default routine for
+        personas created before schedules were compiled).
         This provides context for the Director (e.g., don't text a lot while sleeping).
         """
-        hour = current_time.hour
-        weekday = current_time.weekday() # 0=Monday, 6=Sunday
-        
-        # Default Routine (Can be customized per persona later)
-        activity = "Existing"
-        is_busy = False
-        location = "Unknown"
-        
-        # Weekend Logic
-        if weekday >= 5:
-            if 0 <= hour < 9:
-                activity = "Sleeping"
-                is_busy = True
-                location = "Home - Bed"
-            elif 9 <= hour < 12:
-                activity = "Lazy Morning"
-                is_busy = False
-                location = "Home"
-            elif 12 <= hour < 18:
-                activity = "Socializing / Out"
-                is_busy = False
-                location = "City"
-            else:
-                activity = "Relaxing"
-                is_busy = False
-                location = "Home"
-        
-        # Weekday Logic
-        else:
-            if 0 <= hour < 7:
-                activity = "Sleeping"
-                is_busy = True
-                location = "Home - Bed"
-            elif 7 <= hour < 9:
-                activity = "Commuting / Getting Ready"
-                is_busy = True
-                location = "Transit"
-            elif 9 <= hour < 17:
-                activity = "Working"
-                is_busy = True # Persona replies might be shorter/slower
-                location = "Office / School"
-            elif 17 <= hour < 19:
-                activity = "Gym / Errands"
-                is_busy = True
-                location = "Gym / Shop"
-            else:
-                activity = "Free Time"
-                is_busy = False
-                location = "Home"
+        return schedule_for(persona).state_at(current_time)
 
-        return {
-            "activity": activity,
-            "is_busy": is_busy,
-            "location": location
-        }
+    def activities_between(self, start: datetime, end: datetime, persona: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        What the Persona did between two moments ({"activity", "location", "hours"}).
+        """
+        return schedule_for(persona).activities_between(start, end)
 
-    def calculate_time_skip(
+    async def calculate_time_skip(
         self, 
         last_interaction_time: datetime, 
         current_time: datetime, 
-        persona: Dict[str, Any]
+        persona: Dict[str, Any],
+        pending_time_skip: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Calculates time elapsed. If > 4 hours, generates narrative bridge.
+        A narrative pre-generated for this gap and return window
+        (pending_time_skip, see services/pregen.py) is used without an LLM call.
+        With a deadline, the narrator gets DEADLINE_TIME_SKIP_FRACTION of the
+        remaining budget and falls back to a template narrative after that.
         """
         
         # Fix timezone mismatch: make both naive by stripping timezone info
@@ -85,14 +59,65 @@ class WorldService:
         delta = current_time - last_interaction_time
         hours_elapsed = delta.total_seconds() / 3600
         
-        if hours_elapsed < 4:
+        if hours_elapsed < self.TIME_SKIP_HOURS:
             # Even if no narrative skip, we return current schedule state
             return None
 
+        if self.pending_matches(pending_time_skip, last_interaction_time, current_time):
+            self.pregenerated_hits += 1
+            return {
+                "narrative_text": pending_time_skip['narrative_text'],
+                "new_status": pending_time_skip.get('new_status')
+            }
+
+        self.live_generations += 1
+        return await self.generate_time_skip_narrative(persona, hours_elapsed, current_time, deadline, since=last_interaction_time)
+
+    def pending_matches(
+        self,
+        pending_time_skip: Optional[Dict[str, Any]],
+        last_interaction_time: datetime,
+        current_time: datetime
+    ) -> bool:
+        """
+        True if a pre-generated narrative was written for this gap and the
+        user came back inside its return window.
+        """
+        if not pending_time_skip or not pending_time_skip.get('narrative_text'):
+            return False
+        try:
+            written_for = datetime.fromisoformat(pending_time_skip['last_interaction_at'].replace('Z', '+00:00'))
+            valid_from = datetime.fromisoformat(pending_time_skip['valid_from'])
+            valid_until = datetime.fromisoformat(pending_time_skip['valid_until'])
+        except (KeyError, TypeError, ValueError):
+            return False
+        return written_for.replace(tzinfo=None) == last_interaction_time and valid_from <= current_time <= valid_until
+
+    async def generate_time_skip_narrative(
+        self,
+        persona: Dict[str, Any],
+        hours_elapsed: float,
+        current_time: datetime,
+        deadline: Optional[Deadline] = None,
+        since: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Asks the narrator for the bridge narrative ({"narrative_text", "new_status"}).
+        With `since` (the last interaction), the activities the Persona went
+        through in between are read off the schedule and given as context.
+        """
         time_str = current_time.strftime("%A %I:%M %p")
         
         # Get the new logical state to inform the narrator
         schedule = self.get_schedule_state(current_time, persona)
+        meantime = ", ".join(
+            f"{entry['activity']} at {entry['location']} ({entry['hours']}h)"
+            for entry in (self.activities_between(since, current_time, persona) if since else [])
+        ) or "Unknown"
+        template = {
+            "narrative_text": f"{int(hours_elapsed)} hours passed. It is now {time_str}. She is {schedule['activity']}.",
+            "new_status": schedule['activity']
+        }
         
         system_prompt = f"""
         You are the World Engine (The System Narrator).
@@ -100,6 +125,7 @@ class WorldService:
         CONTEXT:
         - Persona: {persona.get('name')}
         - Time Elapsed: {int(hours_elapsed)} hours.
+        - In The Meantime: {meantime}
         - Current Time: {time_str}
         - New State: She is likely {schedule['activity']} at {schedule['location']}.
         
@@ -107,6 +133,7 @@ class WorldService:
         1. Generate a "Time Skip Narrative" describing the passage of time.
            - Voice: Objective, slightly poetic, noir, atmospheric.
            - Mention the new context (e.g. "The work day has begun").
+           - You may touch on what filled the gap, in passing.
            
         OUTPUT JSON ONLY:
         {{
@@ -115,15 +142,24 @@ class WorldService:
         }}
         """
         
-        raw_response = openrouter_service.generate_text(system_prompt, temperature=0.7)
-        clean_json = re.sub(r"```json|```", "", raw_response).strip()
-        
         try:
-            return json.loads(clean_json)
-        except (json.JSONDecodeError, ValueError):
-            return {
-                "narrative_text": f"{int(hours_elapsed)} hours passed. It is now {time_str}. She is {schedule['activity']}.",
-                "new_status": schedule['activity']
-            }
+            raw_response = await within_deadline(
+                deadline,
+                openrouter_service.agenerate_text(system_prompt, temperature=0.7),
+                settings.DEADLINE_TIME_SKIP_FRACTION,
+                "time_skip"
+            )
+        except asyncio.TimeoutError:
+            return template
+        narrative = extract_json(raw_response, TIME_SKIP_ADAPTER)
+        if narrative is None:
+            return template
+        return narrative.model_dump()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pregenerated_hits": self.pregenerated_hits,
+            "live_generations": self.live_generations
+        }
 
 world_service = WorldService()
@@ -1,4 +1,4 @@
--- Run this in the Supabase SQL Editor
+-- Run this in the Supabase SQL Editor (or apply backend/migrations with: python -m backend.migrate)
 
 -- Enable Vector Extension for embeddings
 create extension if not exists vector;
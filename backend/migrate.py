@@ -0,0 +1,126 @@
+"""
+Migration runner for backend/migrations.
+
+Applies the numbered *.sql files in order against a Postgres database
+(the Supabase "Connection string" under Project Settings -> Database)
+and records each applied version in a schema_migrations table.
+
+Usage:
+    python -m backend.migrate                # apply pending migrations
+    python -m backend.migrate status         # list applied / pending
+    python -m backend.migrate up --dry-run   # show what would run
+    python -m backend.migrate up --to 006    # stop after a version
+
+The connection string comes from --database-url or DATABASE_URL
+(a .env file is read too). Requires psycopg 3.
+"""
+import argparse
+import os
+import re
+import sys
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+from dotenv import load_dotenv
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+MIGRATION_RE = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+CREATE_TRACKING_TABLE = """
+create table if not exists schema_migrations (
+  version text primary key,
+  name text not null,
+  applied_at timestamp with time zone default timezone('utc'::text, now()) not null
+)
+"""
+
+def discover_migrations(directory: Path = MIGRATIONS_DIR) -> List[Tuple[str, str, Path]]:
+    """Returns (version, name, path) for every migration file, ordered by version."""
+    migrations = []
+    for path in directory.glob("*.sql"):
+        match = MIGRATION_RE.match(path.name)
+        if match:
+            migrations.append((match.group(1), match.group(2), path))
+    migrations.sort(key=lambda m: int(m[0]))
+
+    versions = [version for version, _, _ in migrations]
+    duplicates = {v for v in versions if versions.count(v) > 1}
+    if duplicates:
+        raise SystemExit(f"Duplicate migration versions: {', '.join(sorted(duplicates))}")
+    return migrations
+
+def connect(database_url: str):
+    try:
+        import psycopg
+    except ImportError:
+        raise SystemExit("The migration runner needs psycopg 3: pip install 'psycopg[binary]'")
+    return psycopg.connect(database_url)
+
+def applied_versions(conn) -> Set[str]:
+    with conn.cursor() as cur:
+        cur.execute(CREATE_TRACKING_TABLE)
+        cur.execute("select version from schema_migrations")
+        rows = cur.fetchall()
+    conn.commit()
+    return {row[0] for row in rows}
+
+def apply_migration(conn, version: str, name: str, path: Path):
+    """Runs one migration file and records it, in a single transaction."""
+    sql = path.read_text(encoding="utf-8")
+    with conn.transaction():
+        with conn.cursor() as cur:
+            cur.execute(sql)
+            cur.execute(
+                "insert into schema_migrations (version, name) values (%s, %s)",
+                (version, name)
+            )
+
+def cmd_status(conn, migrations):
+    applied = applied_versions(conn)
+    for version, name, _ in migrations:
+        state = "applied" if version in applied else "pending"
+        print(f"{version}  {state:<8} {name}")
+
+def cmd_up(conn, migrations, dry_run: bool, target: Optional[str]):
+    applied = applied_versions(conn)
+    pending = [m for m in migrations if m[0] not in applied]
+    if target is not None:
+        pending = [m for m in pending if int(m[0]) <= int(target)]
+
+    if not pending:
+        print("Database is up to date.")
+        return
+
+    for version, name, path in pending:
+        if dry_run:
+            print(f"Would apply {path.name}")
+            continue
+        print(f"Applying {path.name}...")
+        try:
+            apply_migration(conn, version, name, path)
+        except Exception as e:
+            print(f"[MIGRATION ERROR] {path.name} failed, rolled back: {str(e)}")
+            sys.exit(1)
+    if not dry_run:
+        print(f"Applied {len(pending)} migration(s).")
+
+def main(argv: Optional[List[str]] = None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog="python -m backend.migrate", description="Apply SQL migrations in backend/migrations.")
+    parser.add_argument("command", nargs="?", default="up", choices=["up", "status"])
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"), help="Postgres connection string (default: $DATABASE_URL)")
+    parser.add_argument("--dry-run", action="store_true", help="List pending migrations without running them")
+    parser.add_argument("--to", dest="target", help="Apply migrations up to and including this version")
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error("no database URL: pass --database-url or set DATABASE_URL")
+
+    migrations = discover_migrations()
+    with connect(args.database_url) as conn:
+        if args.command == "status":
+            cmd_status(conn, migrations)
+        else:
+            cmd_up(conn, migrations, args.dry_run, args.target)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+-- Migration: Let load_chat_context skip cached rows
+-- Run this in the Supabase SQL Editor
+--
+-- The API caches simulation and persona rows in-process. When both are
+-- cached it calls load_chat_context with p_include_static = false and
+-- only the mutable parts (fluid state, history, memories) are returned.
+
+drop function if exists load_chat_context(uuid, int, int);
+
+create or replace function load_chat_context (
+  p_simulation_id uuid,
+  p_history_limit int default 10,
+  p_core_limit int default 3,
+  p_include_static boolean default true
+)
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'simulation', case when p_include_static then (
+      select to_jsonb(s) from simulations s
+      where s.id = p_simulation_id
+    ) end,
+    'persona', case when p_include_static then (
+      select to_jsonb(p) from persona_core p
+      where p.simulation_id = p_simulation_id
+      limit 1
+    ) end,
+    'fluid_state', (
+      select to_jsonb(f) from fluid_states f
+      where f.simulation_id = p_simulation_id
+      limit 1
+    ),
+    'last_interaction_at', (
+      select max(m.created_at) from memories m
+      where m.simulation_id = p_simulation_id
+    ),
+    -- Oldest first, like the chat transcript
+    'history', coalesce((
+      select jsonb_agg(h.content order by h.created_at)
+      from (
+        select content, created_at from memories
+        where simulation_id = p_simulation_id
+          and memory_type in ('CHAT_HISTORY', 'NARRATIVE')
+        order by created_at desc
+        limit p_history_limit
+      ) h
+    ), '[]'::jsonb),
+    'core_memories', coalesce((
+      select jsonb_agg(c.content)
+      from (
+        select content from memories
+        where simulation_id = p_simulation_id
+          and memory_type = 'CORE'
+        limit p_core_limit
+      ) c
+    ), '[]'::jsonb)
+  );
+$$;
@@ -0,0 +1,18 @@
+-- Migration: Index for the paginated /simulations/list query
+-- Run this in the Supabase SQL Editor
+--
+-- Keyset pagination orders by (created_at desc, id desc), optionally
+-- filtered by status. The embedded persona_core / fluid_states lookups
+-- join on simulation_id.
+
+create index if not exists simulations_created_at_id_idx
+  on simulations (created_at desc, id desc);
+
+create index if not exists simulations_status_created_at_id_idx
+  on simulations (status, created_at desc, id desc);
+
+create index if not exists persona_core_simulation_id_idx
+  on persona_core (simulation_id);
+
+create index if not exists fluid_states_simulation_id_idx
+  on fluid_states (simulation_id);
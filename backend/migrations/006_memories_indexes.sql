@@ -0,0 +1,67 @@
+-- Migration: Indexes for the memories table + index-friendly match_memories
+-- Run with: python -m backend.migrate
+--
+-- On a large live table consider creating the indexes by hand with
+-- CREATE INDEX CONCURRENTLY first (not allowed inside a transaction);
+-- the IF NOT EXISTS guards then make this migration a no-op for them.
+
+-- Chat history / context reads:
+--   where simulation_id = ? and memory_type in (...) order by created_at desc
+create index if not exists memories_sim_type_created_idx
+  on memories (simulation_id, memory_type, created_at desc);
+
+-- Last-interaction lookups and per-simulation scans
+create index if not exists memories_sim_created_idx
+  on memories (simulation_id, created_at desc);
+
+-- Approximate nearest neighbour search on 768-dim embeddings (cosine).
+-- m = 16 / ef_construction = 64 are pgvector's recommended defaults for
+-- this dimensionality; raise ef_search per query for better recall.
+create index if not exists memories_embedding_hnsw_idx
+  on memories using hnsw (embedding vector_cosine_ops)
+  with (m = 16, ef_construction = 64);
+
+-- The original function filtered on the computed similarity, which
+-- forces a full scan. Order by distance instead so the HNSW index can
+-- drive the search, then apply the threshold to the candidates.
+create or replace function match_memories (
+  query_embedding vector(768),
+  match_threshold float,
+  match_count int,
+  p_simulation_id uuid
+)
+returns table (
+  id uuid,
+  content text,
+  similarity float
+)
+language plpgsql
+stable
+as $$
+begin
+  -- pgvector >= 0.8: keep walking the graph until enough rows pass the
+  -- simulation_id filter. Older versions reject the setting; ignore that.
+  begin
+    perform set_config('hnsw.iterative_scan', 'relaxed_order', true);
+    perform set_config('hnsw.ef_search', '100', true);
+  exception when others then
+    null;
+  end;
+
+  return query
+  select candidates.id, candidates.content, 1 - candidates.distance as similarity
+  from (
+    select
+      memories.id,
+      memories.content,
+      memories.embedding <=> query_embedding as distance
+    from memories
+    where memories.simulation_id = p_simulation_id
+      and memories.embedding is not null
+    order by memories.embedding <=> query_embedding
+    limit match_count
+  ) candidates
+  where 1 - candidates.distance > match_threshold
+  order by candidates.distance;
+end;
+$$;
@@ -0,0 +1,106 @@
+-- Migration: Rolling conversation summaries + memories archive
+-- Run with: python -m backend.migrate
+--
+-- Every few turns the API folds chat rows older than the recent tail into
+-- one running SUMMARY memory. compact_memories swaps in the new summary and
+-- moves the folded rows (and the previous summary) to memories_archive in a
+-- single transaction, so per-simulation row counts stay roughly constant.
+
+create table if not exists memories_archive (
+  id uuid primary key,
+  simulation_id uuid references simulations(id) not null,
+  content text not null,
+  memory_type text not null,
+  embedding vector(768),
+  created_at timestamp with time zone not null,
+  archived_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+create index if not exists memories_archive_sim_created_idx
+  on memories_archive (simulation_id, created_at);
+
+create or replace function compact_memories (
+  p_simulation_id uuid,
+  p_summary text,
+  p_archive_ids uuid[]
+)
+returns void
+language sql
+as $$
+  with moved as (
+    delete from memories
+    where simulation_id = p_simulation_id
+      and (id = any(p_archive_ids) or memory_type = 'SUMMARY')
+    returning id, simulation_id, content, memory_type, embedding, created_at
+  )
+  insert into memories_archive (id, simulation_id, content, memory_type, embedding, created_at)
+  select id, simulation_id, content, memory_type, embedding, created_at from moved
+  on conflict (id) do nothing;
+
+  insert into memories (simulation_id, content, memory_type)
+  values (p_simulation_id, p_summary, 'SUMMARY');
+$$;
+
+create or replace function load_chat_context (
+  p_simulation_id uuid,
+  p_history_limit int default 10,
+  p_core_limit int default 3,
+  p_include_static boolean default true
+)
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'simulation', case when p_include_static then (
+      select to_jsonb(s) from simulations s
+      where s.id = p_simulation_id
+    ) end,
+    'persona', case when p_include_static then (
+      select to_jsonb(p) from persona_core p
+      where p.simulation_id = p_simulation_id
+      limit 1
+    ) end,
+    'fluid_state', (
+      select to_jsonb(f) from fluid_states f
+      where f.simulation_id = p_simulation_id
+      limit 1
+    ),
+    'last_interaction_at', (
+      select s.last_interaction_at from simulations s
+      where s.id = p_simulation_id
+    ),
+    'message_count', (
+      select s.message_count from simulations s
+      where s.id = p_simulation_id
+    ),
+    -- Running summary of everything older than the history tail
+    'summary', (
+      select content from memories
+      where simulation_id = p_simulation_id
+        and memory_type = 'SUMMARY'
+      order by created_at desc
+      limit 1
+    ),
+    -- Oldest first, like the chat transcript
+    'history', coalesce((
+      select jsonb_agg(h.content order by h.created_at)
+      from (
+        select content, created_at from memories
+        where simulation_id = p_simulation_id
+          and memory_type in ('CHAT_HISTORY', 'NARRATIVE')
+        order by created_at desc
+        limit p_history_limit
+      ) h
+    ), '[]'::jsonb),
+    'core_memories', coalesce((
+      select jsonb_agg(c.content)
+      from (
+        select content from memories
+        where simulation_id = p_simulation_id
+          and memory_type = 'CORE'
+        limit p_core_limit
+      ) c
+    ), '[]'::jsonb)
+  );
+$$;
@@ -0,0 +1,122 @@
+-- Migration: Pre-generated time-skip narratives
+-- Run with: python -m backend.migrate
+--
+-- A background scheduler writes the bridge narrative for simulations that
+-- are about to cross the 4-hour gap into pending_time_skip, together with
+-- the return window it was written for. The chat path uses it instead of
+-- calling the LLM. Recording new memories clears it (the gap it describes
+-- is gone).
+
+alter table simulations
+add column if not exists pending_time_skip jsonb;
+
+-- Scheduler scan: idle, calibrated, active simulations by last interaction
+create index if not exists simulations_idle_idx
+  on simulations (last_interaction_at)
+  where status = 'ACTIVE' and is_calibrated;
+
+-- Multi-row memory insert + activity update (p_rows: array of memories rows)
+create or replace function record_memories (p_rows jsonb)
+returns void
+language sql
+as $$
+  with inserted as (
+    insert into memories (simulation_id, content, memory_type, embedding, created_at)
+    select
+      r.simulation_id,
+      r.content,
+      r.memory_type,
+      r.embedding::vector,
+      coalesce(r.created_at, timezone('utc'::text, now()))
+    from jsonb_to_recordset(p_rows) as r(
+      simulation_id uuid,
+      content text,
+      memory_type text,
+      embedding text,
+      created_at timestamp with time zone
+    )
+    returning simulation_id, memory_type, created_at
+  )
+  update simulations s
+  set last_interaction_at = greatest(s.last_interaction_at, i.last_at),
+      message_count = s.message_count + i.messages,
+      pending_time_skip = null
+  from (
+    select
+      simulation_id,
+      max(created_at) as last_at,
+      count(*) filter (where memory_type = 'CHAT_HISTORY') as messages
+    from inserted
+    group by simulation_id
+  ) i
+  where s.id = i.simulation_id;
+$$;
+
+create or replace function load_chat_context (
+  p_simulation_id uuid,
+  p_history_limit int default 10,
+  p_core_limit int default 3,
+  p_include_static boolean default true
+)
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'simulation', case when p_include_static then (
+      select to_jsonb(s) from simulations s
+      where s.id = p_simulation_id
+    ) end,
+    'persona', case when p_include_static then (
+      select to_jsonb(p) from persona_core p
+      where p.simulation_id = p_simulation_id
+      limit 1
+    ) end,
+    'fluid_state', (
+      select to_jsonb(f) from fluid_states f
+      where f.simulation_id = p_simulation_id
+      limit 1
+    ),
+    'last_interaction_at', (
+      select s.last_interaction_at from simulations s
+      where s.id = p_simulation_id
+    ),
+    'message_count', (
+      select s.message_count from simulations s
+      where s.id = p_simulation_id
+    ),
+    -- Time-skip narrative pre-generated while the simulation was idle
+    'pending_time_skip', (
+      select s.pending_time_skip from simulations s
+      where s.id = p_simulation_id
+    ),
+    -- Running summary of everything older than the history tail
+    'summary', (
+      select content from memories
+      where simulation_id = p_simulation_id
+        and memory_type = 'SUMMARY'
+      order by created_at desc
+      limit 1
+    ),
+    -- Oldest first, like the chat transcript
+    'history', coalesce((
+      select jsonb_agg(h.content order by h.created_at)
+      from (
+        select content, created_at from memories
+        where simulation_id = p_simulation_id
+          and memory_type in ('CHAT_HISTORY', 'NARRATIVE')
+        order by created_at desc
+        limit p_history_limit
+      ) h
+    ), '[]'::jsonb),
+    'core_memories', coalesce((
+      select jsonb_agg(c.content)
+      from (
+        select content from memories
+        where simulation_id = p_simulation_id
+          and memory_type = 'CORE'
+        limit p_core_limit
+      ) c
+    ), '[]'::jsonb)
+  );
+$$;
@@ -0,0 +1,14 @@
+-- Migration: Per-persona weekly schedule tables
+-- Run with: python -m backend.migrate
+--
+-- Genesis compiles a 168-slot (weekday x hour) routine from the persona's
+-- occupation and hometown (services/schedule.py) and stores it here, so
+-- schedule lookups are a table index instead of a rules walk. Occupation
+-- and hometown were generated but never persisted; they are kept so the
+-- table can be recompiled. Personas without a table fall back to the
+-- default routine.
+
+alter table persona_core
+add column if not exists occupation text,
+add column if not exists hometown text,
+add column if not exists weekly_schedule jsonb;
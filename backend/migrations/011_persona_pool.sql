@@ -0,0 +1,46 @@
+-- Migration: Warm pool of pre-generated personas
+-- Run with: python -m backend.migrate
+--
+-- A background task keeps PERSONA_POOL_PER_BUCKET ready-made personas
+-- (persona JSON + backstory memories with their embeddings) per
+-- detected_archetype x match_strategy bucket (services/persona_pool.py).
+-- Genesis claims one atomically and only writes the opening scenario.
+
+create table if not exists persona_pool (
+  id uuid default gen_random_uuid() primary key,
+  archetype text not null,
+  match_strategy text not null,
+  persona jsonb not null,
+  memories jsonb not null default '[]'::jsonb, -- [{"content", "embedding"}]
+  created_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+create index if not exists persona_pool_bucket_idx
+  on persona_pool (archetype, match_strategy, created_at);
+
+-- Takes the oldest persona in a bucket; concurrent claims skip rows
+-- another transaction holds, so each persona goes to exactly one caller
+create or replace function claim_pooled_persona (p_archetype text, p_match_strategy text)
+returns setof persona_pool
+language sql
+as $$
+  delete from persona_pool
+  where id = (
+    select id from persona_pool
+    where archetype = p_archetype and match_strategy = p_match_strategy
+    order by created_at
+    for update skip locked
+    limit 1
+  )
+  returning *;
+$$;
+
+create or replace function persona_pool_levels ()
+returns table (archetype text, match_strategy text, ready bigint)
+language sql
+stable
+as $$
+  select archetype, match_strategy, count(*)
+  from persona_pool
+  group by archetype, match_strategy;
+$$;
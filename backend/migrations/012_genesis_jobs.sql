@@ -0,0 +1,64 @@
+-- Migration: Asynchronous genesis jobs
+-- Run with: python -m backend.migrate
+--
+-- Genesis runs off the request path in an in-process job queue
+-- (services/genesis_queue.py). One job per simulation: enqueue_genesis
+-- returns the existing job instead of starting a duplicate, and only
+-- requeues one that failed or whose worker stopped heartbeating.
+-- stages lists the genesis steps completed so far, for status polling.
+
+create table if not exists genesis_jobs (
+  id uuid default gen_random_uuid() primary key,
+  simulation_id uuid references simulations(id) not null unique,
+  status text not null default 'PENDING', -- PENDING, RUNNING, DONE, FAILED
+  stages jsonb not null default '[]'::jsonb,
+  result jsonb, -- {"persona_name", "opening_scenario"} once DONE
+  error text,
+  attempts int not null default 0,
+  created_at timestamp with time zone default timezone('utc'::text, now()) not null,
+  updated_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+create index if not exists genesis_jobs_open_idx
+  on genesis_jobs (updated_at)
+  where status in ('PENDING', 'RUNNING');
+
+-- Returns the job row plus "queued": true when this call (re)queued it
+create or replace function enqueue_genesis (p_simulation_id uuid, p_stale_seconds float default 300)
+returns jsonb
+language plpgsql
+as $$
+declare
+  job genesis_jobs;
+begin
+  insert into genesis_jobs (simulation_id)
+  values (p_simulation_id)
+  on conflict (simulation_id) do update
+    set status = 'PENDING',
+        stages = '[]'::jsonb,
+        error = null,
+        updated_at = timezone('utc'::text, now())
+    where genesis_jobs.status = 'FAILED'
+       or (genesis_jobs.status in ('PENDING', 'RUNNING')
+           and genesis_jobs.updated_at < timezone('utc'::text, now()) - make_interval(secs => p_stale_seconds))
+  returning * into job;
+
+  if found then
+    return to_jsonb(job) || '{"queued": true}'::jsonb;
+  end if;
+
+  select * into job from genesis_jobs where simulation_id = p_simulation_id;
+  return to_jsonb(job) || '{"queued": false}'::jsonb;
+end;
+$$;
+
+-- Appends a completed stage (concurrent genesis nodes finish in any order)
+create or replace function genesis_job_stage (p_job_id uuid, p_stage text)
+returns void
+language sql
+as $$
+  update genesis_jobs
+  set stages = stages || to_jsonb(p_stage),
+      updated_at = timezone('utc'::text, now())
+  where id = p_job_id;
+$$;
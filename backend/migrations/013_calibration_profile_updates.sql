@@ -0,0 +1,53 @@
+-- Migration: Atomic calibration profile updates
+-- Run with: python -m backend.migrate
+--
+-- Scenario answers are analyzed in the background while calibration moves
+-- on, so simulations.user_profile is written from two places at once.
+-- Both writes are jsonb edits in a single UPDATE instead of
+-- read-modify-write of the whole profile, so neither loses the other's.
+
+-- Merges p_patch into user_profile, optionally stores a scenario response
+-- at p_response_index, and sets the calibration columns given.
+-- Returns the new user_profile.
+create or replace function update_user_profile (
+  p_simulation_id uuid,
+  p_patch jsonb default '{}'::jsonb,
+  p_response jsonb default null,
+  p_response_index int default null,
+  p_calibration_step int default null,
+  p_is_calibrated boolean default null
+)
+returns jsonb
+language sql
+as $$
+  update simulations
+  set user_profile = case
+        when p_response is null then coalesce(user_profile, '{}'::jsonb) || p_patch
+        else jsonb_set(
+          coalesce(user_profile, '{}'::jsonb) || p_patch
+            || jsonb_build_object('scenario_responses', coalesce(user_profile -> 'scenario_responses', '[]'::jsonb)),
+          array['scenario_responses', p_response_index::text],
+          p_response,
+          true
+        )
+      end,
+      calibration_step = coalesce(p_calibration_step, calibration_step),
+      is_calibrated = coalesce(p_is_calibrated, is_calibrated)
+  where id = p_simulation_id
+  returning user_profile;
+$$;
+
+-- Stores the trait analysis of one scenario response
+create or replace function set_scenario_analysis (
+  p_simulation_id uuid,
+  p_index int,
+  p_analysis jsonb
+)
+returns void
+language sql
+as $$
+  update simulations
+  set user_profile = jsonb_set(user_profile, array['scenario_responses', p_index::text, 'analysis'], p_analysis, true)
+  where id = p_simulation_id
+    and jsonb_array_length(coalesce(user_profile -> 'scenario_responses', '[]'::jsonb)) > p_index;
+$$;
@@ -0,0 +1,46 @@
+-- Migration: Idempotent genesis retries
+-- Run with: python -m backend.migrate
+--
+-- enqueue_genesis requeues failed and stale jobs, but an interrupted
+-- genesis may already have written persona_core / fluid_states rows or
+-- CORE memories. One persona and one fluid state per simulation is now a
+-- constraint (genesis upserts on it), and reset_genesis clears a
+-- simulation's partial genesis rows before a job runs.
+
+-- Keep the newest row per simulation left behind by earlier retries
+delete from persona_core
+where id not in (
+  select distinct on (simulation_id) id
+  from persona_core
+  order by simulation_id, created_at desc, id
+);
+
+delete from fluid_states
+where id not in (
+  select distinct on (simulation_id) id
+  from fluid_states
+  order by simulation_id, last_updated desc, id
+);
+
+do $$
+begin
+  if not exists (select 1 from pg_constraint where conname = 'persona_core_simulation_id_key') then
+    alter table persona_core add constraint persona_core_simulation_id_key unique (simulation_id);
+  end if;
+  if not exists (select 1 from pg_constraint where conname = 'fluid_states_simulation_id_key') then
+    alter table fluid_states add constraint fluid_states_simulation_id_key unique (simulation_id);
+  end if;
+end;
+$$;
+
+-- Deletes whatever a previous genesis attempt wrote for the simulation
+create or replace function reset_genesis (
+  p_simulation_id uuid
+)
+returns void
+language sql
+as $$
+  delete from memories where simulation_id = p_simulation_id and memory_type = 'CORE';
+  delete from persona_core where simulation_id = p_simulation_id;
+  delete from fluid_states where simulation_id = p_simulation_id;
+$$;
@@ -0,0 +1,110 @@
+-- Migration: Tag memory embeddings with the embedder version
+-- Run with: python -m backend.migrate
+--
+-- Vectors from different embedder versions (the original sha256 scheme,
+-- hash-ngram-proj-v1, hash-ngram-signproj-v2, ...) are not comparable.
+-- Each row now records the version that produced its embedding, and
+-- match_memories only ranks rows of the query's version. Existing rows
+-- are untagged and so excluded until `python -m backend.reembed`
+-- re-embeds them with the current embedder.
+
+alter table memories
+add column if not exists embedding_version text;
+
+-- Multi-row memory insert + activity update (p_rows: array of memories rows)
+create or replace function record_memories (p_rows jsonb)
+returns void
+language sql
+as $$
+  with inserted as (
+    insert into memories (simulation_id, content, memory_type, embedding, embedding_version, created_at)
+    select
+      r.simulation_id,
+      r.content,
+      r.memory_type,
+      r.embedding::vector,
+      r.embedding_version,
+      coalesce(r.created_at, timezone('utc'::text, now()))
+    from jsonb_to_recordset(p_rows) as r(
+      simulation_id uuid,
+      content text,
+      memory_type text,
+      embedding text,
+      embedding_version text,
+      created_at timestamp with time zone
+    )
+    returning simulation_id, memory_type, created_at
+  )
+  update simulations s
+  set last_interaction_at = greatest(s.last_interaction_at, i.last_at),
+      message_count = s.message_count + i.messages,
+      pending_time_skip = null
+  from (
+    select
+      simulation_id,
+      max(created_at) as last_at,
+      count(*) filter (where memory_type = 'CHAT_HISTORY') as messages
+    from inserted
+    group by simulation_id
+  ) i
+  where s.id = i.simulation_id;
+$$;
+
+-- Same search as before, restricted to one embedder version
+drop function if exists match_memories (vector, float, int, uuid);
+
+create or replace function match_memories (
+  query_embedding vector(768),
+  match_threshold float,
+  match_count int,
+  p_simulation_id uuid,
+  p_embedding_version text
+)
+returns table (
+  id uuid,
+  content text,
+  similarity float
+)
+language plpgsql
+stable
+as $$
+begin
+  -- pgvector >= 0.8: keep walking the graph until enough rows pass the
+  -- filters. Older versions reject the setting; ignore that.
+  begin
+    perform set_config('hnsw.iterative_scan', 'relaxed_order', true);
+    perform set_config('hnsw.ef_search', '100', true);
+  exception when others then
+    null;
+  end;
+
+  return query
+  select candidates.id, candidates.content, 1 - candidates.distance as similarity
+  from (
+    select
+      memories.id,
+      memories.content,
+      memories.embedding <=> query_embedding as distance
+    from memories
+    where memories.simulation_id = p_simulation_id
+      and memories.embedding is not null
+      and memories.embedding_version = p_embedding_version
+    order by memories.embedding <=> query_embedding
+    limit match_count
+  ) candidates
+  where 1 - candidates.distance > match_threshold
+  order by candidates.distance;
+end;
+$$;
+
+-- Re-embedding backfill (p_rows: [{id, embedding, embedding_version}])
+create or replace function set_memory_embeddings (p_rows jsonb)
+returns void
+language sql
+as $$
+  update memories m
+  set embedding = r.embedding::vector,
+      embedding_version = r.embedding_version
+  from jsonb_to_recordset(p_rows) as r(id uuid, embedding text, embedding_version text)
+  where m.id = r.id;
+$$;
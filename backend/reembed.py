@@ -0,0 +1,89 @@
+"""
+Re-embeds memories written by an older embedder.
+
+Migration 015 tags every memory with the embedder version that produced
+its vector, and retrieval only compares vectors of the current version,
+so rows from before the tag (or from a previous embedder) are invisible
+to semantic search until they are re-embedded here.
+
+Usage:
+    python -m backend.reembed                 # re-embed every stale row
+    python -m backend.reembed --dry-run       # count stale rows only
+    python -m backend.reembed --batch 200     # rows per update
+
+Reads the same Supabase settings as the app. Safe to re-run: rows are
+picked by version, so finished rows are never touched twice.
+"""
+import argparse
+import asyncio
+from typing import List, Optional
+from backend.app.services.embeddings import local_embedder, to_pgvector
+from backend.app.services.supabase import supabase_service
+
+def stale_filter(version: str) -> str:
+    """PostgREST or-filter for rows not embedded by `version`."""
+    return f"embedding_version.is.null,embedding_version.neq.{version}"
+
+async def count_stale(client, version: str) -> int:
+    response = await client.table("memories")\
+        .select("id", count="exact")\
+        .or_(stale_filter(version))\
+        .limit(1)\
+        .execute()
+    return response.count or 0
+
+async def reembed(batch: int, dry_run: bool) -> int:
+    version = local_embedder.version
+    client = await supabase_service.get_client()
+
+    stale = await count_stale(client, version)
+    print(f"{stale} memories not embedded with {version}.")
+    if dry_run or not stale:
+        return 0
+
+    done = 0
+    previous_ids: Optional[List[str]] = None
+    while True:
+        # Always the first page: updated rows drop out of the filter
+        page = await client.table("memories")\
+            .select("id, content")\
+            .or_(stale_filter(version))\
+            .order("id")\
+            .limit(batch)\
+            .execute()
+        rows = page.data or []
+        if not rows:
+            break
+
+        ids = [row['id'] for row in rows]
+        if ids == previous_ids:
+            print("[REEMBED ERROR] Rows were not updated, stopping.")
+            break
+        previous_ids = ids
+
+        # Rows without words get no vector, but are still tagged so they leave the filter
+        matrix = local_embedder.embed_texts([row['content'] or "" for row in rows])
+        updates = [
+            {"id": row['id'], "embedding": to_pgvector(matrix[i]), "embedding_version": version}
+            for i, row in enumerate(rows)
+        ]
+        await client.rpc("set_memory_embeddings", {"p_rows": updates}).execute()
+        done += len(rows)
+        print(f"Re-embedded {done}/{stale}...")
+
+    print(f"Re-embedded {done} memories.")
+    return done
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m backend.reembed", description="Re-embed memories made by an older embedder.")
+    parser.add_argument("--batch", type=int, default=500, help="Rows per update (default: 500)")
+    parser.add_argument("--dry-run", action="store_true", help="Count stale rows without changing them")
+    args = parser.parse_args(argv)
+
+    if args.batch < 1:
+        parser.error("--batch must be at least 1")
+
+    asyncio.run(reembed(args.batch, args.dry_run))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Replays chat-history writes that the write-behind queue gave up on.
+
+Failed writes are appended, payload included, to
+WRITE_BEHIND_DEAD_LETTER_PATH (write_behind_dead_letters.jsonl in the
+server's working directory by default). Once the cause is fixed, run
+from the same directory:
+
+    python -m backend.replay                  # replay the default file
+    python -m backend.replay --path other.jsonl
+
+Memory inserts are written again (a write that fails again goes to a new
+dead-letter file); fluid state updates are skipped as stale.
+"""
+import argparse
+import asyncio
+from typing import List, Optional
+from backend.app.services.persistence import write_behind_queue
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m backend.replay", description="Replay dead-lettered write-behind writes.")
+    parser.add_argument("--path", help="Dead-letter file (default: WRITE_BEHIND_DEAD_LETTER_PATH)")
+    args = parser.parse_args(argv)
+
+    replayed = asyncio.run(write_behind_queue.replay_dead_letters(args.path))
+    print(f"Replayed {replayed} write(s); {write_behind_queue.failed} failed again.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+
+# Settings() requires these; the tests never reach OpenRouter or Supabase
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test")
@@ -0,0 +1,64 @@
+from backend.app.services import cache
+from backend.app.services.cache import TTLCache, invalidate_simulation, persona_cache, simulation_cache
+
+class Clock:
+    """Controls time.monotonic() inside the cache module."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def frozen_clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+def test_hit_and_miss_counters():
+    ttl = TTLCache("test", max_entries=4, ttl_seconds=60)
+    assert ttl.get("a") is None
+    ttl.set("a", {"name": "Ilse"})
+    assert ttl.get("a") == {"name": "Ilse"}
+    assert ttl.stats() == {"size": 1, "max_entries": 4, "hits": 1, "misses": 1, "evictions": 0, "hit_rate": 0.5}
+
+def test_entries_expire(monkeypatch):
+    clock = frozen_clock(monkeypatch)
+    ttl = TTLCache("test", max_entries=4, ttl_seconds=60)
+    ttl.set("a", 1)
+    clock.now += 59
+    assert ttl.get("a") == 1
+    clock.now += 2
+    assert ttl.get("a") is None
+    assert ttl.stats()["size"] == 0
+
+def test_setting_again_refreshes_the_ttl(monkeypatch):
+    clock = frozen_clock(monkeypatch)
+    ttl = TTLCache("test", max_entries=4, ttl_seconds=60)
+    ttl.set("a", 1)
+    clock.now += 50
+    ttl.set("a", 2)
+    clock.now += 50
+    assert ttl.get("a") == 2
+
+def test_least_recently_used_is_evicted():
+    ttl = TTLCache("test", max_entries=2, ttl_seconds=60)
+    ttl.set("a", 1)
+    ttl.set("b", 2)
+    ttl.get("a")  # "b" is now the oldest
+    ttl.set("c", 3)
+    assert ttl.get("b") is None
+    assert ttl.get("a") == 1 and ttl.get("c") == 3
+    assert ttl.stats()["evictions"] == 1
+
+def test_invalidate_simulation_drops_persona_and_simulation_rows(monkeypatch):
+    monkeypatch.setattr(persona_cache, "_entries", type(persona_cache._entries)())
+    monkeypatch.setattr(simulation_cache, "_entries", type(simulation_cache._entries)())
+    persona_cache.set("sim-1", {"name": "Ilse"})
+    simulation_cache.set("sim-1", {"status": "ACTIVE"})
+    persona_cache.set("sim-2", {"name": "Ana"})
+
+    invalidate_simulation("sim-1")
+    assert persona_cache.get("sim-1") is None
+    assert simulation_cache.get("sim-1") is None
+    assert persona_cache.get("sim-2") == {"name": "Ana"}
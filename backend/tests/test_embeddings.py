@@ -0,0 +1,51 @@
+import asyncio
+import numpy as np
+import pytest
+from backend.app.services.embeddings import EMBEDDING_DIM, HashingEmbedder, local_embedder, to_pgvector
+from backend.app.services.memory import memory_service
+from backend.app.services.vector_index import parse_pgvector
+
+def cosine(a: str, b: str) -> float:
+    return float(local_embedder.embed_text(a) @ local_embedder.embed_text(b))
+
+def test_vectors_are_unit_length_and_deterministic():
+    vector = local_embedder.embed_text("rain on the tin roof")
+    assert vector.shape == (EMBEDDING_DIM,)
+    assert vector.dtype == np.float32
+    assert np.linalg.norm(vector) == pytest.approx(1.0, abs=1e-5)
+    # A fresh instance builds the same projection
+    assert np.array_equal(HashingEmbedder().embed_text("rain on the tin roof"), vector)
+
+def test_vectors_are_stable_within_a_version():
+    # If this fails the stored vectors changed meaning: bump HashingEmbedder.version
+    assert local_embedder.version == "hash-ngram-signproj-v2"
+    vector = local_embedder.embed_text("rain on the tin roof")
+    assert vector[:4] == pytest.approx([0.088646, -0.02069, -0.016125, 0.030879], abs=1e-5)
+
+def test_batch_matches_single_texts():
+    texts = ["rain on the tin roof", "", "my sister moved to Berlin", "rain"]
+    batch = local_embedder.embed_texts(texts)
+    for row, text in zip(batch, texts):
+        assert np.allclose(row, local_embedder.embed_text(text), atol=1e-6)
+
+def test_shared_words_score_higher_than_unrelated_text():
+    related = cosine("my sister moved to Berlin last year", "I miss my sister in Berlin")
+    unrelated = cosine("my sister moved to Berlin last year", "the soup needs more salt")
+    assert related > unrelated + 0.2
+    assert cosine("Hello", "hello") == pytest.approx(1.0, abs=1e-5)
+
+def test_text_without_words_is_the_zero_vector():
+    for text in ("", "...", "?!", None):
+        assert not local_embedder.embed_texts([text]).any()
+    assert to_pgvector(np.zeros(EMBEDDING_DIM, dtype=np.float32)) is None
+
+def test_pgvector_literal_round_trips():
+    vector = local_embedder.embed_text("rain on the tin roof")
+    literal = to_pgvector(vector)
+    assert literal.startswith("[") and literal.endswith("]")
+    assert np.allclose(parse_pgvector(literal), vector, atol=1e-5)
+
+def test_query_without_words_skips_retrieval():
+    assert memory_service.get_embedding("...") is None
+    # Returns before touching the index or the database
+    assert asyncio.run(memory_service.retrieve_relevant_memories("sim-1", "...")) == []
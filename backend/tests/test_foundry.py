@@ -0,0 +1,47 @@
+import asyncio
+import json
+import pytest
+from backend.app.services import foundry
+from backend.app.services.foundry import PersonaGenerationError, foundry_service
+
+PERSONA = {
+    "name": "Ilse Marr",
+    "age": 31,
+    "occupation": "lighthouse keeper",
+    "appearance": "Wind-burnt, cropped grey hair",
+    "voice_texture": "Slow, clipped sentences",
+    "core_wound": "Left behind at a ferry terminal",
+    "defense_mechanism": "Dry humour",
+    "attachment_style": "Fearful-Avoidant"
+}
+
+def replies(monkeypatch, *texts):
+    """Makes agenerate_text return `texts` in order; returns the prompts it got."""
+    prompts = []
+    queue = list(texts)
+
+    async def agenerate_text(prompt, temperature=0.7, max_tokens=1024):
+        prompts.append(prompt)
+        return queue.pop(0)
+
+    monkeypatch.setattr(foundry.openrouter_service, "agenerate_text", agenerate_text)
+    return prompts
+
+def test_persona_from_prose_wrapped_json(monkeypatch):
+    replies(monkeypatch, "Here you go:\n```json\n" + json.dumps(PERSONA) + "\n```")
+    persona = asyncio.run(foundry_service.generate_dynamic_persona({}))
+    assert persona["name"] == "Ilse Marr"
+    assert persona["occupation"] == "lighthouse keeper"
+    assert persona["values_matrix"] == {"silence": 5, "money": 5, "loyalty": 5, "independence": 5}
+
+def test_stray_object_is_repaired_once(monkeypatch):
+    prompts = replies(monkeypatch, 'Sure! {"note": "thinking"}', json.dumps(PERSONA))
+    persona = asyncio.run(foundry_service.generate_dynamic_persona({}))
+    assert persona["name"] == "Ilse Marr"
+    assert len(prompts) == 2
+    assert "COULD NOT BE USED" in prompts[1]
+
+def test_unusable_after_repair_raises(monkeypatch):
+    replies(monkeypatch, "{}", "no idea")
+    with pytest.raises(PersonaGenerationError):
+        asyncio.run(foundry_service.generate_dynamic_persona({}))
@@ -0,0 +1,75 @@
+import pytest
+from backend.app.core.config import settings
+from backend.app.services.intent import IntentClassifier
+
+PERSONA = {"name": "Eva", "core_wound": "Used", "values_matrix": {}, "defense_mechanism": "sarcasm"}
+
+@pytest.fixture
+def classifier():
+    return IntentClassifier()
+
+@pytest.mark.parametrize("text", ["kiss me", "Kiss me", "i love you", "you're so cute"])
+def test_heuristic_gates_romantic_advances_at_low_trust(classifier, text):
+    output = classifier.heuristic_director_output(text, PERSONA, trust=10)
+    assert output.strategy == "Hard Reject"
+
+@pytest.mark.parametrize("text", ["kiss me", "Kiss me", "i love you"])
+def test_heuristic_flirts_back_at_high_trust(classifier, text):
+    output = classifier.heuristic_director_output(text, PERSONA, trust=80)
+    assert output.strategy == "Flirt back"
+
+@pytest.mark.parametrize("text", ["I hate you", "you're so stupid", "shut up", "lol you suck"])
+def test_heuristic_pushes_back_on_conflict(classifier, text):
+    output = classifier.heuristic_director_output(text, PERSONA, trust=80)
+    assert output.strategy == "Push back"
+
+def test_function_words_are_not_unknown(classifier):
+    result = classifier.classify("kiss me")
+    assert result.unknown == 0
+    assert result.intent == "romantic"
+
+@pytest.mark.parametrize("text", ["lol", "ok cool", "haha nice 😂", "good morning", "hey"])
+def test_fast_path_takes_pure_small_talk(classifier, text):
+    assert classifier.fast_director_output(text, PERSONA) is not None
+
+@pytest.mark.parametrize("text", [
+    "hey im pregnant", "ok i quit", "sure, kill me", "lol you suck",
+    "ok fine goodbye forever", "no stop", "😭", "ok 😭"
+])
+def test_fast_path_defers_serious_messages(classifier, text):
+    assert classifier.fast_director_output(text, PERSONA) is None
+
+def test_crying_emoji_is_negative(classifier):
+    assert classifier.classify("😭😭").sentiment == "negative"
+
+def test_fast_path_rate_ignores_heuristic_fallbacks(classifier):
+    classifier.fast_director_output("lol", PERSONA)
+    classifier.fast_director_output("tell me about your day", PERSONA)
+    for _ in range(4):
+        classifier.heuristic_director_output("lol", PERSONA, trust=0)
+
+    stats = classifier.stats()
+    assert stats["classified"] == 6
+    assert stats["heuristic_fallbacks"] == 4
+    assert stats["fast_path_rate"] == 0.5
+
+def test_tokenize_normalises_repeats_and_laughter(classifier):
+    assert classifier.tokenize("Heyyyy hahahaha LOOOL") == ["hey", "haha", "lol"]
+    assert classifier.tokenize("okkk, you're cute!") == ["ok", ",", "you're", "cute", "!"]
+
+def test_classify_reports_a_distribution(classifier):
+    result = classifier.classify("haha nice")
+    assert result.intent == "small_talk"
+    assert 0 < result.confidence <= 1
+    assert result.sentiment == "positive"
+    assert result.words == 2
+
+def test_fast_path_defers_long_messages(classifier, monkeypatch):
+    text = "lol ok cool nice haha yeah"
+    monkeypatch.setattr(settings, "INTENT_FAST_PATH_MAX_WORDS", 3)
+    assert classifier.fast_director_output(text, PERSONA) is None
+
+def test_fast_path_can_be_disabled(classifier, monkeypatch):
+    monkeypatch.setattr(settings, "INTENT_FAST_PATH", False)
+    assert classifier.fast_director_output("lol", PERSONA) is None
+    assert classifier.stats()["classified"] == 0
@@ -0,0 +1,79 @@
+from typing import Any, Dict, List
+from pydantic import BaseModel, TypeAdapter
+from backend.app.core.llm_json import JsonStreamExtractor, extract_json
+
+OBJECT = TypeAdapter(Dict[str, Any])
+
+class Verdict(BaseModel):
+    intent: str
+    score: int
+
+VERDICT = TypeAdapter(Verdict)
+
+def stream(text: str, extractor: JsonStreamExtractor, size: int = 3):
+    """Feeds text in `size`-character tokens; returns the first value produced."""
+    for start in range(0, len(text), size):
+        value = extractor.feed(text[start:start + size])
+        if value is not None:
+            return value
+    return None
+
+def test_strict_json_in_a_code_fence():
+    assert extract_json('```json\n{"a": 1, "b": [1, 2]}\n```') == {"a": 1, "b": [1, 2]}
+
+def test_bracketed_prose_before_the_value_is_skipped():
+    text = 'Sure [as requested], here it is {as always}: {"intent": "flirt", "score": 3}'
+    assert extract_json(text, VERDICT) == Verdict(intent="flirt", score=3)
+
+def test_candidate_that_does_not_validate_is_skipped():
+    text = 'Draft: {"intent": "flirt"} Final: {"intent": "tease", "score": 2}'
+    assert extract_json(text, VERDICT) == Verdict(intent="tease", score=2)
+
+def test_brackets_and_commas_inside_strings():
+    assert extract_json('{"line": "a, b} [c", "n": 1,}') == {"line": "a, b} [c", "n": 1}
+
+def test_trailing_commas_are_dropped():
+    assert extract_json('{"items": [1, 2, ], }') == {"items": [1, 2]}
+
+def test_smart_quotes_are_normalised():
+    assert extract_json('{“mood”: “wistful”}') == {"mood": "wistful"}
+
+def test_truncated_value_is_closed():
+    assert extract_json('{"a": 1, "b": "half a sent') == {"a": 1, "b": "half a sent"}
+    assert extract_json('{"a": 1, "b": [1, 2') == {"a": 1, "b": [1, 2]}
+    # A dangling key is dropped rather than guessed
+    assert extract_json('{"a": 1, "unfinished') == {"a": 1}
+    assert extract_json('{"a": 1, "b":') == {"a": 1}
+
+def test_nothing_recoverable_returns_default():
+    assert extract_json("no json here", default="fallback") == "fallback"
+    assert extract_json(None, OBJECT, default={}) == {}
+    assert extract_json("[not, json] {still not}", VERDICT) is None
+
+def test_stream_returns_value_as_soon_as_it_closes():
+    extractor = JsonStreamExtractor(VERDICT)
+    value = stream('Thinking... {"intent": "tease", "score": 2}\nHey you.', extractor)
+    assert value == Verdict(intent="tease", score=2)
+    assert extractor.done
+    for token in ("\nMore", " text"):
+        extractor.feed(token)
+    assert extractor.rest.endswith("\nMore text")
+
+def test_stream_skips_candidates_that_do_not_validate():
+    extractor = JsonStreamExtractor(VERDICT)
+    value = stream('[plan] {"intent": "x"} {"intent": "tease", "score": 2}', extractor)
+    assert value == Verdict(intent="tease", score=2)
+    assert extractor.rejected == 2
+    extractor.feed(" after")
+    assert extractor.rest == " after"
+
+def test_stream_finish_recovers_a_cut_off_value():
+    extractor = JsonStreamExtractor(OBJECT)
+    assert stream('{"reply": "see you tomor', extractor) is None
+    assert extractor.finish() == {"reply": "see you tomor"}
+    assert extractor.finish() is None
+
+def test_stream_without_json():
+    extractor = JsonStreamExtractor(OBJECT)
+    assert stream("just words", extractor) is None
+    assert extractor.finish() is None
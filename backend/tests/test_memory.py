@@ -0,0 +1,65 @@
+import asyncio
+from backend.app.core.config import settings
+from backend.app.services import memory
+from backend.app.services.embeddings import local_embedder
+from backend.app.services.memory import memory_service
+from backend.app.services.persistence import WriteBehindQueue
+from backend.app.services.vector_index import SimulationVectorIndex, vector_index_registry
+
+def test_rows_are_tagged_with_the_embedder_version():
+    rows = memory_service.build_memory_rows("sim-1", ["rain on the tin roof", "..."], "EPISODIC")
+    assert rows[0]["embedding"] is not None
+    assert rows[0]["embedding_version"] == local_embedder.version
+    # No words, no vector: nothing to tag
+    assert rows[1]["embedding"] is None
+    assert rows[1]["embedding_version"] is None
+
+def test_unembedded_rows_have_no_version():
+    rows = memory_service.build_memory_rows("sim-1", ["rain on the tin roof"], "CHAT_HISTORY", embed=False)
+    assert rows[0]["embedding"] is None
+    assert rows[0]["embedding_version"] is None
+
+class FakeClient:
+    """Stands in for the Supabase client; every RPC fails when `fail` is set."""
+
+    def __init__(self, fail: bool):
+        self.fail = fail
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return self
+
+    async def execute(self):
+        if self.fail:
+            raise RuntimeError("simulation is gone")
+
+def resident_index(monkeypatch, simulation_id, fail):
+    client = FakeClient(fail)
+
+    async def get_client():
+        return client
+
+    monkeypatch.setattr(memory.supabase_service, "get_client", get_client)
+    monkeypatch.setattr(settings, "WRITE_BEHIND_RETRY_BACKOFF_SECONDS", 0)
+    index = SimulationVectorIndex()
+    monkeypatch.setitem(vector_index_registry._indexes, simulation_id, index)
+    return index
+
+def test_stored_rows_are_indexed(monkeypatch):
+    index = resident_index(monkeypatch, "sim-ok", fail=False)
+    rows = memory_service.build_memory_rows("sim-ok", ["rain on the tin roof"], "EPISODIC")
+    assert index.size == 0  # nothing is searchable before it is stored
+
+    asyncio.run(memory_service.insert_memory_rows(rows))
+    assert index.contents == ["rain on the tin roof"]
+
+def test_dead_lettered_rows_are_not_indexed(monkeypatch, tmp_path):
+    index = resident_index(monkeypatch, "sim-gone", fail=True)
+    monkeypatch.setattr(settings, "WRITE_BEHIND_DEAD_LETTER_PATH", str(tmp_path / "dead.jsonl"))
+    queue = WriteBehindQueue()
+    rows = memory_service.build_memory_rows("sim-gone", ["rain on the tin roof"], "EPISODIC")
+
+    asyncio.run(queue.enqueue_memories("sim-gone", rows))
+    assert len(queue.dead_letters) == 1
+    assert index.size == 0
@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from backend.app.core.config import settings
+from backend.app.services import oracle
+from backend.app.services.oracle import OracleService
+
+THRESHOLD = settings.ORACLE_BASICS_CONFIDENCE_THRESHOLD
+
+@pytest.mark.parametrize("text, expected", [
+    ("Alex, 28, Male", ("Alex", 28, "Male")),
+    ("sam 31 f", ("Sam", 31, "Female")),
+    ("I'm Jo, 24/nb", ("Jo", 24, "Non-binary")),
+    ("My name is Maria José, 30, female", ("Maria José", 30, "Female")),
+    ("Priya - 22 - she/her", ("Priya", 22, "Female")),
+    ("Jean-Luc O'Neil, 45, trans man", ("Jean-Luc O'Neil", 45, "Trans man")),
+    ("Zoë, 19, non-binary", ("Zoë", 19, "Non-binary")),
+])
+def test_clear_answers_take_the_fast_path(text, expected):
+    basics, confidence = OracleService().parse_user_basics_locally(text)
+    assert (basics["name"], basics["age"], basics["gender"]) == expected
+    assert confidence >= THRESHOLD
+
+@pytest.mark.parametrize("text", [
+    "not telling you, 30, m",
+    "none of your business",
+    "fuck off",
+    "no",
+    "idk 25 f",
+    "secret 33 f",
+])
+def test_non_names_are_not_taken_as_names(text):
+    basics, confidence = OracleService().parse_user_basics_locally(text)
+    assert basics["name"] == "User"  # never "Not Telling", "Secret", ...
+    assert confidence < THRESHOLD
+
+@pytest.mark.parametrize("text", [
+    "Alex",  # no age: a guessed default never skips the LLM
+    "28m",  # no name
+    "alex 28 male i like long walks",  # words that fit no field
+    "why do you want to know",
+])
+def test_incomplete_or_noisy_answers_go_to_the_llm(text):
+    _, confidence = OracleService().parse_user_basics_locally(text)
+    assert confidence < THRESHOLD
+
+def test_missing_fields_get_defaults():
+    basics, _ = OracleService().parse_user_basics_locally("28m")
+    assert basics == {"name": "User", "age": 28, "gender": "Male"}
+    basics, _ = OracleService().parse_user_basics_locally("Alex")
+    assert basics == {"name": "Alex", "age": 25, "gender": "Unknown"}
+
+def test_low_confidence_falls_back_to_the_llm(monkeypatch):
+    prompts = []
+
+    async def agenerate_text(prompt, temperature=0.7, max_tokens=1024):
+        prompts.append(prompt)
+        return 'Sure: {"name": "Alex", "age": 28, "gender": "Male"}'
+
+    monkeypatch.setattr(oracle.openrouter_service, "agenerate_text", agenerate_text)
+    service = OracleService()
+
+    assert asyncio.run(service.parse_user_basics("Alex, 28, Male"))["name"] == "Alex"
+    assert prompts == [] and service.basics_fast_path == 1
+
+    basics = asyncio.run(service.parse_user_basics("call me alex, turning 28 soon, dude"))
+    assert basics == {"name": "Alex", "age": 28, "gender": "Male"}
+    assert len(prompts) == 1 and service.basics_llm == 1
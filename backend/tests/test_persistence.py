@@ -0,0 +1,61 @@
+import asyncio
+import json
+from backend.app.core.config import settings
+from backend.app.services import persistence
+from backend.app.services.persistence import WriteBehindQueue
+
+ROW = {"simulation_id": "sim-1", "content": "rain on the tin roof", "memory_type": "CHAT_HISTORY"}
+
+def failing_writes(monkeypatch, tmp_path, fail=lambda rows: True):
+    """Routes memory inserts through `fail`; returns the rows that were written."""
+    written = []
+
+    async def insert_memory_rows(rows):
+        if fail(rows):
+            raise RuntimeError("simulation is gone")
+        written.extend(rows)
+
+    monkeypatch.setattr(persistence.memory_service, "insert_memory_rows", insert_memory_rows)
+    monkeypatch.setattr(settings, "WRITE_BEHIND_RETRY_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(settings, "WRITE_BEHIND_DEAD_LETTER_PATH", str(tmp_path / "dead.jsonl"))
+    return written
+
+def test_dead_letters_are_saved_with_their_payload(monkeypatch, tmp_path):
+    failing_writes(monkeypatch, tmp_path)
+    queue = WriteBehindQueue()
+
+    asyncio.run(queue.enqueue_memories("sim-1", [ROW]))
+    lines = (tmp_path / "dead.jsonl").read_text(encoding="utf-8").splitlines()
+    record = json.loads(lines[0])
+    assert len(lines) == 1
+    assert record["kind"] == "memories"
+    assert record["payload"] == [ROW]
+    assert record["error"] == "simulation is gone"
+
+def test_one_bad_simulation_does_not_dead_letter_the_batch(monkeypatch, tmp_path):
+    written = failing_writes(monkeypatch, tmp_path, lambda rows: any(r["simulation_id"] == "sim-bad" for r in rows))
+    queue = WriteBehindQueue()
+    bad = dict(ROW, simulation_id="sim-bad")
+    ops = [persistence.WriteOp("sim-1", "memories", [ROW]), persistence.WriteOp("sim-bad", "memories", [bad])]
+
+    asyncio.run(queue._write_batch(ops))
+    assert written == [ROW]
+    assert [op.simulation_id for op in queue.dead_letters] == ["sim-bad"]
+
+def test_replay_writes_dead_letters_again(monkeypatch, tmp_path):
+    outage = {"down": True}
+    written = failing_writes(monkeypatch, tmp_path, lambda rows: outage["down"])
+    queue = WriteBehindQueue()
+
+    async def update_fluid_state(simulation_id, values):
+        raise RuntimeError("simulation is gone")
+
+    monkeypatch.setattr(queue, "_update_fluid_state", update_fluid_state)
+    asyncio.run(queue.enqueue_memories("sim-1", [ROW]))
+    asyncio.run(queue.enqueue_fluid_state("sim-1", {"arousal_level": 3}))
+
+    outage["down"] = False
+    assert asyncio.run(queue.replay_dead_letters()) == 1
+    assert written == [ROW]
+    assert not (tmp_path / "dead.jsonl").exists()
+    assert not (tmp_path / "dead.jsonl.replaying").exists()
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+import pytest
+from backend.app.services.schedule import (
+    DEFAULT_SCHEDULE, HOURS_PER_WEEK, WeeklySchedule, classify_occupation,
+    compile_weekly_schedule, schedule_for
+)
+
+MONDAY = datetime(2024, 1, 1)
+
+def legacy_state(weekday: int, hour: int):
+    """The fixed routine WorldEngine.get_schedule_state used before compiled schedules."""
+    if weekday >= 5:
+        if hour < 9:
+            return ("Sleeping", True, "Home - Bed")
+        if hour < 12:
+            return ("Lazy Morning", False, "Home")
+        if hour < 18:
+            return ("Socializing / Out", False, "City")
+        return ("Relaxing", False, "Home")
+    if hour < 7:
+        return ("Sleeping", True, "Home - Bed")
+    if hour < 9:
+        return ("Commuting / Getting Ready", True, "Transit")
+    if hour < 17:
+        return ("Working", True, "Office / School")
+    if hour < 19:
+        return ("Gym / Errands", True, "Gym / Shop")
+    return ("Free Time", False, "Home")
+
+@pytest.mark.parametrize("slot", range(HOURS_PER_WEEK))
+def test_default_schedule_matches_the_legacy_routine(slot):
+    moment = MONDAY + timedelta(hours=slot)
+    state = DEFAULT_SCHEDULE.state_at(moment)
+    assert (state["activity"], state["is_busy"], state["location"]) == legacy_state(moment.weekday(), moment.hour)
+
+def test_occupations_pick_an_archetype():
+    assert classify_occupation("Night-shift nurse") == "night"
+    assert classify_occupation("PhD student") == "student"
+    assert classify_occupation("Sourdough baker") == "early"
+    assert classify_occupation("Tattoo artist") == "creative"
+    assert classify_occupation("Barista") == "service"
+    assert classify_occupation("Actuary") == "office"
+
+def test_compiled_schedule_is_deterministic_and_complete():
+    persona = {"name": "Ilse Marr", "occupation": "Bartender", "hometown": "Lisbon, Portugal"}
+    table = compile_weekly_schedule(persona)
+    assert table == compile_weekly_schedule(dict(persona))
+    assert len(table["slots"]) == HOURS_PER_WEEK
+    assert all(0 <= slot < len(table["activities"]) for slot in table["slots"])
+    assert ["Socializing / Out", False, "Lisbon"] in table["activities"]
+
+def test_night_shift_runs_past_midnight():
+    schedule = WeeklySchedule(compile_weekly_schedule({"name": "Ilse", "occupation": "Bartender"}))
+    # Works Wednesday evening; the shift ends in Thursday's early hours
+    wednesday = MONDAY + timedelta(days=2)
+    assert schedule.state_at(wednesday.replace(hour=21))["is_busy"]
+    assert "Working" == schedule.state_at(wednesday + timedelta(hours=24))["activity"]
+    assert "Sleeping" == schedule.state_at(wednesday + timedelta(hours=24 + 6))["activity"]
+
+def test_activities_between_counts_hours():
+    activities = DEFAULT_SCHEDULE.activities_between(MONDAY.replace(hour=6), MONDAY.replace(hour=18))
+    assert activities == [
+        {"activity": "Sleeping", "location": "Home - Bed", "hours": 1},
+        {"activity": "Commuting / Getting Ready", "location": "Transit", "hours": 2},
+        {"activity": "Working", "location": "Office / School", "hours": 8},
+        {"activity": "Gym / Errands", "location": "Gym / Shop", "hours": 1},
+    ]
+    assert DEFAULT_SCHEDULE.activities_between(MONDAY, MONDAY) == []
+    # A span longer than a week wraps around
+    week = DEFAULT_SCHEDULE.activities_between(MONDAY, MONDAY + timedelta(weeks=2))
+    assert sum(item["hours"] for item in week) == 2 * HOURS_PER_WEEK
+
+def test_invalid_stored_table_falls_back_to_the_default():
+    assert schedule_for(None) is DEFAULT_SCHEDULE
+    assert schedule_for({"weekly_schedule": {"activities": [], "slots": [0, 1]}}) is DEFAULT_SCHEDULE
+    assert schedule_for({"weekly_schedule": {"slots": []}}) is DEFAULT_SCHEDULE
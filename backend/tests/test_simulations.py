@@ -0,0 +1,28 @@
+import base64
+import pytest
+from fastapi import HTTPException
+from backend.app.routers.simulations import decode_cursor, encode_cursor
+
+SIM_ID = "6f1c2a4e-8d3b-4c7a-9e51-2b0d4f6a8c13"
+
+def cursor_of(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def test_cursor_round_trips():
+    cursor = encode_cursor({"created_at": "2024-03-05T10:20:30.123456+00:00", "id": SIM_ID})
+    assert decode_cursor(cursor) == ("2024-03-05T10:20:30.123456+00:00", SIM_ID)
+
+@pytest.mark.parametrize("cursor", [
+    # PostgREST filter syntax smuggled into either field
+    cursor_of(f"2024-03-05T10:20:30+00:00),id.neq.null,or(id.eq.{SIM_ID}|{SIM_ID}"),
+    cursor_of(f"2024-03-05T10:20:30+00:00|{SIM_ID}),status.eq.ACTIVE"),
+    cursor_of("2024-03-05T10:20:30+00:00|not-a-uuid"),
+    cursor_of(f"yesterday|{SIM_ID}"),
+    cursor_of("no separator"),
+    "%%% not base64 %%%",
+    base64.urlsafe_b64encode(b"\xff\xfe|\x00").decode(),
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
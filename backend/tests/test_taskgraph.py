@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from backend.app.core.taskgraph import TaskGraph
+
+def test_independent_nodes_run_concurrently():
+    async def scenario():
+        started = []
+        release = asyncio.Event()
+
+        def node(name):
+            async def fn(**deps):
+                started.append(name)
+                if len(started) == 2:
+                    release.set()
+                await release.wait()  # deadlocks unless both run at once
+                return name
+            return fn
+
+        graph = TaskGraph("test").add("a", node("a")).add("b", node("b")).start()
+        return await asyncio.wait_for(graph.wait("a", "b"), timeout=1)
+
+    assert asyncio.run(scenario()) == {"a": "a", "b": "b"}
+
+def test_dependents_get_their_dependencies_results():
+    async def scenario():
+        async def persona():
+            return {"name": "Ilse"}
+
+        async def scenario_node(persona):
+            return f"{persona['name']} at the lighthouse"
+
+        graph = TaskGraph("test").add("persona", persona).add("scenario", scenario_node, "persona").start()
+        return await graph.wait("scenario")
+
+    assert asyncio.run(scenario()) == {"scenario": "Ilse at the lighthouse"}
+
+def test_failure_propagates_to_dependents_only():
+    async def scenario():
+        ran = []
+
+        async def broken():
+            raise RuntimeError("no persona")
+
+        async def dependent(broken):
+            ran.append("dependent")
+
+        async def independent():
+            return "ok"
+
+        graph = TaskGraph("test")
+        graph.add("broken", broken).add("dependent", dependent, "broken").add("independent", independent)
+        graph.start()
+        with pytest.raises(RuntimeError, match="no persona"):
+            await graph.wait("dependent")
+        failed = await graph.finished()
+        return ran, failed, await graph.wait("independent")
+
+    ran, failed, independent = asyncio.run(scenario())
+    assert ran == []
+    assert set(failed) == {"broken", "dependent"}
+    assert independent == {"independent": "ok"}
+
+def test_on_done_reports_successes_and_survives_its_own_errors():
+    async def scenario():
+        done = []
+
+        async def on_done(name):
+            done.append(name)
+            if name == "a":
+                raise RuntimeError("progress store is down")
+
+        async def ok(**deps):
+            return 1
+
+        async def broken():
+            raise RuntimeError("boom")
+
+        graph = TaskGraph("test", on_done=on_done).add("a", ok).add("b", ok, "a").add("c", broken)
+        graph.start()
+        failed = await graph.finished()
+        return done, failed, graph.timings
+
+    done, failed, timings = asyncio.run(scenario())
+    assert sorted(done) == ["a", "b"]
+    assert list(failed) == ["c"]
+    assert set(timings) == {"a", "b", "c"}
+
+def test_cancelled_waiter_does_not_cancel_nodes():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return "done"
+
+        graph = TaskGraph("test").add("slow", slow).start()
+        waiter = asyncio.create_task(graph.wait("slow"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        release.set()
+        return await graph.wait("slow")
+
+    assert asyncio.run(scenario()) == {"slow": "done"}
+
+def test_graph_is_built_without_cycles():
+    async def fn():
+        return None
+
+    graph = TaskGraph("test").add("a", fn)
+    with pytest.raises(ValueError, match="duplicate"):
+        graph.add("a", fn)
+    with pytest.raises(ValueError, match="unknown node"):
+        graph.add("b", fn, "missing")
@@ -1,2 +1,3 @@
+import asyncio
 from backend.app.services.supabase import supabase_service
-print(f"Supabase connected: {supabase_service.get_client() is not None}")
+print(f"Supabase connected: {asyncio.run(supabase_service.get_client()) is not None}")
@@ -1,5 +1,6 @@
 
 from backend.app.services.memory import memory_service
+import asyncio
 import uuid
 
 # Use a random UUID. 
@@ -8,7 +9,7 @@ import uuid
 try:
     dummy_id = str(uuid.uuid4())
     print(f"Testing search with dummy ID: {dummy_id}")
-    results = memory_service.retrieve_relevant_memories(dummy_id, "Hello world")
+    results = asyncio.run(memory_service.retrieve_relevant_memories(dummy_id, "Hello world"))
     print(f"Success! Result: {results}")
 except Exception as e:
     print(f"Verification Failed: {e}")
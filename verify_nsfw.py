@@ -1,13 +1,14 @@
 
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
+import asyncio
 import sys
 
 # Mock Supabase
 sys.modules['backend.app.services.supabase'] = MagicMock()
 from backend.app.services.supabase import supabase_service
 mock_client = MagicMock()
-supabase_service.get_client.return_value = mock_client
-mock_client.table.return_value.update.return_value.eq.return_value.execute.return_value = None
+supabase_service.get_client = AsyncMock(return_value=mock_client)
+mock_client.table.return_value.update.return_value.eq.return_value.execute = AsyncMock(return_value=None)
 
 from backend.app.services.cortex import cortex_service
 from backend.app.models.domain import DirectorOutput
@@ -15,14 +16,14 @@ from backend.app.models.domain import DirectorOutput
 def test_low_trust():
     print("\n--- Testing Low Trust (<50) ---")
     try:
-        res = cortex_service.process_chat(
+        res = asyncio.run(cortex_service.process_chat(
             'sim_low', 
             'Kiss me', 
             {'name':'Eva','core_wound':'Used','values_matrix':{}}, 
             {'emotional_bank_account':10}, 
             [], 
             []
-        )
+        ))
         print(f"Reaction: {res['director_log']['emotional_reaction']}")
         print(f"Response: {res['reply_text']}")
     except Exception as e:
@@ -31,14 +32,14 @@ def test_low_trust():
 def test_high_trust():
     print("\n--- Testing High Trust (>=50) ---")
     try:
-        res = cortex_service.process_chat(
+        res = asyncio.run(cortex_service.process_chat(
             'sim_high', 
             'Kiss me', 
             {'name':'Eva','core_wound':'Used','values_matrix':{}}, 
             {'emotional_bank_account':80}, 
             [], 
             []
-        )
+        ))
         print(f"Reaction: {res['director_log']['emotional_reaction']}")
         print(f"Response: {res['reply_text']}")
     except Exception as e: